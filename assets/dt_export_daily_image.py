@@ -11,6 +11,7 @@ import sys
 import ee
 
 import openet.ssebop as ssebop
+from openet.ssebop.tasks import TaskSubmitter
 import utils
 # from . import utils
 
@@ -79,6 +80,11 @@ def main(ini_path=None, overwrite_flag=False, delay=0, key=None,
     else:
         ee.Initialize(use_cloud_api=False)
 
+    # Export tasks are started from a pool of threads, with the delay time
+    #   converted to a maximum task start rate
+    task_submitter = TaskSubmitter(
+        rate=1.0 / delay if delay > 0 else None)
+
     # Output dT daily image collection
     dt_daily_coll_id = '{}/{}_daily'.format(
         ini['EXPORT']['export_coll'], ini[model_name]['dt_source'].lower())
@@ -253,12 +259,13 @@ def main(ini_path=None, overwrite_flag=False, delay=0, key=None,
                 dimensions='{0}x{1}'.format(*export_shape),
             )
             logging.info('  Starting export task')
-            utils.ee_task_start(task)
+            task_submitter.submit(task)
 
-        # Pause before starting next task
-        utils.delay_task(delay)
         logging.debug('')
 
+    # Wait for the remaining export tasks to be started
+    task_submitter.shutdown()
+
 
 def arg_parse():
     """"""
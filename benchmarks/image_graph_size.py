@@ -0,0 +1,93 @@
+import argparse
+import json
+import logging
+
+import ee
+
+import openet.ssebop as ssebop
+
+
+def main(image_id, variables, tcorr_source='SCENE', gee_key_file=None):
+    """Compare the serialized graph size of Image.calculate()
+
+    The graph is built with the scene properties computed server side (from
+    the image 'system:index' and 'system:time_start') and client side (from
+    the image ID), and the number of nodes in each serialized graph is
+    reported.  No computations are requested.
+
+    Parameters
+    ----------
+    image_id : str
+        Landsat Collection 1 TOA or SR image ID.
+    variables : list
+        Variables to calculate.
+    tcorr_source : str, optional
+        Tcorr source keyword (the default is 'SCENE').
+    gee_key_file : str, None, optional
+        Earth Engine service account JSON key file (the default is None).
+
+    """
+    logging.info('\nInitializing Earth Engine')
+    if gee_key_file:
+        logging.info('  Using service account key file: {}'.format(gee_key_file))
+        # The "EE_ACCOUNT" parameter is not used if the key file is valid
+        ee.Initialize(ee.ServiceAccountCredentials('x', key_file=gee_key_file),
+                      use_cloud_api=True)
+    else:
+        ee.Initialize(use_cloud_api=True)
+
+    model_args = {'tcorr_source': tcorr_source,
+                  'et_reference_source': 'IDAHO_EPSCOR/GRIDMET',
+                  'et_reference_band': 'etr'}
+    if 'LANDSAT' in image_id.upper() and '_SR/' in image_id.upper():
+        method = ssebop.Image.from_landsat_c1_sr
+    else:
+        method = ssebop.Image.from_landsat_c1_toa
+
+    logging.info('\n{}'.format(image_id))
+    logging.info('{:<16s} {:>8s} {:>8s}'.format('Variable', 'Server', 'Client'))
+    for variable in variables:
+        server_img = method(ee.Image(image_id), **model_args)\
+            .calculate([variable])
+        client_img = ssebop.Image.from_image_id(image_id, **model_args)\
+            .calculate([variable])
+        logging.info('{:<16s} {:>8d} {:>8d}'.format(
+            variable, graph_size(server_img), graph_size(client_img)))
+
+
+def graph_size(ee_obj):
+    """Return the number of nodes in the serialized Earth Engine graph"""
+    return len(json.loads(ee_obj.serialize(for_cloud_api=True))['values'])
+
+
+def arg_parse():
+    """"""
+    parser = argparse.ArgumentParser(
+        description='Compare the serialized graph size of Image.calculate()',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '--image', default='LANDSAT/LC08/C01/T1_TOA/LC08_042035_20150713',
+        help='Landsat image ID')
+    parser.add_argument(
+        '--variables', default=['ndvi', 'et_fraction', 'et', 'time'],
+        nargs='+', help='Variables to calculate')
+    parser.add_argument(
+        '--tcorr', default='SCENE', help='Tcorr source keyword')
+    parser.add_argument(
+        '--key', metavar='FILE', help='JSON key file')
+    parser.add_argument(
+        '-d', '--debug', default=logging.INFO, const=logging.DEBUG,
+        help='Debug level logging', action='store_const', dest='loglevel')
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    args = arg_parse()
+
+    logging.basicConfig(level=args.loglevel, format='%(message)s')
+    logging.getLogger('googleapiclient').setLevel(logging.ERROR)
+
+    main(image_id=args.image, variables=args.variables,
+         tcorr_source=args.tcorr, gee_key_file=args.key)
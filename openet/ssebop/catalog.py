@@ -0,0 +1,265 @@
+import datetime
+import sqlite3
+
+import ee
+
+from . import utils
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS scenes (
+    image_id TEXT PRIMARY KEY,
+    coll_id TEXT NOT NULL,
+    scene_id TEXT NOT NULL,
+    sensor TEXT NOT NULL,
+    wrs2_path INTEGER NOT NULL,
+    wrs2_row INTEGER NOT NULL,
+    date TEXT NOT NULL,
+    time_start INTEGER NOT NULL,
+    cloud_cover_land REAL,
+    data_type TEXT,
+    xmin REAL,
+    ymin REAL,
+    xmax REAL,
+    ymax REAL
+);
+CREATE INDEX IF NOT EXISTS scenes_coll_time
+    ON scenes (coll_id, time_start);
+CREATE INDEX IF NOT EXISTS scenes_wrs2
+    ON scenes (wrs2_path, wrs2_row);
+"""
+
+FIELDS = [
+    'image_id', 'coll_id', 'scene_id', 'sensor', 'wrs2_path', 'wrs2_row',
+    'date', 'time_start', 'cloud_cover_land', 'data_type',
+    'xmin', 'ymin', 'xmax', 'ymax',
+]
+
+
+class SceneCatalog():
+    """SQLite index of Landsat scene metadata
+
+    The catalog stores the metadata needed to select the scenes for a
+    collection (ID, sensor, WRS2 path/row, date, CLOUD_COVER_LAND, DATA_TYPE,
+    and footprint bounding box) so that scene lists can be resolved client
+    side instead of with Earth Engine filters on every call.
+
+    """
+
+    def __init__(self, path=':memory:'):
+        """Open (or create) a scene catalog
+
+        Parameters
+        ----------
+        path : str, optional
+            SQLite database file path (the default is ':memory:').
+
+        """
+        self.path = path
+        self._conn = sqlite3.connect(path)
+        self._conn.executescript(SCHEMA)
+
+    def __len__(self):
+        return self._conn.execute('SELECT COUNT(*) FROM scenes').fetchone()[0]
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def add(self, records):
+        """Insert or replace scene records
+
+        Parameters
+        ----------
+        records : iterable of dict
+            Scene metadata with at least 'image_id' (full image ID including
+            the collection ID) and 'time_start' keys.  The collection ID,
+            scene ID, sensor, WRS2 path/row, and date are parsed from the
+            image ID if they are not set.
+
+        Returns
+        -------
+        int of the number of records added
+
+        Raises
+        ------
+        ValueError if an image ID is not a Landsat image ID
+
+        """
+        rows = []
+        for record in records:
+            scene_info = utils.parse_scene_id(record['image_id'])
+            scene_id = scene_info['scene_id']
+            row = {
+                'coll_id': record['image_id'].rsplit('/', 1)[0],
+                'scene_id': scene_id,
+                'sensor': scene_id[:4],
+                'wrs2_path': int(scene_id[5:8]),
+                'wrs2_row': int(scene_id[8:11]),
+                'date': scene_info['date'].strftime('%Y-%m-%d'),
+            }
+            row.update({k: v for k, v in record.items() if v is not None})
+            rows.append(tuple(row.get(f) for f in FIELDS))
+
+        with self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO scenes ({}) VALUES ({})'.format(
+                    ', '.join(FIELDS), ', '.join(['?'] * len(FIELDS))),
+                rows)
+        return len(rows)
+
+    def last_date(self, coll_id):
+        """Return the last scene date ('YYYY-MM-DD') for a collection
+
+        Returns
+        -------
+        str, None if there are no scenes for the collection
+
+        """
+        return self._conn.execute(
+            'SELECT MAX(date) FROM scenes WHERE coll_id = ?',
+            (coll_id,)).fetchone()[0]
+
+    def refresh(self, coll_id, start_date=None, end_date=None,
+                geometry=None, page_size=5000):
+        """Add the scene metadata from an Earth Engine collection
+
+        Parameters
+        ----------
+        coll_id : str
+            Landsat image collection ID.
+        start_date : str, optional
+            ISO format inclusive start date.  If not set, the refresh starts
+            at the last date in the catalog for the collection (or 1984-01-01
+            for an empty catalog) so only new scenes are requested.
+        end_date : str, optional
+            ISO format exclusive end date (the default is tomorrow).
+        geometry : ee.Geometry, optional
+            If set, only scenes intersecting the geometry are added.
+        page_size : int, optional
+            Number of scenes requested in each getInfo call (the default is
+            5000, the Earth Engine limit).
+
+        Returns
+        -------
+        int of the number of records added or updated
+
+        Notes
+        -----
+        The scene metadata is requested in pages since a full refresh
+        (starting in 1984) has far more scenes than a single getInfo call can
+        return.  Earth Engine exceptions are not caught so a failed refresh
+        doesn't silently add a partial date range.
+
+        """
+        if start_date is None:
+            start_date = self.last_date(coll_id) or '1984-01-01'
+        if end_date is None:
+            end_date = (datetime.datetime.today() +
+                        datetime.timedelta(days=1)).strftime('%Y-%m-%d')
+
+        input_coll = ee.ImageCollection(coll_id)\
+            .filterDate(start_date, end_date)
+        if geometry is not None:
+            input_coll = input_coll.filterBounds(geometry)
+
+        def scene_info(image):
+            return ee.Feature(None, {
+                'image_index': image.get('system:index'),
+                'time_start': image.get('system:time_start'),
+                'cloud_cover_land': image.get('CLOUD_COVER_LAND'),
+                'data_type': image.get('DATA_TYPE'),
+                'bounds': image.geometry().bounds().coordinates(),
+            })
+        scene_coll = input_coll.sort('system:time_start').map(scene_info)
+
+        count = 0
+        offset = 0
+        while True:
+            features = scene_coll.toList(page_size, offset).getInfo()
+            records = []
+            for ftr in features:
+                properties = ftr['properties']
+                xmin, ymin, xmax, ymax = geojson_bbox(properties['bounds'])
+                records.append({
+                    'image_id': '{}/{}'.format(
+                        coll_id, properties['image_index']),
+                    'time_start': properties['time_start'],
+                    'cloud_cover_land': properties.get('cloud_cover_land'),
+                    'data_type': properties.get('data_type'),
+                    'xmin': xmin, 'ymin': ymin, 'xmax': xmax, 'ymax': ymax,
+                })
+            count += self.add(records)
+            if len(features) < page_size:
+                break
+            offset += page_size
+        return count
+
+    def image_ids(self, coll_id, start_date, end_date, bbox=None,
+                  cloud_cover_max=None, data_type=None, wrs2_tiles=None):
+        """Return the sorted image IDs that match the filters
+
+        Parameters
+        ----------
+        coll_id : str
+            Landsat image collection ID.
+        start_date : str
+            ISO format inclusive start date.
+        end_date : str
+            ISO format exclusive end date.
+        bbox : list, optional
+            Bounding box [xmin, ymin, xmax, ymax] in EPSG:4326 that the scene
+            footprint bounding box must intersect.  Scenes without a bounding
+            box are always included.
+        cloud_cover_max : float, optional
+            Scenes must have a CLOUD_COVER_LAND less than this value.
+        data_type : str, optional
+            Scenes must have this DATA_TYPE (i.e. 'L1TP').
+        wrs2_tiles : list, optional
+            WRS2 tiles (i.e. 'p044r033') that the scenes must be in.
+
+        Returns
+        -------
+        list
+
+        """
+        # Dates are compared as times to match ee.ImageCollection.filterDate()
+        start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+        end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+        query = ['coll_id = ?', 'time_start >= ?', 'time_start < ?']
+        args = [coll_id, utils.millis(start_dt), utils.millis(end_dt)]
+        if bbox is not None:
+            query.append('(xmin IS NULL OR '
+                         '(xmin <= ? AND xmax >= ? AND ymin <= ? AND ymax >= ?))')
+            args.extend([bbox[2], bbox[0], bbox[3], bbox[1]])
+        if cloud_cover_max is not None:
+            query.append('cloud_cover_land < ?')
+            args.append(cloud_cover_max)
+        if data_type is not None:
+            query.append('data_type = ?')
+            args.append(data_type)
+        if wrs2_tiles:
+            query.append('(wrs2_path, wrs2_row) IN ({})'.format(
+                ', '.join(['(?, ?)'] * len(wrs2_tiles))))
+            for wrs2_tile in wrs2_tiles:
+                args.extend([int(wrs2_tile[1:4]), int(wrs2_tile[5:8])])
+
+        return [row[0] for row in self._conn.execute(
+            'SELECT image_id FROM scenes WHERE {} ORDER BY image_id'.format(
+                ' AND '.join(query)), args)]
+
+
+def geojson_bbox(coordinates):
+    """Return the [xmin, ymin, xmax, ymax] of nested GeoJSON coordinates"""
+    xs, ys = [], []
+
+    def flatten(coords):
+        if coords and isinstance(coords[0], (int, float)):
+            xs.append(coords[0])
+            ys.append(coords[1])
+        else:
+            for c in coords:
+                flatten(c)
+    flatten(coordinates)
+    if not xs:
+        return [None, None, None, None]
+    return [min(xs), min(ys), max(xs), max(ys)]
@@ -1,3 +1,4 @@
+import concurrent.futures
 import copy
 import datetime
 import pprint
@@ -5,6 +6,8 @@ import pprint
 from dateutil.relativedelta import *
 import ee
 
+from . import catalog
+from . import interpolate
 from . import utils
 from .image import Image
 # Importing to get version number, is there a better way?
@@ -46,6 +49,7 @@ class Collection():
             et_reference_resample=None,
             filter_args=None,
             model_args=None,
+            catalog=None,
             # model_args={'et_reference_source': 'IDAHO_EPSCOR/GRIDMET',
             #             'et_reference_band': 'etr',
             #             'et_reference_factor': 0.85,
@@ -92,6 +96,10 @@ class Collection():
         model_args : dict
             Model Image initialization keyword arguments (the default is None).
             Dictionary will be passed through to model Image init.
+        catalog : SceneCatalog, optional
+            Local scene catalog (the default is None).  If set, the scene
+            image IDs are selected from the catalog client side and the
+            collections are built from the explicit image ID lists.
 
         """
         self.collections = collections
@@ -100,6 +108,7 @@ class Collection():
         self.end_date = end_date
         self.geometry = geometry
         self.cloud_cover_max = cloud_cover_max
+        self.catalog = catalog
 
         # CGM - Should we check that model_args and filter_args are dict?
         if model_args is not None:
@@ -253,12 +262,16 @@ class Collection():
         for coll_id in self.collections:
             # DEADBEEF - Move to separate methods/functions for each type
             if coll_id in self._landsat_c1_toa_collections:
-                input_coll = ee.ImageCollection(coll_id)\
-                    .filterDate(start_date, end_date)\
-                    .filterBounds(self.geometry)\
-                    .filterMetadata('DATA_TYPE', 'equals', 'L1TP')\
-                    .filterMetadata('CLOUD_COVER_LAND', 'less_than',
-                                    self.cloud_cover_max)
+                if self.catalog is not None:
+                    input_coll = self._catalog_coll(
+                        coll_id, start_date, end_date, data_type='L1TP')
+                else:
+                    input_coll = ee.ImageCollection(coll_id)\
+                        .filterDate(start_date, end_date)\
+                        .filterBounds(self.geometry)\
+                        .filterMetadata('DATA_TYPE', 'equals', 'L1TP')\
+                        .filterMetadata('CLOUD_COVER_LAND', 'less_than',
+                                        self.cloud_cover_max)
 
                 # TODO: Need to come up with a system for applying
                 #   generic filter arguments to the collections
@@ -272,10 +285,11 @@ class Collection():
                             input_coll = input_coll.filter(ee.Filter.equals(**f))
 
                 # Time filters are to remove bad (L5) and pre-op (L8) images
-                if 'LT05' in coll_id:
+                # The catalog image IDs are already time filtered
+                if self.catalog is None and 'LT05' in coll_id:
                     input_coll = input_coll.filter(ee.Filter.lt(
                         'system:time_start', ee.Date('2011-12-31').millis()))
-                elif 'LC08' in coll_id:
+                elif self.catalog is None and 'LC08' in coll_id:
                     input_coll = input_coll.filter(ee.Filter.gt(
                         'system:time_start', ee.Date('2013-03-24').millis()))
 
@@ -288,11 +302,15 @@ class Collection():
                     ee.ImageCollection(input_coll.map(compute_ltoa)))
 
             elif coll_id in self._landsat_c1_sr_collections:
-                input_coll = ee.ImageCollection(coll_id)\
-                    .filterDate(start_date, end_date)\
-                    .filterBounds(self.geometry)\
-                    .filterMetadata('CLOUD_COVER_LAND', 'less_than',
-                                    self.cloud_cover_max)
+                if self.catalog is not None:
+                    input_coll = self._catalog_coll(
+                        coll_id, start_date, end_date, data_type=None)
+                else:
+                    input_coll = ee.ImageCollection(coll_id)\
+                        .filterDate(start_date, end_date)\
+                        .filterBounds(self.geometry)\
+                        .filterMetadata('CLOUD_COVER_LAND', 'less_than',
+                                        self.cloud_cover_max)
 
                 # TODO: Need to come up with a system for applying
                 #   generic filter arguments to the collections
@@ -306,10 +324,11 @@ class Collection():
                             input_coll = input_coll.filter(ee.Filter.equals(**f))
 
                 # Time filters are to remove bad (L5) and pre-op (L8) images
-                if 'LT05' in coll_id:
+                # The catalog image IDs are already time filtered
+                if self.catalog is None and 'LT05' in coll_id:
                     input_coll = input_coll.filter(ee.Filter.lt(
                         'system:time_start', ee.Date('2011-12-31').millis()))
-                elif 'LC08' in coll_id:
+                elif self.catalog is None and 'LC08' in coll_id:
                     input_coll = input_coll.filter(ee.Filter.gt(
                         'system:time_start', ee.Date('2013-03-24').millis()))
 
@@ -326,6 +345,56 @@ class Collection():
 
         return variable_coll
 
+    def _catalog_coll(self, coll_id, start_date, end_date, data_type=None):
+        """Build a collection from the catalog image IDs
+
+        Parameters
+        ----------
+        coll_id : str
+            Landsat image collection ID.
+        start_date : str
+            ISO format inclusive start date.
+        end_date : str
+            ISO format exclusive end date.
+        data_type : str, optional
+            Image DATA_TYPE to select (the default is None).
+
+        Returns
+        -------
+        ee.ImageCollection
+
+        Notes
+        -----
+        The catalog only stores the footprint bounding box, so the (short)
+        explicit image list is still filtered by the collection geometry to
+        match the scenes selected by .filterBounds() exactly.
+
+        """
+        # Time filters are to remove bad (L5) and pre-op (L8) images
+        if 'LT05' in coll_id:
+            end_date = min(end_date, '2011-12-31')
+        elif 'LC08' in coll_id:
+            start_date = max(start_date, '2013-03-24')
+        if start_date >= end_date:
+            return ee.ImageCollection([])
+
+        image_id_list = self.catalog.image_ids(
+            coll_id, start_date, end_date, bbox=self._geometry_bbox,
+            cloud_cover_max=self.cloud_cover_max, data_type=data_type)
+        return ee.ImageCollection([ee.Image(image_id)
+                                   for image_id in image_id_list])\
+            .filterBounds(self.geometry)
+
+    @lazy_property
+    def _geometry_bbox(self):
+        """Bounding box of the collection geometry (for the catalog)"""
+        try:
+            # Geometries built from coordinates can be read client side
+            coordinates = self.geometry.toGeoJSON()['coordinates']
+        except ee.EEException:
+            coordinates = utils.getinfo(self.geometry.bounds())['coordinates']
+        return catalog.geojson_bbox(coordinates)
+
     def overpass(self, variables=None):
         """Return a collection of computed values for the overpass images
 
@@ -504,18 +573,17 @@ class Collection():
         if 'et_reference' in variables and 'et_fraction' not in interp_vars:
             interp_vars.append('et_fraction')
 
-        # The time band is always needed for interpolation
-        interp_vars.append('time')
-
         # Count will be determined using the aggregate_coll image masks
         if 'count' in variables:
             interp_vars.append('mask')
             # interp_vars.remove('count')
 
         # Build initial scene image collection
+        # The ET fraction mask is always needed for the time band
         scene_coll = self._build(
-            variables=interp_vars, start_date=interp_start_date,
-            end_date=interp_end_date)
+            variables=interp_vars + (
+                ['et_fraction'] if 'et_fraction' not in interp_vars else []),
+            start_date=interp_start_date, end_date=interp_end_date)
 
         # For count, compute the composite/mosaic image for the mask band only
         if 'count' in variables:
@@ -538,12 +606,21 @@ class Collection():
         if 'mask' in interp_vars:
             interp_vars.remove('mask')
 
+        # The time band is built from the scene time_start property
+        #   instead of being computed for every pixel by the model
+        # It has the ET fraction mask (the same as Image.time) even if
+        #   ET fraction is not interpolated
+        source_coll = scene_coll\
+            .select(list(set(interp_vars + ['et_fraction'])))\
+            .map(lambda img: interpolate.add_time_band(img, 'et_fraction'))\
+            .select(interp_vars + ['time'])
+
         # Interpolate to a daily time step
         # NOTE: the daily function is not computing ET (ETf x ETr)
         #   but is returning the target (ETr) band
         daily_coll = openet.core.interpolate.daily(
             target_coll=daily_et_ref_coll,
-            source_coll=scene_coll.select(interp_vars),
+            source_coll=source_coll,
             interp_method=interp_method,  interp_days=interp_days,
         )
 
@@ -679,6 +756,105 @@ class Collection():
                 agg_start_date=start_date, agg_end_date=end_date,
                 date_format='YYYYMMdd'))
 
+    def interpolate_windows(self, variables=None, t_interval='monthly',
+                            interp_method='linear', interp_days=32,
+                            window_years=1, window_func=None, max_workers=4,
+                            combine=False, **kwargs):
+        """Interpolate the collection in separate time windows
+
+        Parameters
+        ----------
+        variables : list, optional
+            List of variables that will be returned in the Image Collection.
+            If variables is not set here it must be specified in the class
+            instantiation call.
+        t_interval : {'daily', 'monthly', 'annual'}, optional
+            Time interval over which to interpolate and aggregate values
+            (the default is 'monthly').
+        interp_method : {'linear}, optional
+            Interpolation method (the default is 'linear').
+        interp_days : int, str, optional
+            Number of extra days before the start date and after the end date
+            of each window to include in the interpolation calculation
+            (the default is 32).
+        window_years : int, optional
+            Number of calendar years in each window (the default is 1).
+        window_func : function, optional
+            Function that is called with the interpolated ee.ImageCollection
+            of each window (i.e. to compute or export the window).
+            If not set, each window is computed with a getInfo() call.
+        max_workers : int, optional
+            Maximum number of windows that window_func is run on at the same
+            time (the default is 4).
+        combine : bool, optional
+            If True, return the images of all of the windows as a single
+            ee.ImageCollection without computing them (the default is False).
+        kwargs : dict, optional
+            Reference ET keyword arguments passed through to interpolate().
+
+        Returns
+        -------
+        list of the window_func return values (in window order), or
+        ee.ImageCollection if combine is True
+
+        Raises
+        ------
+        ValueError for unsupported input parameters
+        ValueError if window_func is set and combine is True
+
+        Notes
+        -----
+        Each window is a separate interpolate() call on a copy of the
+        collection, so only the scenes within interp_days of the window are
+        included in its graph.  Windows start on January 1st and never split
+        an aggregation period, so the combined windows are the same images that
+        a single interpolate() call over the full date range would return.
+
+        The combined collection is only a convenience for building on the
+        windows server side.  Computing it is the same single request as an
+        interpolate() call over the full date range, so large date ranges
+        should be computed per window.
+
+        """
+        if t_interval.lower() not in ['daily', 'monthly', 'annual']:
+            raise ValueError('unsupported t_interval: {}'.format(t_interval))
+        if type(max_workers) is not int or max_workers <= 0:
+            raise ValueError('max_workers must be a positive integer')
+        if window_func is not None and combine:
+            raise ValueError('window_func can not be set if combine is True')
+        elif window_func is None:
+            window_func = utils.getinfo
+
+        # Expand the date range to fully include the time interval before
+        #   splitting so the first window starts on a period boundary
+        start_dt, end_dt = interpolate._interval_dates(
+            self.start_date, self.end_date, t_interval)
+        windows = utils.date_windows(
+            start_dt.strftime('%Y-%m-%d'), end_dt.strftime('%Y-%m-%d'),
+            years=window_years)
+
+        window_colls = []
+        for window_start_date, window_end_date in windows:
+            # interpolate() can modify model_args so each window gets a copy
+            window_obj = copy.copy(self)
+            window_obj.model_args = copy.deepcopy(self.model_args)
+            window_obj.start_date = window_start_date
+            window_obj.end_date = window_end_date
+            window_colls.append(window_obj.interpolate(
+                variables=variables, t_interval=t_interval,
+                interp_method=interp_method, interp_days=interp_days,
+                **kwargs))
+
+        if combine:
+            # ImageCollection.merge() prefixes the system:index of each image,
+            #   so the windows are concatenated as image lists instead
+            return ee.ImageCollection(ee.List([
+                window_coll.toList(window_coll.size())
+                for window_coll in window_colls]).flatten())
+
+        with concurrent.futures.ThreadPoolExecutor(max_workers) as executor:
+            return list(executor.map(window_func, window_colls))
+
     def get_image_ids(self):
         """Return image IDs of the input images
 
@@ -6,6 +6,7 @@ import ee
 
 from . import landsat
 from . import model
+from . import tcorr
 from . import utils
 import openet.core.common as common
 # TODO: import utils from common
@@ -78,8 +79,12 @@ class Image():
                         'SCENE', 'SCENE_DAILY', 'SCENE_MONTHLY',
                         'SCENE_ANNUAL', 'SCENE_DEFAULT'
                         'IMAGE', 'IMAGE_DAILY', 'IMAGE_MONTHLY',
-                        'IMAGE_ANNUAL', 'IMAGE_DEFAULT', or float}, optional
+                        'IMAGE_ANNUAL', 'IMAGE_DEFAULT', TcorrIndex,
+                        (TcorrIndex, keyword), or float}, optional
             Tcorr source keyword (the default is 'IMAGE').
+            A TcorrIndex requires the scene_id keyword argument.  A TcorrIndex
+            can be paired with a 'SCENE' or 'DYNAMIC' keyword (see
+            TcorrIndex.lookup()) to select the Tcorr levels.
         tmax_source : {'CIMIS', 'DAYMET', 'GRIDMET', 'DAYMET_MEDIAN_V2',
                        'TOPOWX_MEDIAN_V0', or float}, optional
             Maximum air temperature source (the default is 'TOPOWX_MEDIAN_V0').
@@ -93,12 +98,17 @@ class Image():
         kwargs : dict, optional
             tmax_resample : {'nearest', 'bilinear'}
             dt_resample : {'nearest', 'bilinear'}
+            scene_id : str (Landsat scene or image ID of the image)
 
         Notes
         -----
         Input image must have a Landsat style 'system:index' in order to
         lookup Tcorr value from table asset.  (i.e. LC08_043033_20150805)
 
+        If the scene_id keyword argument is set (i.e. by from_image_id()),
+        the scene ID, WRS2 tile, and date properties are computed client side
+        instead of from the image 'system:index' and 'system:time_start'.
+
         """
         self.image = ee.Image(image)
 
@@ -116,25 +126,45 @@ class Image():
             'image_id': self._id,
         }
 
-        # Build SCENE_ID from the (possibly merged) system:index
-        scene_id = ee.List(ee.String(self._index).split('_')).slice(-3)
-        self._scene_id = ee.String(scene_id.get(0)).cat('_')\
-            .cat(ee.String(scene_id.get(1))).cat('_')\
-            .cat(ee.String(scene_id.get(2)))
-
-        # Build WRS2_TILE from the scene_id
-        self._wrs2_tile = ee.String('p').cat(self._scene_id.slice(5, 8))\
-            .cat('r').cat(self._scene_id.slice(8, 11))
-
-        # Set server side date/time properties using the 'system:time_start'
-        self._date = ee.Date(self._time_start)
-        self._year = ee.Number(self._date.get('year'))
-        self._month = ee.Number(self._date.get('month'))
-        self._start_date = ee.Date(utils.date_to_time_0utc(self._date))
-        self._end_date = self._start_date.advance(1, 'day')
-        self._doy = ee.Number(self._date.getRelative('day', 'year')).add(1).int()
-        self._cycle_day = self._start_date.difference(
-            ee.Date.fromYMD(1970, 1, 3), 'day').mod(8).add(1).int()
+        if kwargs.get('scene_id'):
+            # Build the scene and date properties client side if the scene ID
+            #   is known, so they are constants in the request graph
+            # The scene date is the UTC acquisition date of the image
+            scene_info = utils.parse_scene_id(kwargs['scene_id'])
+            scene_dt = scene_info['date']
+            self._scene_id = ee.String(scene_info['scene_id'])
+            self._wrs2_tile = ee.String(scene_info['wrs2_tile'])
+            self._date = ee.Date(self._time_start)
+            self._year = ee.Number(scene_dt.year)
+            self._month = ee.Number(scene_dt.month)
+            self._start_date = ee.Date(utils.millis(scene_dt))
+            self._end_date = ee.Date(
+                utils.millis(scene_dt + datetime.timedelta(days=1)))
+            self._doy = ee.Number(int(scene_dt.strftime('%j')))
+            self._cycle_day = ee.Number(
+                (scene_dt - datetime.datetime(1970, 1, 3)).days % 8 + 1)
+            self._scene_info = scene_info
+        else:
+            # Build SCENE_ID from the (possibly merged) system:index
+            scene_id = ee.List(ee.String(self._index).split('_')).slice(-3)
+            self._scene_id = ee.String(scene_id.get(0)).cat('_')\
+                .cat(ee.String(scene_id.get(1))).cat('_')\
+                .cat(ee.String(scene_id.get(2)))
+
+            # Build WRS2_TILE from the scene_id
+            self._wrs2_tile = ee.String('p').cat(self._scene_id.slice(5, 8))\
+                .cat('r').cat(self._scene_id.slice(8, 11))
+
+            # Set server side date/time properties using the 'system:time_start'
+            self._date = ee.Date(self._time_start)
+            self._year = ee.Number(self._date.get('year'))
+            self._month = ee.Number(self._date.get('month'))
+            self._start_date = ee.Date(utils.date_to_time_0utc(self._date))
+            self._end_date = self._start_date.advance(1, 'day')
+            self._doy = ee.Number(self._date.getRelative('day', 'year')).add(1).int()
+            self._cycle_day = self._start_date.difference(
+                ee.Date.fromYMD(1970, 1, 3), 'day').mod(8).add(1).int()
+            self._scene_info = None
 
         # Reference ET parameters
         self.et_reference_source = et_reference_source
@@ -171,13 +201,6 @@ class Image():
                 raise ValueError('elr_flag "{}" could not be interpreted as '
                                  'bool'.format(self._elr_flag))
 
-        # Image projection and geotransform
-        self.crs = image.projection().crs()
-        self.transform = ee.List(ee.Dictionary(
-            ee.Algorithms.Describe(image.projection())).get('transform'))
-        # self.crs = image.select([0]).projection().getInfo()['crs']
-        # self.transform = image.select([0]).projection().getInfo()['transform']
-
         # Set the resample method as properties so they can be modified
         if 'dt_resample' in kwargs.keys():
             self._dt_resample = kwargs['dt_resample'].lower()
@@ -188,6 +211,18 @@ class Image():
         else:
             self._tmax_resample = 'bilinear'
 
+    @lazy_property
+    def crs(self):
+        """Image CRS (only needed for the Tcorr neighborhood and reductions)"""
+        return self.image.projection().crs()
+
+    @lazy_property
+    def transform(self):
+        """Image geotransform"""
+        return ee.List(ee.Dictionary(
+            ee.Algorithms.Describe(self.image.projection())).get('transform'))
+        # return self.image.select([0]).projection().getInfo()['transform']
+
     def calculate(self, variables=['et', 'et_reference', 'et_fraction']):
         """Return a multiband image of calculated variables
 
@@ -317,7 +352,7 @@ class Image():
     def time(self):
         """Return an image of the 0 UTC time (in milliseconds)"""
         return self.mask\
-            .double().multiply(0).add(utils.date_to_time_0utc(self._date))\
+            .double().multiply(0).add(self._start_date.millis())\
             .rename(['time']).set(self._properties)
 
     @lazy_property
@@ -476,6 +511,43 @@ class Image():
             return ee.Image.constant(float(self._tcorr_source))\
                 .rename(['tcorr']).set({'tcorr_index': 4})
 
+        elif isinstance(self._tcorr_source, (tcorr.TcorrIndex, tuple)):
+            # Lookup a constant Tcorr using the client side scene ID
+            # The index can be paired with a Tcorr source keyword
+            if isinstance(self._tcorr_source, tuple):
+                tcorr_obj, tcorr_keyword = self._tcorr_source
+            else:
+                tcorr_obj, tcorr_keyword = self._tcorr_source, 'SCENE'
+            if self._scene_info is None:
+                raise ValueError(
+                    'scene_id must be set to use a TcorrIndex tcorr_source')
+            tcorr_value, tcorr_index = tcorr_obj.lookup(
+                self._scene_info['wrs2_tile'], self._scene_info['date'],
+                tcorr_keyword)
+            if tcorr_value is None:
+                tcorr_img = ee.Image.constant(0).updateMask(0)\
+                    .rename(['tcorr']).set({'tcorr_index': tcorr_index})
+            else:
+                tcorr_img = ee.Image.constant(tcorr_value)\
+                    .rename(['tcorr']).set({'tcorr_index': tcorr_index})
+            if tcorr_keyword.upper() != 'DYNAMIC':
+                return tcorr_img
+
+            # Compute Tcorr dynamically for the scene and use the index
+            #   monthly, annual, or default value if the pixel count is low
+            MIN_PIXEL_COUNT = 1000
+            t_stats = ee.Dictionary(self.tcorr_stats)\
+                .combine({'tcorr_p5': 0, 'tcorr_count': 0}, overwrite=False)
+            tcorr_count = ee.Number(t_stats.get('tcorr_count'))
+            scene_index = tcorr_count.lt(MIN_PIXEL_COUNT).multiply(9)
+            scene_img = ee.Image.constant(ee.Number(t_stats.get('tcorr_p5')))\
+                .updateMask(tcorr_count.gte(MIN_PIXEL_COUNT))\
+                .rename(['tcorr']).set({'tcorr_index': scene_index})
+            tcorr_coll = ee.ImageCollection([scene_img, tcorr_img])\
+                .sort('tcorr_index')
+
+            return ee.Image(tcorr_coll.first()).rename(['tcorr'])
+
         elif 'DYNAMIC' == self._tcorr_source.upper():
             # Compute Tcorr dynamically for the scene
             tcorr_folder = PROJECT_FOLDER + '/tcorr_scene'
@@ -940,6 +1012,9 @@ class Image():
 
         method = getattr(Image, method_name)
 
+        # The scene properties can be computed client side from the image ID
+        kwargs.setdefault('scene_id', image_id)
+
         return method(ee.Image(image_id), **kwargs)
 
     @classmethod
@@ -960,6 +1035,8 @@ class Image():
         Image
 
         """
+        if isinstance(toa_image, str):
+            kwargs.setdefault('scene_id', toa_image)
         toa_image = ee.Image(toa_image)
 
         # Use the SPACECRAFT_ID property identify each Landsat type
@@ -1029,6 +1106,8 @@ class Image():
         Image
 
         """
+        if isinstance(sr_image, str):
+            kwargs.setdefault('scene_id', sr_image)
         sr_image = ee.Image(sr_image)
 
         # Use the SATELLITE property identify each Landsat type
@@ -4,6 +4,7 @@ import pprint
 
 import ee
 from dateutil.relativedelta import *
+import numpy as np
 
 from . import utils
 
@@ -62,8 +63,10 @@ def from_scene_et_fraction(scene_coll, start_date, end_date, variables,
 
     Notes
     -----
-    This function currently assumes that "mask" and "time" bands exist in the
-    scene collection.
+    This function currently assumes that a "mask" band exists in the scene
+    collection if computing count.  The "time" band used for interpolation is
+    built from the scene 'system:time_start' property (any "time" band in the
+    scene collection is ignored).
 
     """
     # Get interp_method
@@ -98,21 +101,7 @@ def from_scene_et_fraction(scene_coll, start_date, end_date, variables,
         raise ValueError('variables parameter must be set')
 
     # Adjust start/end dates based on t_interval
-    # Increase the date range to fully include the time interval
-    start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
-    end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
-    if t_interval.lower() == 'annual':
-        start_dt = datetime.datetime(start_dt.year, 1, 1)
-        # Covert end date to inclusive, flatten to beginning of year,
-        # then add a year which will make it exclusive
-        end_dt -= relativedelta(days=+1)
-        end_dt = datetime.datetime(end_dt.year, 1, 1)
-        end_dt += relativedelta(years=+1)
-    elif t_interval.lower() == 'monthly':
-        start_dt = datetime.datetime(start_dt.year, start_dt.month, 1)
-        end_dt -= relativedelta(days=+1)
-        end_dt = datetime.datetime(end_dt.year, end_dt.month, 1)
-        end_dt += relativedelta(months=+1)
+    start_dt, end_dt = _interval_dates(start_date, end_date, t_interval)
     start_date = start_dt.strftime('%Y-%m-%d')
     end_date = end_dt.strftime('%Y-%m-%d')
 
@@ -188,9 +177,6 @@ def from_scene_et_fraction(scene_coll, start_date, end_date, variables,
     if 'et_reference' in variables and 'et_fraction' not in interp_vars:
         interp_vars.append('et_fraction')
 
-    # The time band is always needed for interpolation
-    interp_vars.append('time')
-
     # Filter scene collection to the interpolation range
     # This probably isn't needed since scene_coll was built to this range
     scene_coll = scene_coll.filterDate(interp_start_date, interp_end_date)
@@ -210,12 +196,20 @@ def from_scene_et_fraction(scene_coll, start_date, end_date, variables,
             ee.Image.constant(0).rename(['mask'])
                 .set({'system:time_start': ee.Date(start_date).millis()}))
 
+    # The time band is built from the scene time_start instead of being read
+    #   from the scene collection
+    # It always has the ET fraction mask (the same as Image.time), even if
+    #   ET fraction is not interpolated
+    source_coll = scene_coll.select(list(set(interp_vars + ['et_fraction'])))\
+        .map(lambda img: add_time_band(img, 'et_fraction'))\
+        .select(interp_vars + ['time'])
+
     # Interpolate to a daily time step
     # NOTE: the daily function is not computing ET (ETf x ETr)
     #   but is returning the target (ETr) band
     daily_coll = openet.core.interpolate.daily(
         target_coll=daily_et_ref_coll,
-        source_coll=scene_coll.select(interp_vars),
+        source_coll=source_coll,
         interp_method=interp_method, interp_days=interp_days,
         use_joins=use_joins,
     )
@@ -345,3 +339,1201 @@ def from_scene_et_fraction(scene_coll, start_date, end_date, variables,
         return ee.ImageCollection(aggregate_image(
             agg_start_date=start_date, agg_end_date=end_date,
             date_format='YYYYMMdd'))
+
+
+def add_time_band(image, mask_band='et_fraction'):
+    """Add a 0 UTC time band built from the image 'system:time_start'
+
+    Parameters
+    ----------
+    image : ee.Image
+        Scene image with a 'system:time_start' property.
+    mask_band : str, optional
+        Band whose mask is applied to the time band
+        (the default is 'et_fraction').
+
+    Returns
+    -------
+    ee.Image
+
+    Notes
+    -----
+    The time is a scene property, so the band is a constant image that only
+    needs the mask of the interpolated band.  This avoids computing a full
+    resolution time image for each scene in the model.
+
+    """
+    time_0utc = utils.date_to_time_0utc(
+        ee.Date(image.get('system:time_start')))
+    time_img = ee.Image.constant(time_0utc).double()\
+        .updateMask(image.select([mask_band]).mask())\
+        .rename(['time'])
+    return image.addBands(time_img)
+
+
+def interp_weights(scene_dates, target_dates, interp_days=32):
+    """Linear interpolation weight matrix for the scene and target dates
+
+    Parameters
+    ----------
+    scene_dates : array_like
+        Scene dates (datetime, 'YYYY-MM-DD' strings, or numpy datetime64).
+        The dates must be sorted.
+    target_dates : array_like
+        Daily target dates.
+    interp_days : int, optional
+        Number of days before and after each target date to search for
+        scenes (the default is 32).
+
+    Returns
+    -------
+    np.ndarray
+        Weight matrix with shape (target days, scenes).  Each row has at
+        most two non-zero weights (the previous and next scene) and rows
+        with no scenes within interp_days are NaN.
+
+    Notes
+    -----
+    This mirrors openet.core.interpolate.daily() for scenes with no masked
+    pixels.  The previous scene is the last scene before the target date and
+    the next scene is the first scene on or after the target date.  If
+    only one of them is within interp_days its value is used directly.
+
+    """
+    scene_days = _day_numbers(scene_dates)
+    target_days = _day_numbers(target_dates)
+    if np.any(np.diff(scene_days) < 0):
+        raise ValueError('scene_dates must be sorted')
+
+    weights = np.zeros((target_days.size, scene_days.size), dtype=np.float64)
+    rows = np.arange(target_days.size)
+    prev_i, next_i, prev_ok, next_ok = _neighbors(
+        scene_days, target_days, interp_days)
+
+    # Fraction of the time between the previous and next scene
+    both = prev_ok & next_ok
+    ratio = np.zeros(target_days.size, dtype=np.float64)
+    ratio[both] = (
+        (target_days[both] - scene_days[prev_i[both]]) /
+        (scene_days[next_i[both]] - scene_days[prev_i[both]]))
+
+    weights[rows[both], prev_i[both]] = 1 - ratio[both]
+    weights[rows[both], next_i[both]] += ratio[both]
+    weights[rows[prev_ok & ~next_ok], prev_i[prev_ok & ~next_ok]] = 1
+    weights[rows[next_ok & ~prev_ok], next_i[next_ok & ~prev_ok]] = 1
+    weights[~(prev_ok | next_ok)] = np.nan
+    return weights
+
+
+def daily_array(scene_array, scene_dates, target_dates, interp_days=32,
+                out=None):
+    """Linearly interpolate a stack of scene arrays to daily arrays
+
+    Parameters
+    ----------
+    scene_array : np.ndarray
+        Scene values with the scenes in the first dimension
+        (i.e. (scenes, rows, cols) or (scenes, bands, rows, cols)).
+        Masked pixels must be NaN.
+    scene_dates : array_like
+        Scene dates (must be sorted).
+    target_dates : array_like
+        Daily target dates.
+    interp_days : int, optional
+        Number of days before and after each target date to search for
+        scenes (the default is 32).
+    out : np.ndarray, optional
+        Output array with shape (target days,) + scene_array.shape[1:].
+
+    Returns
+    -------
+    np.ndarray
+        Interpolated values with NaN for pixels with no scenes within
+        interp_days.
+
+    Notes
+    -----
+    If no pixels are masked, every pixel shares the same interpolation
+    weights and all of the days are computed with a single matrix multiply
+    of the weight matrix (see interp_weights()) and the stack.
+
+    Otherwise the previous/next scene is the closest scene with an unmasked
+    value for each pixel (the same as openet.core.interpolate.daily()),
+    which can't be expressed as a shared weight matrix.  The stack is
+    forward and backward filled once and each day is then a blend of two
+    filled scene planes.
+
+    """
+    scene_array = np.asarray(scene_array)
+    scene_days = _day_numbers(scene_dates)
+    target_days = _day_numbers(target_dates)
+    if scene_array.shape[0] != scene_days.size:
+        raise ValueError('scene_array must have one scene per scene date')
+    if np.any(np.diff(scene_days) < 0):
+        raise ValueError('scene_dates must be sorted')
+
+    shape = (target_days.size,) + scene_array.shape[1:]
+    if out is None:
+        out = np.empty(shape, dtype=np.result_type(scene_array, np.float32))
+    elif out.shape != shape:
+        raise ValueError('out must have shape {}'.format(shape))
+    if target_days.size == 0:
+        return out
+    if scene_days.size == 0:
+        out[...] = np.nan
+        return out
+
+    if not np.isnan(scene_array).any():
+        weights = interp_weights(scene_days, target_days, interp_days)
+        np.matmul(weights.astype(out.dtype),
+                  scene_array.reshape(scene_days.size, -1),
+                  out=out.reshape(target_days.size, -1))
+        return out
+
+    for day_i, output in _daily_masked(scene_array, scene_days, target_days,
+                                       interp_days):
+        out[day_i] = output
+    return out
+
+
+def from_scene_et_fraction_array(
+        et_fraction, scene_dates, et_reference, et_reference_dates,
+        start_date, end_date, variables, interp_days=32, t_interval='custom',
+        ndvi=None, counts=None):
+    """Interpolate and aggregate a stack of ET fraction scene arrays
+
+    Parameters
+    ----------
+    et_fraction : np.ndarray
+        ET fraction scene values with shape (scenes, rows, cols).
+        Masked pixels must be NaN.
+    scene_dates : array_like
+        Scene dates (must be sorted).
+    et_reference : np.ndarray
+        Daily reference ET with shape (days, rows, cols) or (days,).
+    et_reference_dates : array_like
+        Reference ET dates.
+    start_date : str
+        ISO format start date.
+    end_date : str
+        ISO format end date (exclusive).
+    variables : list
+        Output variables ('et', 'et_reference', 'et_fraction', 'ndvi',
+        'count').
+    interp_days : int, optional
+        Number of days before and after each target date to search for
+        scenes (the default is 32).
+    t_interval : {'daily', 'monthly', 'annual', 'custom'}, optional
+        Time interval over which to interpolate and aggregate values
+        (the default is 'custom').
+    ndvi : np.ndarray, optional
+        NDVI scene values with the same shape as et_fraction.
+        Parameter is required if computing 'ndvi'.
+    counts : np.ndarray, optional
+        Integer array with shape (periods, 2, rows, cols) that is filled with
+        the number of days in each period with an interpolated ETf and NDVI
+        value.  The counts can be passed to update_scene_et_fraction_array().
+
+    Returns
+    -------
+    tuple of the list of period start dates ('YYYY-MM-DD') and an array with
+    shape (periods, variables, rows, cols)
+
+    Notes
+    -----
+    This mirrors from_scene_et_fraction() with the reference ET days in the
+    date range as the daily target days.  The daily ET (ETf x ETr) is never
+    built.  Since ETf is linear between scenes, the period ET is
+        sum_d(ETr_d * sum_i(W_d,i * ETf_i)) = sum_i(ETf_i * sum_d(ETr_d * W_d,i))
+    so each period is a sum of the scenes weighted by a per scene ETr
+    weighted coefficient.  If pixels are masked, each pixel has its own
+    previous/next scenes, so the fill indices of the closest unmasked scenes
+    are computed once for the stack and each period is summed in closed form
+    from the ETr prefix sums between each pair of scenes (see _fill_sums()).
+
+    """
+    if t_interval.lower() not in ['daily', 'monthly', 'annual', 'custom']:
+        raise ValueError('unsupported t_interval: {}'.format(t_interval))
+    if not variables:
+        raise ValueError('variables parameter must be set')
+    for v in variables:
+        if v not in ['et', 'et_reference', 'et_fraction', 'ndvi', 'count']:
+            raise ValueError('unsupported variable: {}'.format(v))
+    if 'ndvi' in variables and ndvi is None:
+        raise ValueError('ndvi must be set to compute ndvi')
+
+    et_fraction = np.asarray(et_fraction)
+    scene_days = _day_numbers(scene_dates)
+    if et_fraction.shape[0] != scene_days.size:
+        raise ValueError('et_fraction must have one scene per scene date')
+    if np.any(np.diff(scene_days) < 0):
+        raise ValueError('scene_dates must be sorted')
+    et_reference = np.asarray(et_reference)
+    etr_days = _day_numbers(et_reference_dates)
+    if et_reference.shape[0] != etr_days.size:
+        raise ValueError('et_reference must have one value per date')
+    shape = et_fraction.shape[1:]
+
+    # The daily target days are the reference ET days in each period
+    start_dt, end_dt = _interval_dates(start_date, end_date, t_interval)
+    period_starts = list(_period_starts(start_dt, end_dt, t_interval))
+    period_days = _day_numbers(period_starts + [end_dt.strftime('%Y-%m-%d')])
+
+    output = np.full((len(period_starts), len(variables)) + shape, np.nan,
+                     dtype=np.result_type(et_fraction, np.float32))
+    if counts is not None:
+        if counts.shape != (len(period_starts), 2) + shape:
+            raise ValueError('counts must have shape {}'.format(
+                (len(period_starts), 2) + shape))
+        counts[...] = 0
+    masked = np.isnan(et_fraction).any() or (
+        ndvi is not None and np.isnan(ndvi).any())
+    if masked:
+        # The closest unmasked scenes of each pixel are found once for all
+        #   of the periods
+        et_nodata = np.isnan(et_fraction)
+        et_fills = _fill_index(et_nodata)
+        ndvi_fills = None
+        if ndvi is not None:
+            ndvi = np.asarray(ndvi)
+            ndvi_nodata = np.isnan(ndvi)
+            if np.array_equal(et_nodata, ndvi_nodata):
+                ndvi_fills = et_fills
+            else:
+                ndvi_fills = _fill_index(ndvi_nodata)
+            del ndvi_nodata
+        del et_nodata
+
+    if 'count' in variables:
+        # Bit packed masks of the days with an unmasked scene
+        count_days = np.unique(scene_days)
+        count_masks = np.zeros(
+            (count_days.size, _packed_words(shape)), dtype=np.uint64)
+        for day_i, day in enumerate(count_days):
+            count_masks[day_i] = np.bitwise_or.reduce(
+                pack_masks(~np.isnan(et_fraction[scene_days == day])), axis=0)
+
+    for period_i in range(len(period_starts)):
+        day_mask = ((etr_days >= period_days[period_i]) &
+                    (etr_days < period_days[period_i + 1]))
+        target_days = etr_days[day_mask]
+        etr = et_reference[day_mask]
+        # Reference ET with the day in the first dimension, for broadcasting
+        etr = etr.reshape(etr.shape + (1,) * (len(shape) + 1 - etr.ndim))
+
+        if not masked:
+            stats = _aggregate_weights(
+                et_fraction, ndvi, scene_days, target_days, etr, interp_days)
+        else:
+            stats = _aggregate_masked(
+                et_fraction, ndvi, scene_days, target_days, etr, interp_days,
+                et_fills, ndvi_fills)
+        if counts is not None:
+            counts[period_i, 0] = stats['et_count']
+            if ndvi is not None:
+                counts[period_i, 1] = stats['ndvi_count']
+
+        for var_i, v in enumerate(variables):
+            if v == 'et':
+                output[period_i, var_i] = stats['et']
+            elif v == 'et_reference':
+                output[period_i, var_i] = etr.sum(axis=0)
+            elif v == 'et_fraction':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    output[period_i, var_i] = stats['et'] / etr.sum(axis=0)
+            elif v == 'ndvi':
+                output[period_i, var_i] = stats['ndvi']
+            elif v == 'count':
+                # Number of days with an unmasked scene in the period
+                period_days_mask = (
+                    (count_days >= period_days[period_i]) &
+                    (count_days < period_days[period_i + 1]))
+                output[period_i, var_i] = packed_count(
+                    count_masks[period_days_mask], shape)
+
+    return period_starts, output
+
+
+def pack_masks(masks):
+    """Bit pack a stack of scene masks
+
+    Parameters
+    ----------
+    masks : np.ndarray
+        Boolean masks with shape (scenes, rows, cols).
+
+    Returns
+    -------
+    np.ndarray of uint64 with shape (scenes, words), with one bit per pixel
+
+    """
+    masks = np.asarray(masks, dtype=bool)
+    packed = np.packbits(
+        masks.reshape(masks.shape[0], int(np.prod(masks.shape[1:]))), axis=1)
+    # Pad to a whole number of 64 bit words so 64 pixels are counted at once
+    pad = -packed.shape[1] % 8
+    if pad:
+        packed = np.pad(packed, ((0, 0), (0, pad)))
+    return np.ascontiguousarray(packed).view(np.uint64)
+
+
+def _packed_words(shape):
+    """Number of 64 bit words in a bit packed mask (see pack_masks())"""
+    return -(-int(np.prod(shape, dtype=np.int64)) // 64)
+
+
+def packed_count(packed, shape):
+    """Count the set bits of each pixel over the scene axis of packed masks
+
+    Parameters
+    ----------
+    packed : np.ndarray
+        Bit packed masks from pack_masks() with shape (scenes, words).
+    shape : tuple
+        Unpacked pixel shape (rows, cols).
+
+    Returns
+    -------
+    np.ndarray of the number of scenes with the pixel set
+
+    Notes
+    -----
+    The count is kept as bit planes (a bit sliced counter) so each scene is
+    added with a few bitwise operations on the packed words.  Only the
+    log2(scenes) count planes are unpacked at the end.
+
+    """
+    pixels = int(np.prod(shape, dtype=np.int64))
+    planes = []
+    for scene_words in packed:
+        carry = scene_words
+        for plane_i, plane in enumerate(planes):
+            planes[plane_i] = plane ^ carry
+            carry = plane & carry
+            if not carry.any():
+                break
+        else:
+            if carry.any():
+                planes.append(carry)
+
+    count = np.zeros(pixels, dtype=np.uint32)
+    for plane_i, plane in enumerate(planes):
+        bits = np.unpackbits(plane.view(np.uint8))[:pixels]
+        count += bits.astype(np.uint32) << plane_i
+    return count.reshape(shape)
+
+
+def update_scene_et_fraction_array(
+        output, et_fraction, scene_dates, et_reference, et_reference_dates,
+        start_date, end_date, variables, scene_date, scene_et_fraction=None,
+        interp_days=32, t_interval='custom', ndvi=None, scene_ndvi=None,
+        counts=None):
+    """Update interpolated period values for an added or removed scene
+
+    Parameters
+    ----------
+    output : np.ndarray
+        Period values from from_scene_et_fraction_array() with shape
+        (periods, variables, rows, cols).  The array is updated in place.
+    et_fraction : np.ndarray, list
+        ET fraction scene values used to compute the output, as an array
+        with shape (scenes, rows, cols) or a list of scene arrays.
+    scene_dates : array_like
+        Scene dates used to compute the output (must be sorted).
+    et_reference : np.ndarray
+        Daily reference ET with shape (days, rows, cols) or (days,).
+    et_reference_dates : array_like
+        Reference ET dates.
+    start_date : str
+        ISO format start date used to compute the output.
+    end_date : str
+        ISO format end date (exclusive) used to compute the output.
+    variables : list
+        Output variables (in the same order as the output bands).
+    scene_date : str, datetime
+        Date of the added or removed scene.
+    scene_et_fraction : np.ndarray, optional
+        ET fraction of the added scene with shape (rows, cols).
+        If not set the scene on scene_date is removed.
+    interp_days : int, optional
+        Number of days before and after each target date to search for
+        scenes (the default is 32).
+    t_interval : {'daily', 'monthly', 'annual', 'custom'}, optional
+        Time interval used to compute the output (the default is 'custom').
+    ndvi : np.ndarray, list, optional
+        NDVI scene values.  Parameter is required if updating 'ndvi'.
+    scene_ndvi : np.ndarray, optional
+        NDVI of the added scene.  Parameter is required if updating 'ndvi'.
+    counts : np.ndarray, optional
+        Valid day counts from from_scene_et_fraction_array() with shape
+        (periods, 2, rows, cols).  The array is updated in place.  If not set,
+        the counts of the changed periods are recomputed from the full
+        scene stacks.
+
+    Returns
+    -------
+    tuple of the updated scene dates, et_fraction, and ndvi stacks
+
+    Raises
+    ------
+    ValueError if the removed scene date doesn't match exactly one scene
+
+    Notes
+    -----
+    A scene only changes the interpolated values of the target days within
+    interp_days of the scene date, and those days only depend on the scenes
+    within 2 x interp_days of the scene date.  Only those scenes are read to
+    find the closest unmasked scenes before and after the changed scene for
+    each pixel.  The period sums and valid day counts are adjusted by the
+    difference of the interval sums between those scenes (see _range_sum()),
+    so the cost doesn't depend on the size of the scene stacks.
+
+    If the scene stacks are lists of scene arrays, the scene is inserted into
+    (or removed from) the lists in place so the stack is never copied.
+    Array stacks are returned as new arrays.
+
+    """
+    if (('ndvi' in variables and ndvi is None) or
+            (ndvi is not None and scene_et_fraction is not None and
+             scene_ndvi is None)):
+        raise ValueError('ndvi and scene_ndvi must be set to update ndvi')
+
+    scene_days = _day_numbers(scene_dates)
+    scene_day = _day_numbers([scene_date])[0]
+    shape = output.shape[2:]
+    add_flag = scene_et_fraction is not None
+    if add_flag:
+        # Scenes on the same day are kept in the order they were added
+        scene_i = np.searchsorted(scene_days, scene_day, side='right')
+        new_dates = np.insert(scene_days, scene_i, scene_day)
+    else:
+        matches = np.flatnonzero(scene_days == scene_day)
+        if matches.size != 1:
+            raise ValueError(
+                'scene_date must match exactly one scene to be removed')
+        scene_i = matches[0]
+        new_dates = np.delete(scene_days, scene_i)
+    new_dates = new_dates.astype('datetime64[D]')
+
+    # Only the scenes within 2 x interp_days can change the affected days
+    near_start = np.searchsorted(
+        scene_days, scene_day - 2 * interp_days, side='left')
+    near_end = np.searchsorted(
+        scene_days, scene_day + 2 * interp_days, side='right')
+    near_days = scene_days[near_start:near_end]
+    near_i = scene_i - near_start
+    # Index range of the neighbor scenes before and after the changed scene
+    next_start = near_i if add_flag else near_i + 1
+
+    # The changed scene and its closest unmasked neighbors for each pixel
+    near_et_fraction = _scene_stack(et_fraction, near_start, near_end, shape)
+    if scene_et_fraction is None:
+        scene_et_fraction = near_et_fraction[near_i]
+    et_neighbors = _scene_neighbors(
+        near_et_fraction, near_days, near_i, next_start)
+    if ndvi is not None:
+        near_ndvi = _scene_stack(ndvi, near_start, near_end, shape)
+        if scene_ndvi is None:
+            scene_ndvi = near_ndvi[near_i]
+        ndvi_neighbors = _scene_neighbors(
+            near_ndvi, near_days, near_i, next_start)
+        del near_ndvi
+    # Unmasked scenes on the scene date (for the count)
+    same_day = near_et_fraction[:near_i][near_days[:near_i] == scene_day]
+    day_flag = (~np.isnan(same_day)).any(axis=0)
+    same_day = near_et_fraction[next_start:][
+        near_days[next_start:] == scene_day]
+    day_flag |= (~np.isnan(same_day)).any(axis=0)
+    del near_et_fraction, same_day
+    # The added sums are subtracted when the scene is removed
+    sign = 1 if add_flag else -1
+
+    et_reference = np.asarray(et_reference)
+    etr_days = _day_numbers(et_reference_dates)
+    start_dt, end_dt = _interval_dates(start_date, end_date, t_interval)
+    period_starts = list(_period_starts(start_dt, end_dt, t_interval))
+    period_days = _day_numbers(period_starts + [end_dt.strftime('%Y-%m-%d')])
+    if counts is not None and counts.shape != (len(period_starts), 2) + shape:
+        raise ValueError('counts must have shape {}'.format(
+            (len(period_starts), 2) + shape))
+    et_flag = 'et' in variables or 'et_fraction' in variables
+
+    # Only the target days within interp_days of the scene date change.  The
+    #   changed intervals are found once and summed over each period.
+    day_mask = np.abs(etr_days - scene_day) <= interp_days
+    target_days = etr_days[day_mask]
+    if target_days.size:
+        day_offsets = target_days - target_days[0]
+        etr = et_reference[day_mask]
+        if etr.ndim > 1:
+            etr = np.broadcast_to(etr, etr.shape[:1] + shape)
+        et_prefix = _day_prefix(etr, day_offsets)
+        et_intervals = _scene_intervals(
+            scene_et_fraction, scene_day, et_neighbors, target_days,
+            interp_days)
+        if ndvi is not None:
+            ndvi_prefix = _day_prefix(None, day_offsets)
+            ndvi_intervals = _scene_intervals(
+                scene_ndvi, scene_day, ndvi_neighbors, target_days,
+                interp_days)
+
+    for period_i in range(len(period_starts)):
+        day_start, day_end = np.searchsorted(
+            target_days, period_days[period_i:period_i + 2], side='left')
+        period_count = (period_days[period_i] <= scene_day <
+                        period_days[period_i + 1])
+        if day_end <= day_start and not period_count:
+            continue
+        period_mask = ((etr_days >= period_days[period_i]) &
+                       (etr_days < period_days[period_i + 1]))
+
+        # Change in the sums and valid day counts of the affected days
+        et_delta, et_count = 0, 0
+        if day_end > day_start:
+            et_delta, et_count = _interval_sums(
+                et_intervals, et_prefix, target_days, day_start, day_end)
+        if counts is not None:
+            counts[period_i, 0] += sign * et_count
+            et_count = counts[period_i, 0]
+        elif et_flag:
+            et_count = sign * et_count + _valid_day_count(
+                _scene_stack(et_fraction, 0, scene_days.size, shape),
+                scene_days, etr_days[period_mask], interp_days)
+        if ndvi is not None:
+            ndvi_delta, ndvi_count = 0, 0
+            if day_end > day_start:
+                ndvi_delta, ndvi_count = _interval_sums(
+                    ndvi_intervals, ndvi_prefix, target_days, day_start,
+                    day_end)
+            if counts is not None:
+                old_ndvi_count = counts[period_i, 1].copy()
+                counts[period_i, 1] += sign * ndvi_count
+                ndvi_count = counts[period_i, 1]
+            elif 'ndvi' in variables:
+                old_ndvi_count = _valid_day_count(
+                    _scene_stack(ndvi, 0, scene_days.size, shape),
+                    scene_days, etr_days[period_mask], interp_days)
+                ndvi_count = old_ndvi_count + sign * ndvi_count
+
+        # The ET is only updated if it (or the ET fraction) is an output
+        if et_flag:
+            if 'et_reference' in variables:
+                etr_sum = output[period_i, variables.index('et_reference')]
+            else:
+                etr_sum = et_reference[period_mask]
+                etr_sum = etr_sum.reshape(
+                    etr_sum.shape + (1,) * (len(shape) + 1 - etr_sum.ndim))\
+                    .sum(axis=0)
+            if 'et' in variables:
+                et = output[period_i, variables.index('et')]
+            else:
+                et = output[period_i, variables.index('et_fraction')] * etr_sum
+            et = np.where(
+                et_count > 0, np.nan_to_num(et) + sign * et_delta, np.nan)
+
+        for var_i, v in enumerate(variables):
+            if v == 'et':
+                output[period_i, var_i] = et
+            elif v == 'et_fraction':
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    output[period_i, var_i] = et / etr_sum
+            elif v == 'ndvi':
+                ndvi_sum = (
+                    np.nan_to_num(output[period_i, var_i]) * old_ndvi_count +
+                    sign * ndvi_delta)
+                with np.errstate(divide='ignore', invalid='ignore'):
+                    output[period_i, var_i] = np.where(
+                        ndvi_count > 0, ndvi_sum / ndvi_count, np.nan)
+            elif v == 'count' and period_count:
+                # Days with an unmasked scene only change on the scene date
+                scene_flag = ~np.isnan(scene_et_fraction) & ~day_flag
+                output[period_i, var_i] += sign * scene_flag.astype(np.int8)
+
+    # Update the full stacks
+    if add_flag:
+        et_fraction = _stack_insert(et_fraction, scene_i, scene_et_fraction)
+        if ndvi is not None:
+            ndvi = _stack_insert(ndvi, scene_i, scene_ndvi)
+    else:
+        et_fraction = _stack_delete(et_fraction, scene_i)
+        if ndvi is not None:
+            ndvi = _stack_delete(ndvi, scene_i)
+
+    return new_dates, et_fraction, ndvi
+
+
+def _scene_stack(stack, start, end, shape):
+    """Return a range of scenes from an array or list stack as an array"""
+    if end <= start:
+        return np.empty((0,) + tuple(shape), dtype=np.float64)
+    return np.asarray(stack[start:end])
+
+
+def _stack_insert(stack, scene_i, scene_array):
+    """Insert a scene into a list (in place) or array (copy) stack"""
+    if isinstance(stack, list):
+        stack.insert(scene_i, scene_array)
+        return stack
+    return np.insert(np.asarray(stack), scene_i, scene_array, axis=0)
+
+
+def _stack_delete(stack, scene_i):
+    """Remove a scene from a list (in place) or array (copy) stack"""
+    if isinstance(stack, list):
+        del stack[scene_i]
+        return stack
+    return np.delete(np.asarray(stack), scene_i, axis=0)
+
+
+def _scene_neighbors(stack, scene_days, prev_end, next_start):
+    """Closest unmasked scene before prev_end and from next_start on
+
+    Returns
+    -------
+    tuple of the previous scene days and values and the next scene days and
+    values for each pixel (see _range_sum() for the missing scenes)
+
+    """
+    shape = stack.shape[1:]
+    n = scene_days.size
+    prev_i = np.full(shape, -1, dtype=np.int64)
+    if prev_end > 0:
+        # Last unmasked scene (the first in the reversed stack)
+        clear = ~np.isnan(stack[prev_end - 1::-1])
+        prev_i = np.where(
+            clear.any(axis=0), prev_end - 1 - clear.argmax(axis=0), -1)
+    next_i = np.full(shape, n, dtype=np.int64)
+    if next_start < n:
+        clear = ~np.isnan(stack[next_start:])
+        next_i = np.where(
+            clear.any(axis=0), next_start + clear.argmax(axis=0), n)
+    padded_days = _padded_days(scene_days)
+    if n == 0:
+        return (padded_days[prev_i], np.zeros(shape), padded_days[next_i],
+                np.zeros(shape))
+    return (padded_days[prev_i], _fill_values(stack, prev_i),
+            padded_days[next_i], _fill_values(stack, next_i))
+
+
+def _scene_intervals(scene_array, scene_day, neighbors, target_days,
+                     interp_days):
+    """Target day intervals that change when a scene is added
+
+    Adding a scene between the previous (P) and next (N) unmasked scenes of a
+    pixel replaces the P-N interval with the P-scene and scene-N intervals,
+    so the change is the difference of three interval sums (see
+    _interval_sums()).  Removing the scene is the negative of the change.
+
+    Returns
+    -------
+    list of tuples of the interval sign, the previous and next scene days
+    and values, and the interval bounds (see _range_bounds())
+
+    """
+    prev_day, prev_value, next_day, next_value = neighbors
+    shape = scene_array.shape
+    # Masked scene pixels don't change the interpolation
+    valid = ~np.isnan(scene_array)
+    value = np.nan_to_num(scene_array)
+    day = np.full(shape, scene_day, dtype=np.int64)
+    # Index of the first target day after each scene, and after each scene
+    #   + interp_days (or on or after each scene - interp_days)
+    prev_i = np.searchsorted(target_days, prev_day, side='right')
+    prev_end = np.searchsorted(
+        target_days, prev_day + interp_days, side='right')
+    next_i = np.searchsorted(target_days, next_day, side='right')
+    next_start = np.searchsorted(
+        target_days, next_day - interp_days, side='left')
+    scene_i = np.searchsorted(target_days, scene_day, side='right')
+    scene_end = np.searchsorted(
+        target_days, scene_day + interp_days, side='right')
+    scene_start = np.searchsorted(
+        target_days, scene_day - interp_days, side='left')
+    # The intervals of the masked pixels are emptied
+    scene_i = np.where(valid, scene_i, prev_i)
+    next_i = np.where(valid, next_i, prev_i)
+    return [
+        (1, prev_day, prev_value, day, value, _range_bounds(
+            prev_end, scene_start, prev_i, np.maximum(scene_i, prev_i))),
+        (1, day, value, next_day, next_value, _range_bounds(
+            scene_end, next_start, scene_i, np.maximum(next_i, scene_i))),
+        (-1, prev_day, prev_value, next_day, next_value, _range_bounds(
+            prev_end, next_start, prev_i, np.maximum(next_i, prev_i))),
+    ]
+
+
+def _interval_sums(intervals, prefix, target_days, start, end):
+    """Change in the weighted sum and day count of the target days start to
+    end (exclusive) from the _scene_intervals()"""
+    total = 0
+    count = 0
+    for interval_sign, prev_day, prev_value, next_day, next_value, bounds \
+            in intervals:
+        bounds = [np.clip(b, start, end) for b in bounds[:5]]
+        i0, prev_stop, both_start, both_end, i1 = bounds
+        count = count + interval_sign * (
+            (prev_stop - i0) + (both_end - both_start) + (i1 - both_end))
+        total = total + interval_sign * _range_sum(
+            prev_value, next_value, prev_day, next_day, bounds, prefix,
+            target_days)
+    return total, count
+
+
+def _valid_day_count(scene_array, scene_days, target_days, interp_days):
+    """Number of target days with an interpolated value for each pixel
+
+    A target day has a value if there is an unmasked scene within interp_days
+    of it, so the count is the number of target days in the union of the
+    (scene day +/- interp_days) ranges of the unmasked scenes.  Each scene
+    adds the days of its range after the range of the previous unmasked
+    scene.
+
+    """
+    scene_array = np.asarray(scene_array)
+    shape = scene_array.shape[1:]
+    count = np.zeros(shape, dtype=np.int64)
+    if scene_days.size == 0 or target_days.size == 0:
+        return count
+
+    clear = ~np.isnan(scene_array)
+    prev_fill = _fill_index(~clear)[0]
+    padded_days = np.append(scene_days, np.iinfo(np.int64).min // 2)
+    for i, scene_day in enumerate(scene_days):
+        if i == 0:
+            prev_end = np.full(shape, np.iinfo(np.int64).min // 2)
+        else:
+            prev_end = padded_days[prev_fill[i - 1]] + interp_days
+        start = np.maximum(scene_day - interp_days, prev_end + 1)
+        end = scene_day + interp_days
+        days = (np.searchsorted(target_days, end, side='right') -
+                np.searchsorted(target_days, start, side='left'))
+        count += np.where(clear[i], np.maximum(days, 0), 0)
+    return count
+
+
+def _aggregate_weights(et_fraction, ndvi, scene_days, target_days, etr,
+                       interp_days):
+    """Period sums from the weight matrix (for stacks with no masked pixels)"""
+    stats = {}
+    weights = interp_weights(scene_days, target_days, interp_days)
+    valid = ~np.isnan(weights[:, 0]) if weights.size else \
+        np.zeros(target_days.size, dtype=bool)
+    weights = weights[valid]
+    shape = et_fraction.shape[1:]
+
+    # Every pixel has a value on the same days
+    stats['et_count'] = stats['ndvi_count'] = int(valid.sum())
+    if not valid.any():
+        stats['et'] = np.full(shape, np.nan)
+        stats['ndvi'] = np.full(shape, np.nan)
+        return stats
+
+    # Per scene ETr weighted coefficients
+    etr = etr[valid]
+    if etr.size == etr.shape[0]:
+        coef = weights.T.dot(etr.reshape(-1))
+        stats['et'] = coef.dot(et_fraction.reshape(scene_days.size, -1))\
+            .reshape(shape)
+    else:
+        coef = np.tensordot(weights.T, np.broadcast_to(
+            etr, etr.shape[:1] + shape), axes=1)
+        stats['et'] = np.einsum('i...,i...->...', coef, et_fraction)
+
+    if ndvi is not None:
+        coef = weights.sum(axis=0) / valid.sum()
+        stats['ndvi'] = coef.dot(np.asarray(ndvi).reshape(
+            scene_days.size, -1)).reshape(shape)
+    return stats
+
+
+def _aggregate_masked(et_fraction, ndvi, scene_days, target_days, etr,
+                      interp_days, et_fills, ndvi_fills=None):
+    """Period sums from the scene fill indices (for masked stacks)
+
+    The fill indices of the closest unmasked scenes (see _fill_index()) are
+    computed once for the full stack.  If the ETf and NDVI masks are the same
+    the NDVI is summed with the ETf fill indices and day ranges.
+
+    """
+    shape = et_fraction.shape[1:]
+    if etr.size == etr.shape[0]:
+        etr = etr.reshape(-1)
+    else:
+        etr = np.broadcast_to(etr, etr.shape[:1] + shape)
+    bands = [(et_fraction, etr)]
+    shared = ndvi is not None and ndvi_fills is et_fills
+    if shared:
+        bands.append((ndvi, None))
+    sums, et_count = _fill_sums(
+        bands, et_fills, scene_days, target_days, interp_days)
+    stats = {
+        'et': np.where(et_count > 0, sums[0], np.nan),
+        'et_count': et_count,
+    }
+
+    if ndvi is not None:
+        if shared:
+            ndvi_sum, ndvi_count = sums[1], et_count
+        else:
+            sums, ndvi_count = _fill_sums(
+                [(ndvi, None)], ndvi_fills, scene_days, target_days,
+                interp_days)
+            ndvi_sum = sums[0]
+        with np.errstate(divide='ignore', invalid='ignore'):
+            stats['ndvi'] = np.where(
+                ndvi_count > 0, ndvi_sum / ndvi_count, np.nan)
+        stats['ndvi_count'] = ndvi_count
+    return stats
+
+
+def _fill_index(nodata):
+    """Index of the closest unmasked scene at or before/after each scene
+
+    Returns
+    -------
+    tuple of the previous and next fill index arrays with the shape of the
+    mask.  Scenes with no unmasked scene before them are -1 and scenes with
+    no unmasked scene after them are the number of scenes.
+
+    """
+    scenes = nodata.shape[0]
+    scene_i = np.arange(scenes, dtype=np.int32).reshape(
+        (-1,) + (1,) * (nodata.ndim - 1))
+    prev_fill = np.maximum.accumulate(
+        np.where(nodata, np.int32(-1), scene_i), axis=0)
+    next_fill = np.minimum.accumulate(
+        np.where(nodata, np.int32(scenes), scene_i)[::-1], axis=0)[::-1]
+    return prev_fill, next_fill
+
+
+def _fill_sums(bands, fills, scene_days, target_days, interp_days):
+    """Sum the interpolated values of the target days in closed form
+
+    All of the target days between two consecutive scenes share the same
+    previous/next unmasked scene for each pixel, so each scene interval is
+    summed with _range_sum().
+
+    Parameters
+    ----------
+    bands : list
+        Tuples of the scene values with shape (scenes, rows, cols) and the
+        day weights with shape (days,) or (days, rows, cols), or None to
+        sum the values.  The bands must share the fill indices.
+    fills : tuple
+        Previous and next fill index arrays (see _fill_index()).
+
+    Returns
+    -------
+    tuple of the list of the sum of each band and the number of target days
+    with a value
+
+    """
+    prev_fill, next_fill = fills
+    shape = prev_fill.shape[1:]
+    n = scene_days.size
+    m = target_days.size
+    count = np.zeros(shape, dtype=np.int64)
+    sums = [np.zeros(shape, dtype=np.float64) for _ in bands]
+    if n == 0 or m == 0:
+        return sums, count
+
+    day_offsets = target_days - target_days[0]
+    prefix = [_day_prefix(weights, day_offsets) for _, weights in bands]
+    padded_days = _padded_days(scene_days)
+    # Scene intervals (previous scene < day <= next scene) in the target days
+    k_start = np.searchsorted(scene_days, target_days[0], side='left')
+    k_end = np.searchsorted(scene_days, target_days[-1], side='left')
+    for k in range(k_start, k_end + 1):
+        i0 = 0 if k == 0 else np.searchsorted(
+            target_days, scene_days[k - 1], side='right')
+        i1 = m if k == n else np.searchsorted(
+            target_days, scene_days[k], side='right')
+        if i1 <= i0:
+            continue
+        prev_i = prev_fill[k - 1] if k > 0 else np.full(shape, -1)
+        next_i = next_fill[k] if k < n else np.full(shape, n)
+        prev_day = padded_days[prev_i]
+        next_day = padded_days[next_i]
+        bounds = _range_bounds(
+            np.searchsorted(target_days, prev_day + interp_days, side='right'),
+            np.searchsorted(target_days, next_day - interp_days, side='left'),
+            i0, i1)
+        count += bounds[-1]
+        for band_i, (values, _) in enumerate(bands):
+            sums[band_i] += _range_sum(
+                _fill_values(values, prev_i), _fill_values(values, next_i),
+                prev_day, next_day, bounds, prefix[band_i], target_days)
+    return sums, count
+
+
+def _range_bounds(prev_end, next_start, i0, i1):
+    """Target day index ranges between a previous and next scene
+
+    Parameters
+    ----------
+    prev_end : np.ndarray
+        Index of the first target day after the previous scene + interp_days.
+    next_start : np.ndarray
+        Index of the first target day on or after the next scene -
+        interp_days.
+    i0, i1 : np.ndarray, int
+        Index range of the target days between the scenes.
+
+    Returns
+    -------
+    tuple of the index ranges of the days (i0 <= i < i1) with only the
+    previous scene (i0, prev_stop), both scenes (both_start, both_end), and
+    only the next scene (both_end, i1) within interp_days, and the number of
+    days with a value
+
+    """
+    prev_end = np.clip(prev_end, i0, i1)
+    both_start = np.clip(next_start, i0, i1)
+    prev_stop = np.minimum(prev_end, both_start)
+    both_end = np.maximum(prev_end, both_start)
+    count = (prev_stop - i0) + (both_end - both_start) + (i1 - both_end)
+    return i0, prev_stop, both_start, both_end, i1, count
+
+
+def _range_sum(prev_value, next_value, prev_day, next_day, bounds, prefix,
+               target_days):
+    """Weighted sum of the interpolated values over the _range_bounds() days
+
+    The sum over each range is
+        vP * sum(w_d) + (vN - vP) / (dN - dP) * sum(w_d * (d - dP))
+    which is computed from the prefix sums of the day weights (see
+    _day_prefix()).  The values of missing scenes must be finite since they
+    are multiplied by the (zero) weights of their empty ranges.
+
+    """
+    i0, prev_stop, both_start, both_end, i1 = bounds[:5]
+    w0, w1 = prefix
+    shape = np.shape(prev_value)
+    prev_w = _prefix_take(w0, prev_stop, shape) - _prefix_take(w0, i0, shape)
+    next_w = _prefix_take(w0, i1, shape) - _prefix_take(w0, both_end, shape)
+    both_w = (_prefix_take(w0, both_end, shape) -
+              _prefix_take(w0, both_start, shape))
+    both_d = (_prefix_take(w1, both_end, shape) -
+              _prefix_take(w1, both_start, shape))
+    prev_offset = (prev_day - target_days[0]).astype(np.float64)
+    span = next_day.astype(np.float64) - prev_day
+    with np.errstate(divide='ignore', invalid='ignore'):
+        slope = np.where(
+            both_end > both_start, (next_value - prev_value) / span, 0)
+    return (prev_value * (prev_w + both_w) + next_value * next_w +
+            slope * (both_d - prev_offset * both_w))
+
+
+def _day_prefix(weights, day_offsets):
+    """Prefix sums of the day weights and of the weighted day offsets
+
+    Parameters
+    ----------
+    weights : np.ndarray, None
+        Day weights with shape (days,) or (days, rows, cols).
+        If None, every day has a weight of 1.
+    day_offsets : np.ndarray
+        Target day offsets from the first target day.
+
+    """
+    m = day_offsets.size
+    day_offsets = day_offsets.astype(np.float64)
+    if weights is None:
+        return (np.arange(m + 1, dtype=np.float64),
+                np.concatenate([[0], np.cumsum(day_offsets)]))
+    weights = np.asarray(weights, dtype=np.float64)
+    weights = weights.reshape((m, -1) if weights.ndim > 1 else (m,))
+    w0 = np.zeros((m + 1,) + weights.shape[1:])
+    w1 = np.zeros((m + 1,) + weights.shape[1:])
+    np.cumsum(weights, axis=0, out=w0[1:])
+    np.cumsum(weights * day_offsets.reshape(
+        (m,) + (1,) * (weights.ndim - 1)), axis=0, out=w1[1:])
+    return w0, w1
+
+
+def _prefix_take(prefix, index, shape):
+    """Prefix sums at a (scalar or per pixel) target day index"""
+    if prefix.ndim == 1:
+        return prefix[index]
+    return np.take_along_axis(
+        prefix, np.broadcast_to(index, shape).reshape(1, -1),
+        axis=0).reshape(shape)
+
+
+def _fill_values(values, fill_i):
+    """Scene values at the fill indices (0 for the missing scenes)"""
+    scenes = values.shape[0]
+    return np.nan_to_num(np.take_along_axis(
+        values, np.clip(fill_i, 0, scenes - 1)[np.newaxis], axis=0)[0])
+
+
+def _padded_days(scene_days):
+    """Scene days padded so the fill values of -1 and n are never valid"""
+    return np.concatenate([scene_days, [np.iinfo(np.int64).max // 2,
+                                        np.iinfo(np.int64).min // 2]])
+
+
+def _daily_masked(scene_array, scene_days, target_days, interp_days,
+                  out=None, nodata=None):
+    """Generate the interpolated values for each target day
+
+    The previous/next scene is the closest scene with an unmasked value for
+    each pixel (see daily_array()).
+
+    Parameters
+    ----------
+    nodata : np.ndarray, optional
+        Shared mask of an interleaved multi-band stack, with shape
+        (scenes, ...) when scene_array has shape (scenes, ..., bands).
+        The previous/next scene and the weight of each pixel are computed
+        once from the mask and applied to all of the bands.
+        If not set, scene_array has no band axis and its NaN are the mask.
+
+    Yields
+    ------
+    tuple of the target day index and the interpolated array
+        The same output array is reused for every day.
+
+    """
+    if nodata is None:
+        nodata = np.isnan(scene_array)
+        scene_array = scene_array[..., np.newaxis]
+        squeeze = True
+    else:
+        squeeze = False
+    shape = nodata.shape[1:]
+    bands = scene_array.shape[-1]
+    if out is None:
+        out = np.empty(shape + (bands,),
+                       dtype=np.result_type(scene_array, np.float32))
+    day_out = out[..., 0] if squeeze else out
+    if scene_days.size == 0:
+        out[...] = np.nan
+        for day_i in range(target_days.size):
+            yield day_i, day_out
+        return
+
+    # Index of the closest unmasked scene at or before/after each scene
+    prev_fill, next_fill = _fill_index(nodata)
+    del nodata
+
+    # Pad the scene days so that the fill values of -1 and n are not valid
+    padded_days = np.concatenate([scene_days, [np.iinfo(np.int64).max // 2,
+                                               np.iinfo(np.int64).min // 2]])
+    prev_days = padded_days[prev_fill]
+    next_days = padded_days[next_fill]
+    # The fill indices are shared by all of the bands
+    prev_values = np.take_along_axis(
+        scene_array, np.clip(prev_fill, 0, None)[..., np.newaxis], axis=0)
+    next_values = np.take_along_axis(
+        scene_array, np.clip(next_fill, None, scene_days.size - 1)
+        [..., np.newaxis], axis=0)
+    del prev_fill, next_fill
+
+    prev_i, next_i, prev_any, next_any = _neighbors(
+        scene_days, target_days, interp_days)
+    no_pixels = np.zeros(shape, dtype=bool)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        for day_i, target_day in enumerate(target_days):
+            if prev_any[day_i]:
+                prev_day = prev_days[prev_i[day_i]]
+                prev_ok = prev_day >= target_day - interp_days
+            else:
+                prev_day = None
+                prev_ok = no_pixels
+            if next_any[day_i]:
+                next_day = next_days[next_i[day_i]]
+                next_ok = next_day <= target_day + interp_days
+            else:
+                next_day = None
+                next_ok = no_pixels
+
+            both = prev_ok & next_ok
+            out[...] = np.nan
+            if prev_day is not None:
+                np.copyto(out, prev_values[prev_i[day_i]],
+                          where=(prev_ok & ~next_ok)[..., np.newaxis])
+            if next_day is not None:
+                np.copyto(out, next_values[next_i[day_i]],
+                          where=(next_ok & ~prev_ok)[..., np.newaxis])
+            if both.any():
+                # One weight per pixel, blended into every band
+                ratio = ((target_day - prev_day) /
+                         (next_day - prev_day))[..., np.newaxis]
+                p = prev_values[prev_i[day_i]]
+                blend = p + ratio * (next_values[next_i[day_i]] - p)
+                np.copyto(out, blend, where=both[..., np.newaxis])
+            yield day_i, day_out
+
+
+def _interval_dates(start_date, end_date, t_interval):
+    """Increase the date range to fully include the time interval
+
+    Returns
+    -------
+    tuple of the start and end (exclusive) datetimes
+
+    """
+    start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+    end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    if t_interval.lower() == 'annual':
+        start_dt = datetime.datetime(start_dt.year, 1, 1)
+        # Covert end date to inclusive, flatten to beginning of year,
+        # then add a year which will make it exclusive
+        end_dt -= relativedelta(days=+1)
+        end_dt = datetime.datetime(end_dt.year, 1, 1)
+        end_dt += relativedelta(years=+1)
+    elif t_interval.lower() == 'monthly':
+        start_dt = datetime.datetime(start_dt.year, start_dt.month, 1)
+        end_dt -= relativedelta(days=+1)
+        end_dt = datetime.datetime(end_dt.year, end_dt.month, 1)
+        end_dt += relativedelta(months=+1)
+    return start_dt, end_dt
+
+
+def _period_starts(start_dt, end_dt, t_interval):
+    """Generate the start date ('YYYY-MM-DD') of each aggregation period"""
+    if t_interval.lower() == 'custom':
+        yield start_dt.strftime('%Y-%m-%d')
+        return
+    step = {
+        'daily': relativedelta(days=+1),
+        'monthly': relativedelta(months=+1),
+        'annual': relativedelta(years=+1),
+    }[t_interval.lower()]
+    iter_dt = start_dt
+    # Conditional is "less than" because end date is exclusive
+    while iter_dt < end_dt:
+        yield iter_dt.strftime('%Y-%m-%d')
+        iter_dt += step
+
+
+def _neighbors(scene_days, target_days, interp_days):
+    """Index of the previous and next scene for each target day
+
+    Returns
+    -------
+    tuple of the previous and next scene index arrays and the arrays of
+    flags for if each one is within interp_days of the target day
+
+    """
+    # The previous scene is before the target day and the next scene is on
+    #   or after the target day
+    next_i = np.searchsorted(scene_days, target_days, side='left')
+    prev_i = next_i - 1
+    prev_ok = prev_i >= 0
+    next_ok = next_i < scene_days.size
+    prev_i = np.clip(prev_i, 0, max(scene_days.size - 1, 0))
+    next_i = np.clip(next_i, 0, max(scene_days.size - 1, 0))
+    if scene_days.size:
+        prev_ok &= scene_days[prev_i] >= target_days - interp_days
+        next_ok &= scene_days[next_i] <= target_days + interp_days
+    return prev_i, next_i, prev_ok, next_ok
+
+
+def _day_numbers(dates):
+    """Convert dates to integer days since 1970-01-01"""
+    dates = np.asarray(dates)
+    if dates.dtype.kind in 'iu':
+        return dates.astype(np.int64).reshape(-1)
+    return dates.astype('datetime64[D]').astype(np.int64).reshape(-1)
@@ -1,4 +1,7 @@
+import functools
+
 import ee
+import numpy as np
 
 
 def emissivity(landsat_image):
@@ -123,3 +126,321 @@ def ndvi(landsat_image):
     """
     return ee.Image(landsat_image).normalizedDifference(['nir', 'red'])\
         .rename(['ndvi'])
+
+
+def ndvi_array(red, nir, out=None):
+    """Normalized difference vegetation index for reflectance arrays
+
+    Parameters
+    ----------
+    red : np.ndarray
+        Red band reflectance.
+    nir : np.ndarray
+        Near infrared band reflectance.
+    out : np.ndarray, optional
+        Output array.  If not set a new array will be allocated.
+
+    Returns
+    -------
+    np.ndarray
+
+    """
+    if out is None:
+        out = np.empty(np.broadcast(red, nir).shape,
+                       dtype=np.result_type(red, nir, np.float32))
+    with np.errstate(divide='ignore', invalid='ignore'):
+        np.subtract(nir, red, out=out)
+        np.divide(out, np.add(nir, red), out=out)
+    return out
+
+
+def emissivity_array(ndvi, out=None):
+    """Emissivity as a function of NDVI for arrays
+
+    Parameters
+    ----------
+    ndvi : np.ndarray
+        Normalized difference vegetation index.
+    out : np.ndarray, optional
+        Output array.  If not set a new array will be allocated.
+
+    Returns
+    -------
+    np.ndarray
+
+    Notes
+    -----
+    This is the array equivalent of emissivity() and uses the same
+    piecewise function of NDVI [Sobrino2004].  NaN NDVI values will
+    return NaN.
+
+    """
+    if out is None:
+        out = np.empty(np.shape(ndvi), dtype=np.result_type(ndvi, np.float32))
+
+    # Vegetation fraction (Pv) of the 0.2-0.5 NDVI range
+    np.subtract(ndvi, 0.2, out=out)
+    np.divide(out, 0.3, out=out)
+    np.multiply(out, out, out=out)
+
+    # Emissivity assuming typical soil emissivity of 0.97, vegetation
+    #   emissivity of 0.99, and a mean shape factor of 0.55
+    # (0.99 * Pv) + (0.97 * (1 - Pv)) + ((1 - 0.97) * (1 - Pv) * (0.55 * 0.99))
+    de_factor = (1 - 0.97) * (0.55 * 0.99)
+    np.multiply(out, 0.99 - 0.97 - de_factor, out=out)
+    np.add(out, 0.97 + de_factor, out=out)
+
+    with np.errstate(invalid='ignore'):
+        np.copyto(out, 0.985, where=ndvi < 0)
+        np.copyto(out, 0.977, where=(ndvi >= 0) & (ndvi < 0.2))
+        np.copyto(out, 0.99, where=ndvi > 0.5)
+    return np.clip(out, 0.977, 0.99, out=out)
+
+
+def lst_array(tir, emissivity, k1, k2, out=None, lut=False):
+    """Emissivity corrected land surface temperature (LST) for arrays
+
+    Parameters
+    ----------
+    tir : np.ndarray
+        Brightness temperature [K].
+    emissivity : np.ndarray
+        Emissivity (see emissivity_array()).
+    k1 : float
+        Thermal band K1 constant.
+    k2 : float
+        Thermal band K2 constant.
+    out : np.ndarray, optional
+        Output array.  If not set a new array will be allocated.
+    lut : bool, optional
+        If True, interpolate LST from the cached lookup table for the K1/K2
+        constants (see LSTTable) instead of evaluating the Planck inversion
+        for every pixel (the default is False).
+
+    Returns
+    -------
+    np.ndarray
+
+    Notes
+    -----
+    This is the array equivalent of lst() and uses the same corrected
+    radiation coefficients [Allen2007].
+
+    """
+    if lut:
+        return lst_table(k1, k2)(tir, emissivity, out=out)
+
+    if out is None:
+        out = np.empty(np.broadcast(tir, emissivity).shape,
+                       dtype=np.result_type(tir, emissivity, np.float32))
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        # First back out radiance from brightness temperature
+        np.divide(k2, tir, out=out)
+        np.expm1(out, out=out)
+        np.divide(k1, out, out=out)
+
+        # Then recalculate emissivity corrected Ts
+        # rp = 0.91, tnb = 0.866, rsky = 1.32
+        # rc = ((rad - rp) / tnb) - ((1 - emiss) * rsky)
+        # The (emiss * k1 / rc) term is rearranged to k1 / (rc / emiss)
+        #   to avoid allocating temporary arrays
+        np.subtract(out, 0.91, out=out)
+        np.divide(out, 0.866, out=out)
+        np.subtract(out, 1.32, out=out)
+        np.divide(out, emissivity, out=out)
+        np.add(out, 1.32, out=out)
+        np.divide(k1, out, out=out)
+        np.log1p(out, out=out)
+        np.divide(k2, out, out=out)
+    return out
+
+
+class LSTTable():
+    """Brightness temperature and emissivity to LST lookup table
+
+    The emissivity corrected LST (see lst_array()) is precomputed for a
+    dense grid of brightness temperatures and emissivity bins and is
+    bilinearly interpolated for each pixel.
+
+    Notes
+    -----
+    The table covers emissivities of 0.977-0.99 (the clamped range of
+    emissivity_array()) and by default brightness temperatures of 220-360 K.
+    Pixels outside of the brightness temperature or emissivity range are
+    computed with the full Planck inversion.
+
+    The maximum interpolation error is estimated when the table is built by
+    comparing the interpolated and exact values at the center of every table
+    cell and is stored in the "max_error" attribute.  For the Landsat 4-8
+    thermal band constants and the default spacing (0.1 K, 11 emissivity
+    bins) the maximum error is less than 0.0001 K.
+
+    """
+
+    def __init__(self, k1, k2, bt_min=220, bt_max=360, bt_step=0.1,
+                 emissivity_bins=11):
+        """
+
+        Parameters
+        ----------
+        k1 : float
+            Thermal band K1 constant.
+        k2 : float
+            Thermal band K2 constant.
+        bt_min : float, optional
+            Minimum brightness temperature [K] (the default is 220).
+        bt_max : float, optional
+            Maximum brightness temperature [K] (the default is 360).
+        bt_step : float, optional
+            Brightness temperature spacing [K] (the default is 0.1).
+        emissivity_bins : int, optional
+            Number of emissivity values in the table (the default is 11).
+
+        """
+        self.k1 = k1
+        self.k2 = k2
+        self.bt_min = bt_min
+        self.bt_step = bt_step
+        self.bt = bt_min + bt_step * np.arange(
+            int(round((bt_max - bt_min) / bt_step)) + 1)
+        self.bt_max = self.bt[-1]
+        self.emissivity = np.linspace(0.977, 0.99, emissivity_bins)
+        self.emissivity_step = self.emissivity[1] - self.emissivity[0]
+        self.table = lst_array(
+            self.bt[np.newaxis, :], self.emissivity[:, np.newaxis], k1, k2)
+
+        # Estimate the interpolation error at the center of each cell
+        bt_mid = self.bt[:-1] + 0.5 * bt_step
+        emissivity_mid = self.emissivity[:-1] + 0.5 * self.emissivity_step
+        self.max_error = float(np.max(np.abs(
+            self(bt_mid[np.newaxis, :], emissivity_mid[:, np.newaxis]) -
+            lst_array(bt_mid[np.newaxis, :], emissivity_mid[:, np.newaxis],
+                      k1, k2))))
+
+    def __call__(self, tir, emissivity, out=None):
+        """Interpolate LST for brightness temperature and emissivity arrays
+
+        Parameters
+        ----------
+        tir : np.ndarray
+            Brightness temperature [K].
+        emissivity : np.ndarray
+            Emissivity.
+        out : np.ndarray, optional
+            Output array.  If not set a new array will be allocated.
+
+        Returns
+        -------
+        np.ndarray
+
+        """
+        # Masked pixels are NaN and are returned as NaN
+        if np.ma.isMaskedArray(tir):
+            tir = np.ma.filled(tir.astype(np.float64), np.nan)
+        if np.ma.isMaskedArray(emissivity):
+            emissivity = np.ma.filled(emissivity.astype(np.float64), np.nan)
+        tir, emissivity = np.broadcast_arrays(tir, emissivity)
+        if out is None:
+            out = np.empty(tir.shape, dtype=np.result_type(tir, np.float32))
+        with np.errstate(invalid='ignore'):
+            outside = ~((tir >= self.bt_min) & (tir <= self.bt_max) &
+                        (emissivity >= self.emissivity[0]) &
+                        (emissivity <= self.emissivity[-1]))
+
+        # Fractional table positions
+        # NaN positions can't be cast to an index and are set to the first
+        #   cell (the outside pixels are recomputed below)
+        x = (tir - self.bt_min) / self.bt_step
+        y = (emissivity - self.emissivity[0]) / self.emissivity_step
+        np.copyto(x, 0, where=outside)
+        np.copyto(y, 0, where=outside)
+        with np.errstate(invalid='ignore'):
+            i = np.clip(np.floor(x), 0, self.bt.size - 2).astype(np.intp)
+            j = np.clip(np.floor(y), 0, self.emissivity.size - 2).astype(np.intp)
+        x -= i
+        y -= j
+
+        # Bilinear interpolation from the flattened table
+        index = j * self.bt.size + i
+        table = self.table.ravel()
+        lower = table[index]
+        lower += x * (table[index + 1] - lower)
+        index += self.bt.size
+        upper = table[index]
+        upper += x * (table[index + 1] - upper)
+        np.multiply(upper - lower, y, out=out)
+        np.add(out, lower, out=out)
+
+        # Compute pixels outside of the table (or with NaN inputs) directly
+        if outside.any():
+            out[outside] = lst_array(
+                tir[outside], emissivity[outside], self.k1, self.k2)
+        return out
+
+
+@functools.lru_cache(maxsize=None)
+def lst_table(k1, k2):
+    """Return the cached LST lookup table for the thermal band constants
+
+    Parameters
+    ----------
+    k1 : float
+        Thermal band K1 constant.
+    k2 : float
+        Thermal band K2 constant.
+
+    Returns
+    -------
+    LSTTable
+
+    Notes
+    -----
+    The K1/K2 constants are the same for all scenes from a sensor so there
+    will typically be one table for each SPACECRAFT_ID.
+
+    """
+    return LSTTable(float(k1), float(k2))
+
+
+def input_arrays(red, nir, tir, k1, k2, out=None, lut=False):
+    """Compute the SSEBop LST and NDVI input arrays from Landsat band arrays
+
+    Parameters
+    ----------
+    red : np.ndarray
+        Red band reflectance.
+    nir : np.ndarray
+        Near infrared band reflectance.
+    tir : np.ndarray
+        Brightness temperature [K].
+    k1 : float
+        Thermal band K1 constant.
+    k2 : float
+        Thermal band K2 constant.
+    out : np.ndarray, optional
+        Output array with shape (2, rows, cols).  If not set a new array
+        will be allocated.
+    lut : bool, optional
+        If True, compute LST from the lookup table (the default is False).
+
+    Returns
+    -------
+    np.ndarray of the 'lst' and 'ndvi' bands (in that order)
+
+    Notes
+    -----
+    NDVI and LST are computed directly into the output bands and the
+    emissivity is the only intermediate array.
+
+    """
+    shape = np.broadcast(red, nir, tir).shape
+    if out is None:
+        out = np.empty((2,) + shape, dtype=np.result_type(red, nir, tir, np.float32))
+    elif out.shape != (2,) + shape:
+        raise ValueError('out must have shape {}'.format((2,) + shape))
+
+    ndvi_array(red, nir, out=out[1])
+    emissivity_img = emissivity_array(out[1], out=np.empty_like(out[0]))
+    lst_array(tir, emissivity_img, k1, k2, out=out[0], lut=lut)
+    return out
@@ -0,0 +1,373 @@
+import datetime
+import hashlib
+import json
+import sqlite3
+import threading
+
+from . import tasks
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS exports (
+    asset_id TEXT PRIMARY KEY,
+    coll_id TEXT NOT NULL,
+    export_id TEXT,
+    state TEXT NOT NULL,
+    task_id TEXT,
+    fingerprint TEXT,
+    error TEXT,
+    created TEXT NOT NULL,
+    updated TEXT NOT NULL
+);
+CREATE INDEX IF NOT EXISTS exports_coll_state
+    ON exports (coll_id, state);
+CREATE INDEX IF NOT EXISTS exports_task
+    ON exports (task_id);
+"""
+
+STATES = ['planned', 'submitted', 'running', 'completed', 'failed']
+
+# Ledger state for each Earth Engine task state
+EE_STATES = {
+    'UNSUBMITTED': 'planned',
+    'READY': 'submitted',
+    'RUNNING': 'running',
+    'COMPLETED': 'completed',
+    'FAILED': 'failed',
+    'CANCEL_REQUESTED': 'failed',
+    'CANCELLED': 'failed',
+}
+
+
+class RunLedger():
+    """SQLite ledger of the export tasks and assets for a collection
+
+    The ledger records each export (keyed by the output asset ID) as it moves
+    through the planned, submitted, running, completed, and failed states, so
+    that a restarted export script can find the remaining exports with an
+    indexed query instead of listing all of the assets and tasks.
+
+    """
+
+    def __init__(self, path=':memory:'):
+        """Open (or create) a run ledger
+
+        Parameters
+        ----------
+        path : str, optional
+            SQLite database file path (the default is ':memory:').
+
+        """
+        self.path = path
+        # Task start callbacks are run in the task submitter threads
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.executescript(SCHEMA)
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return self._execute('SELECT COUNT(*) FROM exports')[0][0]
+
+    def close(self):
+        """Close the database connection"""
+        self._conn.close()
+
+    def _execute(self, sql, args=()):
+        with self._lock:
+            return self._conn.execute(sql, args).fetchall()
+
+    def _write(self, sql, rows):
+        with self._lock, self._conn:
+            self._conn.executemany(sql, rows)
+
+    def count(self, coll_id, states=None):
+        """Return the number of exports for a collection
+
+        Parameters
+        ----------
+        coll_id : str
+            Export image collection ID.
+        states : list, optional
+            If set, only count the exports in these states.
+
+        Returns
+        -------
+        int
+
+        """
+        query, args = _state_query(coll_id, states)
+        return self._execute(
+            'SELECT COUNT(*) FROM exports WHERE {}'.format(query),
+            args)[0][0]
+
+    def state(self, asset_id):
+        """Return the state of an export
+
+        Returns
+        -------
+        str, None if the asset is not in the ledger
+
+        """
+        rows = self._execute(
+            'SELECT state FROM exports WHERE asset_id = ?', (asset_id,))
+        return rows[0][0] if rows else None
+
+    def plan(self, asset_id, export_id=None, fingerprint=None):
+        """Add a planned export
+
+        Exports that are already in the ledger are not changed unless they
+        are still planned, or they are completed or failed and the
+        fingerprint of the export inputs has changed.
+
+        Parameters
+        ----------
+        asset_id : str
+            Output asset ID (including the collection ID).
+        export_id : str, optional
+            Export task description.
+        fingerprint : str, optional
+            Fingerprint of the export inputs (see fingerprint()).
+
+        Returns
+        -------
+        str of the export state
+
+        Notes
+        -----
+        Exports without a fingerprint (i.e. added by sync_assets()) take the
+        new fingerprint without being planned again.
+
+        """
+        now = _timestamp()
+        self._write(
+            'INSERT OR IGNORE INTO exports '
+            '(asset_id, coll_id, export_id, state, fingerprint, created, updated) '
+            'VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [(asset_id, asset_id.rsplit('/', 1)[0], export_id, 'planned',
+              fingerprint, now, now)])
+        if fingerprint is not None:
+            self._write(
+                'UPDATE exports SET state = ?, task_id = NULL, error = NULL '
+                'WHERE asset_id = ? AND state IN (?, ?) '
+                'AND fingerprint IS NOT NULL AND fingerprint != ?',
+                [('planned', asset_id, 'completed', 'failed', fingerprint)])
+            self._write(
+                'UPDATE exports SET fingerprint = ? '
+                'WHERE asset_id = ? AND fingerprint IS NULL',
+                [(fingerprint, asset_id)])
+        self._write(
+            'UPDATE exports SET export_id = ?, fingerprint = ?, updated = ? '
+            'WHERE asset_id = ? AND state = ?',
+            [(export_id, fingerprint, now, asset_id, 'planned')])
+        return self.state(asset_id)
+
+    def submitted(self, asset_id, task_id):
+        """Record that the export task for an asset was started"""
+        self._write(
+            'UPDATE exports SET state = ?, task_id = ?, error = NULL, '
+            'updated = ? WHERE asset_id = ?',
+            [('submitted', task_id, _timestamp(), asset_id)])
+
+    def set_state(self, asset_id, state, error=None):
+        """Set the state of an export
+
+        Raises
+        ------
+        ValueError if the state is not supported
+
+        """
+        if state not in STATES:
+            raise ValueError('unsupported state: {}'.format(state))
+        self._write(
+            'UPDATE exports SET state = ?, error = ?, updated = ? '
+            'WHERE asset_id = ?',
+            [(state, error, _timestamp(), asset_id)])
+
+    def track(self, asset_id, future):
+        """Record the state of an export when its task start finishes
+
+        Parameters
+        ----------
+        asset_id : str
+        future : concurrent.futures.Future
+            Future returned by TaskSubmitter.submit().
+
+        """
+        def done(future):
+            if future.exception() is not None:
+                self.set_state(asset_id, 'failed', str(future.exception()))
+            else:
+                self.submitted(asset_id, future.result().id)
+        future.add_done_callback(done)
+
+    def asset_ids(self, coll_id, states=None):
+        """Return the sorted asset IDs for a collection
+
+        Parameters
+        ----------
+        coll_id : str
+            Export image collection ID.
+        states : list, optional
+            If set, only return the exports in these states.
+
+        Returns
+        -------
+        list
+
+        """
+        query, args = _state_query(coll_id, states)
+        return [row[0] for row in self._execute(
+            'SELECT asset_id FROM exports WHERE {} ORDER BY asset_id'.format(
+                query), args)]
+
+    def remaining(self, coll_id):
+        """Return the asset IDs that are planned or failed"""
+        return self.asset_ids(coll_id, states=['planned', 'failed'])
+
+    def active_tasks(self, coll_id):
+        """Return the submitted and running tasks for a collection
+
+        Returns
+        -------
+        dict : export IDs (key) and task info dictionary (value) with the same
+            'id' and 'state' keys as the Earth Engine task list
+
+        """
+        query, args = _state_query(coll_id, ['submitted', 'running'])
+        return {
+            export_id: {'id': task_id, 'state': state}
+            for export_id, task_id, state in self._execute(
+                'SELECT export_id, task_id, state FROM exports '
+                'WHERE {} ORDER BY export_id'.format(query), args)}
+
+    def sync_assets(self, coll_id, asset_ids):
+        """Update the exports from the existing assets
+
+        The existing assets are marked as completed (including assets that
+        were written without the ledger) and completed exports without an
+        asset are planned again.
+
+        Parameters
+        ----------
+        coll_id : str
+            Export image collection ID.
+        asset_ids : list
+            IDs of the assets in the collection (i.e. from get_ee_assets()).
+
+        Returns
+        -------
+        int of the number of assets
+
+        """
+        asset_ids = set(asset_ids)
+        missing = set(self.asset_ids(coll_id, states=['completed'])) - \
+            asset_ids
+        now = _timestamp()
+        rows = [(asset_id, coll_id, 'completed', now, now)
+                for asset_id in sorted(asset_ids)]
+        self._write(
+            'INSERT INTO exports (asset_id, coll_id, state, created, updated) '
+            'VALUES (?, ?, ?, ?, ?) ON CONFLICT(asset_id) DO UPDATE '
+            'SET state = excluded.state, updated = excluded.updated',
+            rows)
+        self._write(
+            'UPDATE exports SET state = ?, task_id = NULL, updated = ? '
+            'WHERE asset_id = ?',
+            [('planned', now, asset_id) for asset_id in sorted(missing)])
+        return len(rows)
+
+    def sync_planned(self, coll_id, task_list):
+        """Update the planned exports that already have a task
+
+        A task can be started without the ledger recording it if the script
+        stops before the track() callback runs.  These exports are still
+        planned, so they are matched to the task list by export ID.
+
+        Parameters
+        ----------
+        coll_id : str
+            Export image collection ID.
+        task_list : dict
+            Task descriptions (key) and task info dictionary (value) with
+            'id' and 'state' keys (i.e. from get_ee_tasks()).
+
+        Returns
+        -------
+        int of the number of exports that changed state
+
+        """
+        query, args = _state_query(coll_id, ['planned'])
+        rows = []
+        now = _timestamp()
+        for asset_id, export_id in self._execute(
+                'SELECT asset_id, export_id FROM exports '
+                'WHERE {} AND export_id IS NOT NULL'.format(query), args):
+            if export_id not in task_list:
+                continue
+            task = task_list[export_id]
+            state = EE_STATES.get(task['state'])
+            if state is not None and state != 'planned':
+                rows.append((state, task['id'], now, asset_id))
+        self._write(
+            'UPDATE exports SET state = ?, task_id = ?, updated = ? '
+            'WHERE asset_id = ?', rows)
+        return len(rows)
+
+    def sync_tasks(self, state_func=None, batch_size=100):
+        """Update the submitted and running exports from the task states
+
+        Only the states of the tasks tracked in the ledger are requested.
+
+        Parameters
+        ----------
+        state_func : function, optional
+            Function that takes a list of task IDs and returns a dictionary of
+            the Earth Engine task states.  The default is
+            tasks.ee_task_states().
+        batch_size : int, optional
+            Number of task states requested in each call (the default is 100).
+
+        Returns
+        -------
+        int of the number of exports that changed state
+
+        """
+        if state_func is None:
+            state_func = tasks.ee_task_states
+        active = self._execute(
+            'SELECT task_id, state FROM exports '
+            'WHERE state IN (?, ?) AND task_id IS NOT NULL',
+            ('submitted', 'running'))
+
+        rows = []
+        now = _timestamp()
+        for i in range(0, len(active), batch_size):
+            batch = dict(active[i:i + batch_size])
+            task_states = state_func(list(batch.keys()))
+            for task_id, old_state in batch.items():
+                state = EE_STATES.get(task_states.get(task_id))
+                if state is not None and state != old_state:
+                    rows.append((state, now, task_id))
+        self._write(
+            'UPDATE exports SET state = ?, updated = ? WHERE task_id = ?', rows)
+        return len(rows)
+
+
+def fingerprint(*values):
+    """Return a short hash of the JSON serialized export inputs"""
+    return hashlib.sha1(json.dumps(
+        values, sort_keys=True, default=str).encode('utf-8')).hexdigest()[:16]
+
+
+def _state_query(coll_id, states=None):
+    """Return the WHERE clause and arguments for a collection and states"""
+    if states is None:
+        return 'coll_id = ?', [coll_id]
+    for state in states:
+        if state not in STATES:
+            raise ValueError('unsupported state: {}'.format(state))
+    return ('coll_id = ? AND state IN ({})'.format(
+        ', '.join(['?'] * len(states))), [coll_id] + list(states))
+
+
+def _timestamp():
+    """Return the current UTC time as an ISO format string"""
+    return datetime.datetime.utcnow().strftime('%Y-%m-%dT%H:%M:%S')
@@ -0,0 +1,593 @@
+import concurrent.futures
+import math
+import os
+import tempfile
+
+import numpy as np
+
+from . import interpolate
+from . import landsat
+from . import model
+
+
+VARIABLES = [
+    'et', 'et_fraction', 'et_reference', 'lst', 'mask', 'ndvi', 'quality',
+    'time',
+]
+
+# Intermediate values needed to compute each variable
+# The variables are computed in the order of this dictionary so that every
+#   dependency is computed before it is needed
+DEPENDENCIES = {
+    'et_fraction': [],
+    'et_reference': [],
+    'et': ['et_fraction', 'et_reference'],
+    'lst': [],
+    'ndvi': [],
+    'mask': ['et_fraction'],
+    'quality': ['mask'],
+    'time': ['mask'],
+}
+
+
+class LocalImage():
+    """Array based SSEBop Image
+
+    This class mirrors the Earth Engine based Image class for input arrays
+    that are already in memory.  Masked (nodata) pixels are NaN.
+
+    """
+
+    def __init__(
+            self, lst, ndvi, tmax, dt, tcorr,
+            time_start=None,
+            et_reference=None,
+            elev=None,
+            elr_flag=False,
+            dt_min=6,
+            dt_max=25,
+            properties=None,
+        ):
+        """Construct a local SSEBop Image
+
+        Parameters
+        ----------
+        lst : np.ndarray
+            Land surface temperature [K] with shape (rows, cols).
+        ndvi : np.ndarray
+            Normalized difference vegetation index with shape (rows, cols).
+        tmax : np.ndarray, float
+            Maximum air temperature [K].
+        dt : np.ndarray, float
+            Temperature difference [K].  Values will be clamped to the
+            dt_min and dt_max range.
+        tcorr : np.ndarray, float
+            Tcorr.
+        time_start : int, optional
+            Image datetime in milliseconds since 1970.
+            Parameter is required if computing 'time'.
+        et_reference : np.ndarray, float, optional
+            Reference ET (the default is None).
+            Parameter is required if computing 'et' or 'et_reference'.
+        elev : np.ndarray, float, optional
+            Elevation [m] (the default is None).
+            Parameter is required if elr_flag is True.
+        elr_flag : bool, optional
+            If True, apply Elevation Lapse Rate (ELR) adjustment
+            (the default is False).
+        dt_min : float, optional
+            Minimum allowable dT [K] (the default is 6).
+        dt_max : float, optional
+            Maximum allowable dT [K] (the default is 25).
+        properties : dict, optional
+            Image properties (i.e. 'system:index').
+
+        """
+        self.lst = np.asarray(lst)
+        self.ndvi = np.asarray(ndvi)
+        self.shape = np.broadcast(self.lst, self.ndvi).shape
+        self.tmax = tmax
+        self.tcorr = tcorr
+        self.dt = np.clip(dt, float(dt_min), float(dt_max))
+        self.et_reference = et_reference
+        self.elev = elev
+        self._time_start = time_start
+        self._elr_flag = elr_flag
+        if properties is not None:
+            self.properties = properties
+        else:
+            self.properties = {}
+        if time_start is not None:
+            self.properties['system:time_start'] = time_start
+
+        if self._elr_flag and self.elev is None:
+            raise ValueError('elev must be set if elr_flag is True')
+
+    def calculate(self, variables=['et', 'et_reference', 'et_fraction'],
+                  out=None):
+        """Return a 3D array (bands, rows, cols) of the calculated variables
+
+        Parameters
+        ----------
+        variables : list
+        out : np.ndarray, optional
+            Output array with shape (bands, rows, cols).  If not set a new
+            array will be allocated.
+
+        Returns
+        -------
+        np.ndarray
+
+        Notes
+        -----
+        The set of intermediate values needed for all of the variables is
+        determined first and each one is computed once, directly into the
+        output band when it is also an output variable.
+
+        The output is float32 unless 'time' is requested, since the 0 UTC
+        time in milliseconds can't be represented exactly as a float32.
+
+        """
+        variables = [v.lower() for v in variables]
+        for v in variables:
+            if v not in VARIABLES:
+                raise ValueError('unsupported variable: {}'.format(v))
+        if 'time' in variables and self._time_start is None:
+            raise ValueError('time_start must be set to compute time')
+        if (('et' in variables or 'et_reference' in variables) and
+                self.et_reference is None):
+            raise ValueError('et_reference must be set to compute et')
+
+        if 'time' in variables:
+            dtype = np.float64
+        else:
+            dtype = np.float32
+        shape = (len(variables),) + self.shape
+        if out is None:
+            out = np.empty(shape, dtype=dtype)
+        elif out.shape != shape:
+            raise ValueError('out must have shape {}'.format(shape))
+
+        # Output bands are also the buffers for intermediate values
+        buffers = {}
+        for i, v in enumerate(variables):
+            buffers.setdefault(v, out[i])
+
+        for v in self._dependencies(variables):
+            if v not in buffers:
+                buffers[v] = np.empty(self.shape, dtype=out.dtype)
+            getattr(self, '_compute_' + v)(buffers, buffers[v])
+
+        # Copy any duplicate variables
+        for i, v in enumerate(variables):
+            if buffers[v] is not out[i]:
+                out[i] = buffers[v]
+
+        return out
+
+    def _dependencies(self, variables):
+        """Return all of the values needed for the variables (in order)"""
+        needed = set()
+
+        def add(v):
+            if v not in needed:
+                needed.add(v)
+                for dependency in DEPENDENCIES[v]:
+                    add(dependency)
+        for v in variables:
+            add(v)
+
+        return [v for v in DEPENDENCIES.keys() if v in needed]
+
+    def _compute_et_fraction(self, buffers, out):
+        """Fraction of reference ET (see model.et_fraction())"""
+        tmax = self.tmax
+        if self._elr_flag:
+            tmax = model.lapse_adjust(tmax, self.elev)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            np.multiply(tmax, self.tcorr, out=out)
+            np.add(out, self.dt, out=out)
+            np.subtract(out, self.lst, out=out)
+            np.divide(out, self.dt, out=out)
+            # Values that are not less than 1.3 (including NaN) are nodata
+            np.copyto(out, np.nan, where=~(out < 1.3))
+        np.clip(out, 0, 1.05, out=out)
+
+    def _compute_et_reference(self, buffers, out):
+        """Reference ET masked to the input image (NDVI) pixels"""
+        out[...] = self.et_reference
+        np.copyto(out, np.nan, where=np.isnan(self.ndvi))
+
+    def _compute_et(self, buffers, out):
+        """Actual ET as fraction of reference times"""
+        np.multiply(buffers['et_fraction'], buffers['et_reference'], out=out)
+
+    def _compute_lst(self, buffers, out):
+        out[...] = self.lst
+
+    def _compute_ndvi(self, buffers, out):
+        out[...] = self.ndvi
+
+    def _compute_mask(self, buffers, out):
+        """Mask of all active pixels (based on the final et_fraction)"""
+        np.multiply(buffers['et_fraction'], 0, out=out)
+        np.add(out, 1, out=out)
+
+    def _compute_quality(self, buffers, out):
+        """Set quality to 1 for all active pixels (for now)"""
+        out[...] = buffers['mask']
+
+    def _compute_time(self, buffers, out):
+        """0 UTC time (in milliseconds) for all active pixels"""
+        np.multiply(buffers['mask'], time_0utc(self._time_start), out=out)
+
+    @classmethod
+    def from_landsat_arrays(cls, red, nir, tir, k1, k2, cloud_mask=None,
+                            lut=False, **kwargs):
+        """Returns a LocalImage instance from Landsat band arrays
+
+        Parameters
+        ----------
+        red : np.ndarray
+            Red band reflectance.
+        nir : np.ndarray
+            Near infrared band reflectance.
+        tir : np.ndarray
+            Brightness temperature [K].
+        k1 : float
+            Thermal band K1 constant.
+        k2 : float
+            Thermal band K2 constant.
+        cloud_mask : np.ndarray, optional
+            Boolean array that is True for pixels that should be masked.
+        lut : bool, optional
+            If True, compute LST from the lookup table (the default is False).
+        kwargs : dict
+            Keyword arguments to pass through to LocalImage init function.
+
+        Returns
+        -------
+        LocalImage
+
+        """
+        input_bands = landsat.input_arrays(red, nir, tir, k1, k2, lut=lut)
+        if cloud_mask is not None:
+            input_bands[:, cloud_mask] = np.nan
+        return cls(lst=input_bands[0], ndvi=input_bands[1], **kwargs)
+
+
+def time_0utc(time_start):
+    """Get the 0 UTC time (in milliseconds) for a time_start
+
+    Parameters
+    ----------
+    time_start : int
+        Time in milliseconds since 1970.
+
+    Returns
+    -------
+    int
+
+    """
+    return (int(time_start) // 86400000) * 86400000
+
+
+class LocalCollection():
+    """Array based SSEBop Collection
+
+    Scenes and reference ET are read through callables one window at a time
+    so that the collection can cover an area that doesn't fit in memory.
+
+    """
+
+    def __init__(
+            self, scene_dates, scene_reader, shape, start_date, end_date,
+            variables=None,
+            et_reference_reader=None,
+            et_reference_dates=None,
+        ):
+        """Construct a local SSEBop Collection
+
+        Parameters
+        ----------
+        scene_dates : list
+            Scene dates ('YYYY-MM-DD', datetime, or numpy datetime64).
+        scene_reader : callable
+            Function that takes a scene index and a window (tuple of row and
+            column slices) and returns a LocalImage for that window.
+        shape : tuple
+            Shape (rows, cols) of the full grid.
+        start_date : str
+            ISO format inclusive start date (i.e. YYYY-MM-DD).
+        end_date : str
+            ISO format exclusive end date (i.e. YYYY-MM-DD).
+        variables : list, optional
+            Output variables can also be specified in the method calls.
+        et_reference_reader : callable, optional
+            Function that takes a window and returns the daily reference ET
+            for the et_reference_dates with shape (days, rows, cols) or
+            (days,).  Parameter is required for interpolate().
+        et_reference_dates : list, optional
+            Reference ET dates.  Parameter is required for interpolate().
+
+        """
+        self.scene_dates = np.asarray(scene_dates, dtype='datetime64[D]')
+        self.scene_reader = scene_reader
+        self.shape = tuple(shape)
+        self.start_date = start_date
+        self.end_date = end_date
+        self.variables = variables
+        self.et_reference_reader = et_reference_reader
+        if et_reference_dates is not None:
+            self.et_reference_dates = np.asarray(
+                et_reference_dates, dtype='datetime64[D]')
+        else:
+            self.et_reference_dates = None
+
+        if np.any(np.diff(self.scene_dates.astype(np.int64)) < 0):
+            raise ValueError('scene_dates must be sorted')
+
+    def interpolate(self, variables=None, t_interval='custom',
+                    interp_method='linear', interp_days=32,
+                    memory_limit=2 ** 30, tile_size=None, out=None):
+        """Interpolate and aggregate the scenes one tile at a time
+
+        Parameters
+        ----------
+        variables : list, optional
+            List of variables that will be returned.
+            If variables is not set here it must be specified in the class
+            instantiation call.
+        t_interval : {'daily', 'monthly', 'annual', 'custom'}, optional
+            Time interval over which to interpolate and aggregate values
+            (the default is 'custom').
+        interp_method : {'linear}, optional
+            Interpolation method (the default is 'linear').
+        interp_days : int, optional
+            Number of extra days before the start date and after the end date
+            to include in the interpolation calculation (the default is 32).
+        memory_limit : int, optional
+            Approximate memory budget in bytes for each tile
+            (the default is 1 GiB).  Used to pick the tile size.
+        tile_size : int, optional
+            Tile size in pixels.  If not set it is computed from memory_limit.
+        out : np.ndarray, optional
+            Output array with shape (periods, variables, rows, cols).  This
+            can be a np.memmap so that each tile is written to disk before
+            the next tile is read.  If not set a new array is allocated.
+
+        Returns
+        -------
+        tuple of the list of period start dates and the output array
+
+        Raises
+        ------
+        ValueError for unsupported input parameters
+
+        """
+        if not variables:
+            if self.variables:
+                variables = self.variables
+            else:
+                raise ValueError('variables parameter must be set')
+        if interp_method.lower() not in ['linear']:
+            raise ValueError('unsupported interp_method: {}'.format(
+                interp_method))
+        if t_interval.lower() not in ['daily', 'monthly', 'annual', 'custom']:
+            raise ValueError('unsupported t_interval: {}'.format(t_interval))
+        if (self.et_reference_reader is None or
+                self.et_reference_dates is None):
+            raise ValueError(
+                'et_reference_reader and et_reference_dates must be set')
+
+        # Only read the scenes in the interpolation date range
+        start_dt, end_dt = interpolate._interval_dates(
+            self.start_date, self.end_date, t_interval)
+        interp_start = np.datetime64(start_dt.date()) - interp_days
+        interp_end = np.datetime64(end_dt.date()) + interp_days
+        scene_index = np.flatnonzero(
+            (self.scene_dates >= interp_start) &
+            (self.scene_dates < interp_end))
+
+        # Only read the reference ET days in the aggregation date range
+        etr_index = np.flatnonzero(
+            (self.et_reference_dates >= np.datetime64(start_dt.date())) &
+            (self.et_reference_dates < np.datetime64(end_dt.date())))
+        period_starts = list(interpolate._period_starts(
+            start_dt, end_dt, t_interval))
+
+        if tile_size is None:
+            tile_size = self.tile_size(
+                scenes=scene_index.size, days=self.et_reference_dates.size,
+                bands=len(variables) * len(period_starts),
+                memory_limit=memory_limit, ndvi='ndvi' in variables)
+
+        shape = (len(period_starts), len(variables)) + self.shape
+        if out is None:
+            out = np.empty(shape, dtype=np.float32)
+        elif out.shape != shape:
+            raise ValueError('out must have shape {}'.format(shape))
+
+        calc_vars = ['et_fraction', 'ndvi'] if 'ndvi' in variables else \
+            ['et_fraction']
+        for window in tiles(self.shape, tile_size):
+            tile_shape = tuple(w.stop - w.start for w in window)
+            stack = np.empty(
+                (scene_index.size, len(calc_vars)) + tile_shape,
+                dtype=np.float32)
+            for i, scene_i in enumerate(scene_index):
+                self.scene_reader(scene_i, window).calculate(
+                    calc_vars, out=stack[i])
+
+            et_reference = np.asarray(self.et_reference_reader(window))
+            output = interpolate.from_scene_et_fraction_array(
+                stack[:, 0], self.scene_dates[scene_index],
+                et_reference[etr_index], self.et_reference_dates[etr_index],
+                start_date=self.start_date, end_date=self.end_date,
+                variables=variables, interp_days=interp_days,
+                t_interval=t_interval,
+                ndvi=stack[:, 1] if 'ndvi' in variables else None)[1]
+            out[(Ellipsis,) + tuple(window)] = output
+            del stack, et_reference, output
+
+        if isinstance(out, np.memmap):
+            out.flush()
+
+        return period_starts, out
+
+    def overpass(self, variables=None, out_path=None, max_workers=None):
+        """Compute the variables for each scene in a pool of processes
+
+        Parameters
+        ----------
+        variables : list, optional
+            List of variables that will be computed.
+            If variables is not set here it must be specified in the class
+            instantiation call.
+        out_path : str, optional
+            Output .npy file path.  The file is memory mapped with shape
+            (scenes, variables, rows, cols) and each worker process writes
+            its scene directly into it.  If not set a temporary file is used
+            and it is removed when the generator is exhausted or closed.
+        max_workers : int, optional
+            Maximum number of worker processes (the default is None which is
+            the number of processors).
+
+        Returns
+        -------
+        generator of tuples of the scene date ('YYYY-MM-DD') and the memory
+        mapped scene array with shape (variables, rows, cols), in scene date
+        order
+
+        Raises
+        ------
+        ValueError if variables is not set
+
+        Notes
+        -----
+        Only the scenes within the collection date range are computed.
+        The scene_reader is sent to the worker processes, so it must be
+        picklable (i.e. a module level function or a functools.partial) and
+        should read the scene from disk instead of holding it in memory.
+
+        """
+        if not variables:
+            if self.variables:
+                variables = self.variables
+            else:
+                raise ValueError('variables parameter must be set')
+
+        scene_index = np.flatnonzero(
+            (self.scene_dates >= np.datetime64(self.start_date)) &
+            (self.scene_dates < np.datetime64(self.end_date)))
+        dtype = np.float64 if 'time' in variables else np.float32
+        shape = (scene_index.size, len(variables)) + self.shape
+
+        return self._overpass_stream(
+            scene_index, variables, shape, dtype, out_path, max_workers)
+
+    def _overpass_stream(self, scene_index, variables, shape, dtype, out_path,
+                         max_workers):
+        """Generate the overpass scenes in order as the workers finish"""
+        temp_flag = out_path is None
+        if temp_flag:
+            out_path = tempfile.NamedTemporaryFile(
+                suffix='.npy', delete=False).name
+        try:
+            out = np.lib.format.open_memmap(
+                out_path, mode='w+', dtype=dtype, shape=shape)
+            out.flush()
+            window = (slice(0, self.shape[0]), slice(0, self.shape[1]))
+            executor = concurrent.futures.ProcessPoolExecutor(max_workers)
+            with executor:
+                futures = [
+                    executor.submit(_overpass_scene, self.scene_reader,
+                                    scene_i, out_i, window, variables,
+                                    out_path)
+                    for out_i, scene_i in enumerate(scene_index)]
+                # Each scene is yielded once it and all of the scenes before
+                #   it are done
+                try:
+                    for out_i, future in enumerate(futures):
+                        future.result()
+                        yield (str(self.scene_dates[scene_index[out_i]]),
+                               out[out_i])
+                finally:
+                    # If the generator is closed early, only the running
+                    #   scenes are waited for before the file is removed
+                    for future in futures:
+                        future.cancel()
+        finally:
+            if temp_flag:
+                os.remove(out_path)
+
+    @staticmethod
+    def tile_size(scenes, days, bands, memory_limit=2 ** 30, ndvi=False):
+        """Tile size (in pixels) that fits within a memory budget
+
+        Parameters
+        ----------
+        scenes : int
+            Number of scenes read for each tile.
+        days : int
+            Number of reference ET days read for each tile.
+        bands : int
+            Number of output bands (periods x variables).
+        memory_limit : int, optional
+            Approximate memory budget in bytes (the default is 1 GiB).
+        ndvi : bool, optional
+            If True, NDVI is also interpolated (the default is False).
+
+        Returns
+        -------
+        int
+
+        Notes
+        -----
+        The estimate per pixel is the float32 scene stack, the nodata masks
+        and the int32 previous/next fill indices of each interpolated band
+        for masked stacks, the float64 reference ET and its two prefix sums,
+        the output bands, and a few float64 scratch arrays for the period
+        sums.
+
+        """
+        interp_bands = 2 if ndvi else 1
+        pixel_bytes = (
+            scenes * interp_bands * (4 + 1 + 4 + 4) +
+            days * (8 + 8 + 8) +
+            bands * 4 +
+            8 * 8)
+        return max(int(math.sqrt(memory_limit / pixel_bytes)), 1)
+
+
+def _overpass_scene(scene_reader, scene_i, out_i, window, variables,
+                    out_path):
+    """Compute one scene into the memory mapped overpass output file"""
+    out = np.load(out_path, mmap_mode='r+')
+    scene_reader(scene_i, window).calculate(variables, out=out[out_i])
+    out.flush()
+    del out
+    return out_i
+
+
+def tiles(shape, tile_size):
+    """Generate the (row slice, col slice) windows of a grid
+
+    Parameters
+    ----------
+    shape : tuple
+        Grid shape (rows, cols).
+    tile_size : int
+        Tile size in pixels.
+
+    Yields
+    ------
+    tuple of slices
+
+    """
+    rows, cols = shape
+    for row_i in range(0, rows, tile_size):
+        for col_i in range(0, cols, tile_size):
+            yield (slice(row_i, min(row_i + tile_size, rows)),
+                   slice(col_i, min(col_i + tile_size, cols)))
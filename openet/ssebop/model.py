@@ -1,6 +1,7 @@
 import math
 
 import ee
+import numpy as np
 
 
 def et_fraction(lst, tmax, tcorr, dt, elr_flag=False,
@@ -9,29 +10,33 @@ def et_fraction(lst, tmax, tcorr, dt, elr_flag=False,
 
     Parameters
     ----------
-    lst : ee.Image
+    lst : ee.Image, np.ndarray
         Land surface temperature (lst) [L].
-    tmax : ee.Image
+    tmax : ee.Image, np.ndarray
         Maximum air temperature [K].
-    tcorr : ee.Image, ee.Number
+    tcorr : ee.Image, ee.Number, np.ndarray, float
         Tcorr.
-    dt : ee.Image, ee.Number
+    dt : ee.Image, ee.Number, np.ndarray, float
         Temperature difference [K].
     elr_flag : bool, optional
         If True, apply Elevation Lapse Rate (ELR) adjustment
         (the default is False).
-    elev : ee.Image, ee.Number, optional
+    elev : ee.Image, ee.Number, np.ndarray, float, optional
         Elevation [m] (the default is None).  Only needed if elr_flag is True.
 
     Returns
     -------
-    ee.Image
+    ee.Image, np.ma.MaskedArray
+        A masked array is returned if lst is a numpy (or masked) array.
 
     References
     ----------
 
 
     """
+    if not _is_ee_object(lst):
+        return _et_fraction_array(lst, tmax, tcorr, dt, elr_flag, elev)
+
     # Adjust air temperature based on elevation (Elevation Lapse Rate)
     if elr_flag:
         tmax = ee.Image(lapse_adjust(tmax, ee.Image(elev)))
@@ -45,35 +50,60 @@ def et_fraction(lst, tmax, tcorr, dt, elr_flag=False,
         .rename(['et_fraction'])
 
 
-def dt(tmax, tmin, elev, doy, lat=None, rs=None, ea=None):
+def _et_fraction_array(lst, tmax, tcorr, dt, elr_flag=False, elev=None):
+    """Numpy array implementation of et_fraction()
+
+    Input masks are carried through to the output and the ETf values are
+    masked/clamped the same as the Earth Engine calculation.
+
+    """
+    if elr_flag:
+        tmax = lapse_adjust(tmax, elev)
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        et_fraction = (lst * -1 + tmax * tcorr + dt) / dt
+
+    # Values that are not less than 1.3 (including NaN) are set to nodata
+    et_fraction = np.ma.masked_invalid(et_fraction, copy=False)
+    et_fraction = np.ma.masked_greater_equal(et_fraction, 1.3, copy=False)
+
+    return np.ma.clip(et_fraction, 0, 1.05)
+
+
+def dt(tmax, tmin, elev, doy, lat=None, rs=None, ea=None, radiation=None):
     """Temperature difference between hot/dry ground and cold/wet canopy
 
     Parameters
     ----------
-    tmax : ee.Image, ee.Number
+    tmax : ee.Image, ee.Number, np.ndarray
         Maximum daily air temperature [K].
-    tmin : ee.Image, ee.Number
+    tmin : ee.Image, ee.Number, np.ndarray
         Maximum daily air temperature [K].
-    elev : ee.Image, ee.Number
+    elev : ee.Image, ee.Number, np.ndarray
         Elevation [m].
     doy : ee.Number, int
         Day of year.
-    lat : ee.Image, ee.Number, optional
+    lat : ee.Image, ee.Number, np.ndarray, optional
         Latitude [deg].  If not set, use GEE pixelLonLat() method.
-    rs : ee.Image, ee.Number, optional
+        Latitude must be set if the inputs are arrays.
+    rs : ee.Image, ee.Number, np.ndarray, optional
         Incoming solar radiation [MJ m-2 d-1].  If not set the theoretical
         clear sky solar (Rso) will be used for the Rs.
-    ea : ee.Image, ee.Number, optional
+    ea : ee.Image, ee.Number, np.ndarray, optional
         Actual vapor pressure [kPa].  If not set, vapor pressure will be
         computed from Tmin.
+    radiation : RadiationGrid, optional
+        Ra/Rso tables for array inputs (see dt_cube()).
 
     Returns
     -------
-    ee.Image
+    ee.Image, np.ndarray
+        An array is returned if tmax is a numpy array (see dt_cube()).
 
     Raises
     ------
     ValueError if doy is not set.
+    ValueError if lat is not set for array inputs.
 
     References
     ----------
@@ -86,11 +116,28 @@ def dt(tmax, tmin, elev, doy, lat=None, rs=None, ea=None):
        Applied Engineering in Agriculture, Vol 34(3).
 
     """
-    if lat is None:
-        lat = ee.Image.pixelLonLat().select(['latitude'])
     if doy is None:
         # TODO: attempt to read time_start from one of the images
         raise ValueError('doy must be set')
+    if not _is_ee_object(tmax):
+        if lat is None:
+            raise ValueError('lat must be set for array inputs')
+        # Masks are lost when the inputs are broadcast, so masked values
+        #   are set to NaN first
+        tmax, tmin, elev, lat, rs, ea = [
+            _filled(x) for x in [tmax, tmin, elev, lat, rs, ea]]
+        # Compute the single day as a one day stack
+        shape = np.broadcast(tmax, tmin, elev, lat).shape
+        dtype = np.result_type(np.asarray(tmax), np.asarray(tmin), np.float32)
+        return dt_cube(
+            tmax=np.broadcast_to(tmax, shape)[np.newaxis],
+            tmin=np.broadcast_to(tmin, shape)[np.newaxis],
+            elev=elev, doy=[doy], lat=lat,
+            rs=None if rs is None else np.broadcast_to(rs, shape)[np.newaxis],
+            ea=None if ea is None else np.broadcast_to(ea, shape)[np.newaxis],
+            chunk_size=1, dtype=dtype, radiation=radiation)[0]
+    if lat is None:
+        lat = ee.Image.pixelLonLat().select(['latitude'])
 
     # Convert latitude to radians
     phi = lat.multiply(math.pi / 180)
@@ -150,23 +197,305 @@ def dt(tmax, tmin, elev, doy, lat=None, rs=None, ea=None):
     return dt
 
 
+def dt_cube(tmax, tmin, elev, doy, lat, rs=None, ea=None, chunk_size=16,
+            dtype=np.float32, out=None, radiation=None):
+    """Temperature difference (dT) for a stack of daily arrays
+
+    This is the array equivalent of dt() for a (time, rows, cols) stack of
+    daily inputs on a single static grid.  The stack is processed in
+    chunks of days using scratch buffers that are allocated once and reused
+    for every chunk, so the memory use beyond the inputs and the output is
+    bounded by the chunk size.
+
+    Parameters
+    ----------
+    tmax : np.ndarray
+        Maximum daily air temperature [K] with shape (time, rows, cols).
+    tmin : np.ndarray
+        Minimum daily air temperature [K] with shape (time, rows, cols).
+    elev : np.ndarray, float
+        Elevation [m] with shape (rows, cols).
+    doy : array_like
+        Day of year for each time step.
+    lat : np.ndarray, float
+        Latitude [deg] with shape (rows, cols) or (rows, 1).
+    rs : np.ndarray, optional
+        Incoming solar radiation [MJ m-2 d-1] with shape (time, rows, cols).
+        If not set the theoretical clear sky solar (Rso) will be used.
+    ea : np.ndarray, optional
+        Actual vapor pressure [kPa] with shape (time, rows, cols).
+        If not set, vapor pressure will be computed from Tmin.
+    chunk_size : int, optional
+        Number of days to process at once (the default is 16).
+    dtype : np.dtype, optional
+        Output and scratch buffer data type (the default is np.float32).
+    out : np.ndarray, optional
+        Output array with shape (time, rows, cols).  If not set a new array
+        will be allocated.
+    radiation : RadiationGrid, optional
+        Ra/Rso tables for the stack grid.  If not set, a RadiationGrid will
+        be built from the lat and elev inputs.  Callers that compute dT for
+        many stacks on the same grid can hold the grid and pass it here.
+
+    Returns
+    -------
+    np.ndarray
+
+    Raises
+    ------
+    ValueError if the number of doy values doesn't match the stack.
+
+    Notes
+    -----
+    Masked input values are returned as NaN.
+
+    """
+    doy = np.asarray(doy, dtype=np.float64).reshape(-1)
+    shape = np.shape(tmax)
+    if len(shape) < 1:
+        raise ValueError('tmax must have a leading time dimension')
+    elif doy.size != shape[0]:
+        raise ValueError('doy must have one value per time step')
+    if chunk_size < 1:
+        raise ValueError('chunk_size must be a positive integer')
+    if out is None:
+        out = np.empty(shape, dtype=dtype)
+    elif out.shape != shape:
+        raise ValueError('out must have shape {}'.format(shape))
+
+    # Static grids (masked values are set to NaN)
+    grid_shape = shape[1:]
+    elev, lat = _filled(elev), _filled(lat)
+    if radiation is None:
+        radiation = RadiationGrid(lat, elev, shape=grid_shape)
+    elif radiation.shape != grid_shape:
+        raise ValueError('radiation grid shape does not match the stack')
+    elev = np.asarray(elev, dtype=dtype)
+    # Air pressure [kPa] (FAO56 Eqn 7) and the inverse air density and unit
+    #   conversion terms that don't change with time (Senay2018 A.5 & A.11)
+    pair = ((elev * -0.0065 + 293.0) / 293.0) ** 5.26 * 101.3
+    dt_factor = np.broadcast_to(
+        (110.0 / ((1.013 / 1000) * 86400)) / (pair * (3.486 / 1.01)),
+        grid_shape)
+
+    # Scratch buffers are reused for each chunk
+    chunk_size = min(chunk_size, shape[0])
+    scratch = np.empty((3, chunk_size) + grid_shape, dtype=dtype)
+
+    for start in range(0, shape[0], chunk_size):
+        end = min(start + chunk_size, shape[0])
+        n = end - start
+        # Clear sky solar radiation (Rso) is expanded from the Ra table
+        #   into the first scratch buffer
+        for i in range(n):
+            radiation.rso(doy[start + i], out=scratch[0, i])
+        _dt_chunk(
+            tmax=_chunk(tmax, start, end, dtype),
+            tmin=_chunk(tmin, start, end, dtype),
+            rs=None if rs is None else _chunk(rs, start, end, dtype),
+            ea=None if ea is None else _chunk(ea, start, end, dtype),
+            dt_factor=dt_factor, scratch=scratch[:, :n], out=out[start:end],
+        )
+
+    return out
+
+
+class RadiationGrid():
+    """Extraterrestrial (Ra) and clear sky solar (Rso) radiation for a grid
+
+    Ra only depends on the day of year and the latitude, so it is computed
+    once per (doy, latitude) in a 366 x n_lat table, where n_lat is the number
+    of unique latitude values in the grid (i.e. the number of rows for a
+    geographic grid).  The Ra/Rso grids are expanded from the table rows each
+    time they are requested, so no full grids are kept in memory.
+
+    """
+
+    def __init__(self, lat, elev=0, shape=None):
+        """
+
+        Parameters
+        ----------
+        lat : np.ndarray, float
+            Latitude [deg].
+        elev : np.ndarray, float, optional
+            Elevation [m] (the default is 0).
+        shape : tuple, optional
+            Grid shape that lat and elev are broadcast to.  If not set, the
+            shape of the lat array will be used.
+
+        """
+        lat = np.asarray(lat, dtype=np.float64)
+        self.shape = lat.shape if shape is None else tuple(shape)
+        # The latitude index is broadcast (not copied) to the grid shape
+        self._lat, inverse = np.unique(lat, return_inverse=True)
+        self._inverse = np.broadcast_to(
+            inverse.reshape(lat.shape), self.shape)
+        # Simplified clear sky solar formulation (Rso) (FAO56 Eqn 37)
+        self._rso_factor = np.broadcast_to(
+            np.asarray(elev, dtype=np.float64) * 2E-5 + 0.75, self.shape)
+        # Table rows are computed the first time each doy is requested
+        self._table = np.empty((366, self._lat.size), dtype=np.float64)
+        self._table_flag = np.zeros(366, dtype=bool)
+
+    @property
+    def table(self):
+        """Ra [MJ m-2 d-1] for each day of year and unique latitude"""
+        for doy in np.flatnonzero(~self._table_flag) + 1:
+            self._ra_row(doy)
+        return self._table
+
+    def ra(self, doy, out=None):
+        """Extraterrestrial radiation (Ra) grid [MJ m-2 d-1]"""
+        return self._grid(doy, out)
+
+    def rso(self, doy, out=None):
+        """Clear sky solar radiation (Rso) grid [MJ m-2 d-1]"""
+        out = self._grid(doy, out)
+        np.multiply(out, self._rso_factor, out=out)
+        return out
+
+    def _ra_row(self, doy):
+        if not self._table_flag[doy - 1]:
+            self._table[doy - 1] = ra(doy, self._lat)
+            self._table_flag[doy - 1] = True
+        return self._table[doy - 1]
+
+    def _grid(self, doy, out=None):
+        doy = int(doy)
+        if doy < 1 or doy > 366:
+            raise ValueError('doy must be in the range 1-366')
+        if out is None:
+            out = np.empty(self.shape, dtype=np.float64)
+        np.take(self._ra_row(doy), self._inverse, out=out)
+        return out
+
+
+def ra(doy, lat):
+    """Extraterrestrial radiation (Ra) [MJ m-2 d-1] for numeric inputs
+
+    Parameters
+    ----------
+    doy : int, np.ndarray
+        Day of year.
+    lat : float, np.ndarray
+        Latitude [deg].
+
+    Returns
+    -------
+    np.ndarray
+
+    References
+    ----------
+    .. [FAO56] Allen, R., Pereira, L., Raes, D., & Smith, M. (1998).
+       Crop evapotranspiration: Guidelines for computing crop water
+       requirements. FAO Irrigation and Drainage Paper (Vol. 56).
+
+    """
+    # FAO56 Eqns 24, 25, 23, 21
+    phi = np.asarray(lat, dtype=np.float64) * (math.pi / 180)
+    doy = np.asarray(doy, dtype=np.float64)
+    delta = np.sin(doy * (2 * math.pi / 365) - 1.39) * 0.409
+    ws = np.arccos(-np.tan(phi) * np.tan(delta))
+    dr = np.cos(doy * (2 * math.pi / 365)) * 0.033 + 1
+    return ((ws * np.sin(phi) * np.sin(delta) +
+             np.cos(phi) * np.cos(delta) * np.sin(ws)) *
+            dr * ((1367.0 / math.pi) * 0.0820))
+
+
+def _filled(array):
+    """Return a masked array as a float array with masked values set to NaN"""
+    if np.ma.isMaskedArray(array):
+        return np.ma.filled(
+            array.astype(np.result_type(array.dtype, np.float32)), np.nan)
+    return array
+
+
+def _chunk(array, start, end, dtype):
+    """Return a chunk of days from a stack with masked values set to NaN"""
+    if np.ma.isMaskedArray(array):
+        return np.ma.filled(array[start:end].astype(dtype), np.nan)
+    return array[start:end]
+
+
+def _dt_chunk(tmax, tmin, rs, ea, dt_factor, scratch, out):
+    """Compute dT for a chunk of days in place (see dt() for the equations)
+
+    The first scratch buffer must contain the clear sky solar radiation (Rso).
+
+    """
+    t1, t2, t3 = scratch
+
+    # Cloudiness fraction from Rs and Rso (FAO56 Eqn 39)
+    if rs is not None:
+        np.divide(rs, t1, out=t1)
+        np.clip(t1, 0.3, 1.0, out=t1)
+        np.multiply(t1, 1.35, out=t1)
+        np.subtract(t1, 0.35, out=t1)
+
+    # Actual vapor pressure [kPa] (FAO56 Eqn 14)
+    if ea is None:
+        np.subtract(tmin, 273.15, out=t2)
+        np.add(t2, 237.3, out=t3)
+        np.divide(t2, t3, out=t2)
+        np.multiply(t2, 17.27, out=t2)
+        np.exp(t2, out=t2)
+        np.multiply(t2, 0.6108, out=t2)
+    else:
+        t2[...] = ea
+
+    # Net longwave radiation [MJ m-2 d-1] (FAO56 Eqn 39)
+    np.sqrt(t2, out=t2)
+    np.multiply(t2, -0.14, out=t2)
+    np.add(t2, 0.34, out=t2)
+    np.multiply(tmax, tmax, out=t3)
+    np.multiply(t3, t3, out=t3)
+    np.multiply(tmin, tmin, out=out)
+    np.multiply(out, out, out=out)
+    np.add(t3, out, out=t3)
+    np.multiply(t3, t2, out=t3)
+    np.multiply(t3, 4.901E-9 * 0.5, out=t3)
+    if rs is not None:
+        np.multiply(t3, t1, out=t3)
+
+    # Net radiation [MJ m-2 d-1] (FAO56 Eqns 38, 40)
+    if rs is not None:
+        np.multiply(rs, 1 - 0.23, out=out)
+    else:
+        np.multiply(t1, 1 - 0.23, out=out)
+    np.subtract(out, t3, out=out)
+
+    # Temperature difference [K] (Senay2018 A.5 & A.13)
+    np.add(tmax, tmin, out=t2)
+    np.multiply(t2, 0.5, out=t2)
+    np.multiply(out, t2, out=out)
+    np.multiply(out, dt_factor, out=out)
+
+
 def lapse_adjust(temperature, elev, lapse_threshold=1500):
     """Elevation Lapse Rate (ELR) adjusted temperature [K]
 
     Parameters
     ----------
-    temperature : ee.Image
+    temperature : ee.Image, np.ndarray
         Temperature [K].
-    elev : ee.Image
+    elev : ee.Image, np.ndarray, float
         Elevation [m].
     lapse_threshold : float
         Minimum elevation to adjust temperature [m] (the default is 1500).
 
     Returns
     -------
-    ee.Image
+    ee.Image, np.ndarray
+        An array is returned if temperature is a numpy (or masked) array.
 
     """
+    if not _is_ee_object(temperature):
+        elr_adjust = temperature - (0.003 * (elev - lapse_threshold))
+        if np.ma.isMaskedArray(temperature) or np.ma.isMaskedArray(elev):
+            return np.ma.where(elev > lapse_threshold, elr_adjust, temperature)
+        return np.where(elev > lapse_threshold, elr_adjust, temperature)
+
     elr_adjust = ee.Image(temperature).expression(
         '(temperature - (0.003 * (elev - threshold)))',
         {
@@ -174,3 +503,8 @@ def lapse_adjust(temperature, elev, lapse_threshold=1500):
             'threshold': lapse_threshold
         })
     return ee.Image(temperature).where(elev.gt(lapse_threshold), elr_adjust)
+
+
+def _is_ee_object(obj):
+    """Check if an input is an Earth Engine object (instead of an array)"""
+    return isinstance(obj, ee.computedobject.ComputedObject)
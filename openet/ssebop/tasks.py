@@ -0,0 +1,316 @@
+import concurrent.futures
+import logging
+import threading
+import time
+
+import ee
+
+# Substrings of the exception messages that indicate a quota or rate error
+QUOTA_ERRORS = [
+    'quota', 'too many', 'rate limit', 'resource exhausted', '429',
+]
+
+
+def is_quota_error(e):
+    """Return True if the exception looks like a quota or rate limit error"""
+    message = str(e).lower()
+    return any(q in message for q in QUOTA_ERRORS)
+
+
+class TokenBucket():
+    """Thread safe token bucket rate limiter"""
+
+    def __init__(self, rate=None, capacity=1):
+        """Construct a token bucket
+
+        Parameters
+        ----------
+        rate : float, None, optional
+            Tokens added per second.  The default is None which is no limit.
+        capacity : int, optional
+            Maximum number of tokens, i.e. the largest burst
+            (the default is 1).
+
+        """
+        if rate is not None and rate <= 0:
+            raise ValueError('rate must be a positive number')
+        if capacity < 1:
+            raise ValueError('capacity must be at least 1')
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._last = time.monotonic()
+        self._paused_until = 0
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        """Block until a token is available and take it"""
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                if self.rate is not None:
+                    self._tokens = min(
+                        self.capacity,
+                        self._tokens + (now - self._last) * self.rate)
+                self._last = now
+                if now < self._paused_until:
+                    wait = self._paused_until - now
+                elif self.rate is None:
+                    return
+                elif self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                else:
+                    wait = (1 - self._tokens) / self.rate
+            time.sleep(wait)
+
+    def pause(self, seconds):
+        """Stop handing out tokens for a number of seconds"""
+        with self._lock:
+            self._paused_until = max(
+                self._paused_until, time.monotonic() + seconds)
+            self._tokens = 0
+
+
+class TaskSubmitter():
+    """Start export tasks from a bounded thread pool
+
+    Task starts are limited by a token bucket.  A quota error pauses all of
+    the workers, halves the rate, and the task is retried.  Each successful
+    start raises the rate back toward the initial rate.
+
+    """
+
+    def __init__(self, max_workers=4, rate=1.0, burst=1, max_retries=8,
+                 backoff=1.0, max_backoff=300, min_rate=0.01,
+                 ready_queue=None):
+        """Construct a task submitter
+
+        Parameters
+        ----------
+        max_workers : int, optional
+            Maximum number of task starts in progress (the default is 4).
+        rate : float, None, optional
+            Maximum task starts per second (the default is 1).
+            None is no limit (until a quota error is returned).
+        burst : int, optional
+            Number of tasks that can be started at once before the rate
+            applies (the default is 1).
+        max_retries : int, optional
+            Number of attempts to start each task (the default is 8).
+        backoff : float, optional
+            Initial retry delay in seconds, doubled for each attempt
+            (the default is 1).
+        max_backoff : float, optional
+            Maximum retry delay in seconds (the default is 300).
+        min_rate : float, optional
+            Lowest rate the quota backoff will drop to (the default is 0.01).
+        ready_queue : ReadyQueue, optional
+            If set, each task waits for a free READY queue slot before it is
+            started (the default is None).
+
+        """
+        if max_workers < 1:
+            raise ValueError('max_workers must be at least 1')
+        self.max_workers = max_workers
+        self.max_rate = rate
+        self.min_rate = min_rate
+        self.max_retries = max_retries
+        self.backoff = backoff
+        self.max_backoff = max_backoff
+        self.bucket = TokenBucket(rate, burst)
+        self.ready_queue = ready_queue
+        self._executor = concurrent.futures.ThreadPoolExecutor(max_workers)
+        self._futures = []
+        self._lock = threading.Lock()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.shutdown()
+
+    @property
+    def rate(self):
+        """Current task start rate (tasks per second)"""
+        return self.bucket.rate
+
+    def submit(self, task):
+        """Queue a task to be started
+
+        Parameters
+        ----------
+        task : ee.batch.Task
+            Any object with a start() method.
+
+        Returns
+        -------
+        concurrent.futures.Future of the started task
+
+        """
+        future = self._executor.submit(self._start, task)
+        self._futures.append(future)
+        return future
+
+    def shutdown(self):
+        """Wait for all of the queued tasks to be started
+
+        Returns
+        -------
+        list of (task index, exception) for the tasks that failed to start
+
+        """
+        self._executor.shutdown(wait=True)
+        errors = [(i, f.exception()) for i, f in enumerate(self._futures)
+                  if f.exception() is not None]
+        for i, e in errors:
+            logging.error('  Task {} could not be started: {}'.format(i, e))
+        return errors
+
+    def _start(self, task):
+        """Start a task once there is a free READY queue slot"""
+        if self.ready_queue is None:
+            return self._start_retry(task)
+        self.ready_queue.acquire()
+        try:
+            self._start_retry(task)
+        except Exception:
+            self.ready_queue.release()
+            raise
+        self.ready_queue.add(task.id)
+        return task
+
+    def _start_retry(self, task):
+        """Start a task, retrying with backoff"""
+        for attempt in range(1, self.max_retries + 1):
+            self.bucket.acquire()
+            try:
+                task.start()
+            except Exception as e:
+                if attempt >= self.max_retries:
+                    raise
+                delay = min(self.backoff * 2 ** (attempt - 1),
+                            self.max_backoff)
+                logging.info('    Resending task start ({}/{})'.format(
+                    attempt, self.max_retries))
+                logging.debug('    {}'.format(e))
+                if is_quota_error(e):
+                    # Quota errors apply to every worker
+                    self._slow_down()
+                    self.bucket.pause(delay)
+                else:
+                    time.sleep(delay)
+            else:
+                self._speed_up()
+                return task
+
+    def _slow_down(self):
+        """Halve the rate after a quota error"""
+        with self._lock:
+            rate = self.bucket.rate
+            if rate is None:
+                # Start limiting at the rate tasks were being started
+                rate = float(self.max_workers)
+            self.bucket.rate = max(rate / 2, self.min_rate)
+
+    def _speed_up(self):
+        """Increase the rate back toward the maximum rate"""
+        with self._lock:
+            if self.bucket.rate is None:
+                return
+            if self.max_rate is None:
+                self.bucket.rate *= 1.1
+            else:
+                self.bucket.rate = min(self.bucket.rate * 1.1, self.max_rate)
+
+
+class ReadyQueue():
+    """Limit the number of submitted tasks that are in the READY state
+
+    The IDs of the submitted tasks are tracked locally and only their states
+    are requested (in a single batch), so a slot is released as soon as a
+    task leaves the READY state.  The refresh interval is shortened when
+    tasks are leaving the queue and lengthened when nothing has changed.
+
+    """
+
+    def __init__(self, max_ready, task_ids=None, state_func=None,
+                 min_interval=5, max_interval=60):
+        """Construct a READY queue controller
+
+        Parameters
+        ----------
+        max_ready : int
+            Maximum number of READY tasks.
+        task_ids : list, optional
+            IDs of tasks that are already READY (i.e. submitted by an earlier
+            run) and count against max_ready.
+        state_func : function, optional
+            Function that takes a list of task IDs and returns a dictionary of
+            the task states.  The default is ee_task_states().
+        min_interval : float, optional
+            Minimum seconds between state refreshes (the default is 5).
+        max_interval : float, optional
+            Maximum seconds between state refreshes (the default is 60).
+
+        """
+        if max_ready < 1:
+            raise ValueError('max_ready must be at least 1')
+        self.max_ready = max_ready
+        self.state_func = state_func or ee_task_states
+        self.min_interval = min_interval
+        self.max_interval = max_interval
+        self.interval = min_interval
+        self.refresh_count = 0
+        self._ready = set(task_ids or [])
+        self._pending = 0
+        self._next_refresh = 0
+        self._cond = threading.Condition()
+
+    @property
+    def ready_count(self):
+        """Number of tracked tasks that were READY at the last refresh"""
+        return len(self._ready)
+
+    def acquire(self):
+        """Block until there is a free READY queue slot and reserve it"""
+        with self._cond:
+            while len(self._ready) + self._pending >= self.max_ready:
+                wait = self._next_refresh - time.monotonic()
+                if wait > 0:
+                    self._cond.wait(wait)
+                else:
+                    self._refresh()
+            self._pending += 1
+
+    def add(self, task_id):
+        """Track a started task in the reserved slot"""
+        with self._cond:
+            self._pending -= 1
+            self._ready.add(task_id)
+
+    def release(self):
+        """Release a reserved slot without adding a task"""
+        with self._cond:
+            self._pending -= 1
+            self._cond.notify_all()
+
+    def _refresh(self):
+        """Request the states of the READY tasks (called with the lock)"""
+        states = self.state_func(list(self._ready))
+        self.refresh_count += 1
+        done = {t for t in self._ready if states.get(t, 'READY') != 'READY'}
+        self._ready -= done
+        if done:
+            self.interval = max(self.interval / 2, self.min_interval)
+            self._cond.notify_all()
+        else:
+            self.interval = min(self.interval * 2, self.max_interval)
+        self._next_refresh = time.monotonic() + self.interval
+
+
+def ee_task_states(task_ids):
+    """Return a dictionary of the Earth Engine task states by task ID"""
+    if not task_ids:
+        return {}
+    return {t['id']: t['state'] for t in ee.data.getTaskStatus(task_ids)}
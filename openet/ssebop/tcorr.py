@@ -0,0 +1,785 @@
+import csv
+import datetime
+import math
+
+import numpy as np
+
+from . import utils
+
+
+def tcorr_image(lst, ndvi, tmax, pixel_size=30):
+    """Compute Tcorr for arrays (see Image.tcorr_image)
+
+    Parameters
+    ----------
+    lst : np.ndarray
+        Land surface temperature [K].  Masked pixels must be NaN.
+    ndvi : np.ndarray
+        Normalized difference vegetation index.  Masked pixels must be NaN.
+    tmax : np.ndarray, float
+        Maximum air temperature [K].
+    pixel_size : float, optional
+        Pixel size [m] (the default is 30).
+
+    Returns
+    -------
+    np.ndarray of Tcorr values with NaN for all masked pixels
+
+    """
+    with np.errstate(divide='ignore', invalid='ignore'):
+        tcorr = np.divide(lst, tmax)
+    tcorr[~tcorr_mask(lst, ndvi, pixel_size=pixel_size)] = np.nan
+    return tcorr
+
+
+def tcorr_mask(lst, ndvi, pixel_size=30, ndvi_threshold=0.7,
+               lst_threshold=270, smooth_radius=120, buffer_radius=60):
+    """Mask of the high NDVI pixels that are used to compute Tcorr
+
+    Parameters
+    ----------
+    lst : np.ndarray
+        Land surface temperature [K].  Masked pixels must be NaN.
+    ndvi : np.ndarray
+        Normalized difference vegetation index.  Masked pixels must be NaN.
+    pixel_size : float, optional
+        Pixel size [m] (the default is 30).
+    ndvi_threshold : float, optional
+        Minimum NDVI (the default is 0.7).
+    lst_threshold : float, optional
+        Minimum LST [K] (the default is 270).
+    smooth_radius : float, optional
+        Radius [m] of the circular NDVI focal mean (the default is 120).
+    buffer_radius : float, optional
+        Radius [m] of the square NDVI neighborhood minimum
+        (the default is 60).
+
+    Returns
+    -------
+    np.ndarray of bool
+
+    Notes
+    -----
+    This matches the Earth Engine masking in Image.tcorr_image():
+        - the focal mean NDVI (circle kernel) must be greater than 0.7
+        - all NDVI values in the square neighborhood must be greater than 0.7
+        - the LST must be greater than 270 K
+    Masked (NaN) pixels are ignored in the neighborhood calculations and
+    are masked in the output.
+
+    """
+    ndvi = np.asarray(ndvi)
+    with np.errstate(invalid='ignore'):
+        ndvi_smooth_mask = focal_mean(
+            ndvi, int(smooth_radius // pixel_size)) > ndvi_threshold
+        ndvi_buffer = np.where(
+            np.isnan(ndvi), np.nan, (ndvi > ndvi_threshold).astype(np.float32))
+        ndvi_buffer_mask = focal_min(
+            ndvi_buffer, int(buffer_radius // pixel_size)) > 0
+        lst_mask = np.asarray(lst) > lst_threshold
+    return lst_mask & ndvi_smooth_mask & ndvi_buffer_mask
+
+
+def focal_mean(array, radius, kernel='circle', tile_rows=1024):
+    """Focal mean of a 2D array computed from summed area tables
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2D array.  NaN values are excluded from the mean.
+    radius : int
+        Kernel radius [pixels].
+    kernel : {'circle', 'square'}, optional
+        Kernel shape (the default is 'circle').
+    tile_rows : int, optional
+        Number of rows processed at once (the default is 1024).  The summed
+        area tables are float64 and are only built for one tile at a time.
+
+    Returns
+    -------
+    np.ndarray
+        NaN pixels in the input are NaN in the output.
+
+    Notes
+    -----
+    Each box in the kernel costs four lookups in the summed area tables
+    regardless of the radius.  The square kernel is a single box and the
+    circle kernel is split into one box for each set of rows with the same
+    half width (i.e. 7 boxes for a radius of 4 pixels).
+
+    The circle kernel includes all pixels with a center within "radius"
+    pixels of the center pixel (the same as ee.Kernel.circle()).
+
+    """
+    array = np.asarray(array)
+    if array.ndim != 2:
+        raise ValueError('array must be 2D')
+    radius = int(radius)
+    if radius < 0:
+        raise ValueError('radius must be a non-negative integer')
+    boxes = _kernel_boxes(radius, kernel)
+
+    rows, cols = array.shape
+    nodata = np.isnan(array)
+    output = np.empty(array.shape, dtype=np.result_type(array, np.float32))
+
+    for row_i in range(0, rows, tile_rows):
+        row_j = min(row_i + tile_rows, rows)
+
+        # Read the tile with a halo of "radius" rows on each side
+        halo_i = max(row_i - radius, 0)
+        halo_j = min(row_j + radius, rows)
+        values = np.zeros(
+            (halo_j - halo_i + 2 * radius, cols + 2 * radius), dtype=np.float64)
+        counts = np.zeros(values.shape, dtype=np.int32)
+        pad_i = radius - (row_i - halo_i)
+        tile_nodata = nodata[halo_i:halo_j]
+        values[pad_i:pad_i + halo_j - halo_i, radius:radius + cols] = np.where(
+            tile_nodata, 0, array[halo_i:halo_j])
+        counts[pad_i:pad_i + halo_j - halo_i, radius:radius + cols] = ~tile_nodata
+
+        value_sat = _summed_area_table(values)
+        count_sat = _summed_area_table(counts)
+
+        # Output pixel (y, x) is at (y + radius, x + radius) in the padded tile
+        n = row_j - row_i
+        value_sum = np.zeros((n, cols), dtype=np.float64)
+        count_sum = np.zeros((n, cols), dtype=np.int64)
+        for dy0, dy1, dx in boxes:
+            value_sum += _box_sum(value_sat, n, cols, radius, dy0, dy1, dx)
+            count_sum += _box_sum(count_sat, n, cols, radius, dy0, dy1, dx)
+
+        with np.errstate(divide='ignore', invalid='ignore'):
+            output[row_i:row_j] = value_sum / count_sum
+
+    output[nodata] = np.nan
+    return output
+
+
+def focal_min(array, radius):
+    """Focal minimum of a 2D array for a square kernel
+
+    Parameters
+    ----------
+    array : np.ndarray
+        2D array.  NaN values are excluded from the minimum.
+    radius : int
+        Kernel radius [pixels].  The kernel is (2 * radius + 1) pixels wide.
+
+    Returns
+    -------
+    np.ndarray
+        NaN pixels in the input are NaN in the output.
+
+    Notes
+    -----
+    The square minimum is separable and is computed as a running minimum
+    along the rows and then the columns using the van Herk/Gil-Werman
+    algorithm, which costs three comparisons per pixel regardless of the
+    radius.
+
+    """
+    array = np.asarray(array)
+    if array.ndim != 2:
+        raise ValueError('array must be 2D')
+    radius = int(radius)
+    if radius < 0:
+        raise ValueError('radius must be a non-negative integer')
+
+    nodata = np.isnan(array)
+    output = np.where(nodata, np.inf, array)
+    output = _running_min(output, radius, axis=1)
+    output = _running_min(output, radius, axis=0)
+    output[nodata] = np.nan
+    return output
+
+
+def _kernel_boxes(radius, kernel='circle'):
+    """Split a kernel into boxes of rows with the same half width
+
+    Returns
+    -------
+    list of (first row offset, last row offset, half width) tuples
+
+    """
+    if kernel.lower() == 'square':
+        return [(-radius, radius, radius)]
+    elif kernel.lower() != 'circle':
+        raise ValueError('unsupported kernel: {}'.format(kernel))
+
+    half_widths = [int(math.floor(math.sqrt(radius ** 2 - dy ** 2)))
+                   for dy in range(radius + 1)]
+    boxes = []
+    dy0 = 0
+    for dy in range(1, radius + 2):
+        if dy > radius or half_widths[dy] != half_widths[dy0]:
+            if dy0 == 0:
+                boxes.append((-(dy - 1), dy - 1, half_widths[0]))
+            else:
+                boxes.append((dy0, dy - 1, half_widths[dy0]))
+                boxes.append((-(dy - 1), -dy0, half_widths[dy0]))
+            dy0 = dy
+    return boxes
+
+
+def _summed_area_table(array):
+    """Summed area table with an extra leading row and column of zeros"""
+    dtype = np.float64 if array.dtype.kind == 'f' else np.int64
+    sat = np.zeros((array.shape[0] + 1, array.shape[1] + 1), dtype=dtype)
+    np.cumsum(array, axis=0, out=sat[1:, 1:])
+    np.cumsum(sat[1:, 1:], axis=1, out=sat[1:, 1:])
+    return sat
+
+
+def _box_sum(sat, rows, cols, pad, dy0, dy1, dx):
+    """Sum of a box (relative to each output pixel) from a summed area table
+
+    The output pixel (y, x) is at (y + pad, x + pad) in the padded array
+    and the box covers rows y + dy0 to y + dy1 and columns x - dx to x + dx.
+
+    """
+    y0 = pad + dy0
+    y1 = pad + dy1 + 1
+    x0 = pad - dx
+    x1 = pad + dx + 1
+    return (sat[y1:y1 + rows, x1:x1 + cols] - sat[y0:y0 + rows, x1:x1 + cols] -
+            sat[y1:y1 + rows, x0:x0 + cols] + sat[y0:y0 + rows, x0:x0 + cols])
+
+
+def _running_min(array, radius, axis):
+    """Running minimum of a (2 * radius + 1) window along an axis"""
+    if radius == 0:
+        return array.copy()
+    size = 2 * radius + 1
+    array = np.moveaxis(array, axis, -1)
+    n = array.shape[-1]
+
+    # Pad with the window radius on each side and to a multiple of the size
+    blocks = -(-(n + 2 * radius) // size)
+    padded = np.full(array.shape[:-1] + (blocks * size,), np.inf,
+                     dtype=array.dtype)
+    padded[..., radius:radius + n] = array
+    padded = padded.reshape(array.shape[:-1] + (blocks, size))
+
+    # Prefix and suffix minimums within each block
+    prefix = np.minimum.accumulate(padded, axis=-1)\
+        .reshape(array.shape[:-1] + (-1,))
+    suffix = np.minimum.accumulate(padded[..., ::-1], axis=-1)[..., ::-1]\
+        .reshape(array.shape[:-1] + (-1,))
+
+    # The window for output i covers padded i to i + size - 1
+    output = np.minimum(suffix[..., :n], prefix[..., size - 1:size - 1 + n])
+    return np.moveaxis(output, -1, axis)
+
+
+def tcorr_stats(tcorr, tile_rows=1024, sketch=None):
+    """Compute the Tcorr 5th percentile and count statistics
+
+    Parameters
+    ----------
+    tcorr : np.ndarray, iterable
+        Tcorr image array (see tcorr_image()) or an iterable of Tcorr tiles
+        (i.e. row blocks read from disk).  Masked pixels must be NaN.
+    tile_rows : int, optional
+        Number of rows added to the sketch at once for array inputs
+        (the default is 1024).
+    sketch : TcorrSketch, optional
+        Sketch to add the tiles to (the default is None).  If not set a new
+        sketch with the default bins is used.
+
+    Returns
+    -------
+    dict
+        The 'tcorr_p5' and 'tcorr_count' keys match the keys of
+        Image.tcorr_stats.  'tcorr_p5' is None if there are no pixels.
+
+    """
+    if sketch is None:
+        sketch = TcorrSketch()
+    if isinstance(tcorr, np.ndarray):
+        tiles = [tcorr[i:i + tile_rows]
+                 for i in range(0, tcorr.shape[0], tile_rows)]
+    else:
+        tiles = tcorr
+    for tile in tiles:
+        sketch.update(tile)
+    return sketch.stats()
+
+
+class TcorrSketch():
+    """Mergeable fixed bin histogram of Tcorr values
+
+    Sketches of separate tiles (or separate processes) can be merged and the
+    result is identical to a single sketch of all the tiles.
+
+    """
+
+    def __init__(self, tcorr_min=0.5, tcorr_max=1.5, bin_width=0.0001):
+        """Construct an empty Tcorr sketch
+
+        Parameters
+        ----------
+        tcorr_min : float, optional
+            Minimum value of the histogram range (the default is 0.5).
+        tcorr_max : float, optional
+            Maximum value of the histogram range (the default is 1.5).
+        bin_width : float, optional
+            Histogram bin width (the default is 0.0001).
+
+        Notes
+        -----
+        Values outside of the histogram range are counted in an underflow or
+        overflow bin.  The default range covers all physically plausible
+        Tcorr values (LST > 270 K divided by Tmax).
+
+        """
+        if tcorr_max <= tcorr_min:
+            raise ValueError('tcorr_max must be greater than tcorr_min')
+        if bin_width <= 0:
+            raise ValueError('bin_width must be positive')
+        self.tcorr_min = float(tcorr_min)
+        self.tcorr_max = float(tcorr_max)
+        self.bin_width = float(bin_width)
+        self.bins = int(round(
+            (self.tcorr_max - self.tcorr_min) / self.bin_width))
+
+        # The first and last elements are the underflow and overflow counts
+        self.counts = np.zeros(self.bins + 2, dtype=np.int64)
+
+    @property
+    def count(self):
+        """Number of values in the sketch"""
+        return int(self.counts.sum())
+
+    @property
+    def max_error(self):
+        """Maximum absolute error of a percentile inside the histogram range
+
+        Percentiles are the center of the bin that contains the exact
+        (inverted CDF) percentile value, so the error is half of a bin.
+
+        """
+        return 0.5 * self.bin_width
+
+    def update(self, tcorr):
+        """Add the values of a Tcorr array (NaN values are skipped)
+
+        Parameters
+        ----------
+        tcorr : np.ndarray
+
+        Returns
+        -------
+        TcorrSketch
+
+        """
+        tcorr = np.asarray(tcorr, dtype=np.float64).ravel()
+        tcorr = tcorr[~np.isnan(tcorr)]
+        bin_i = np.floor((tcorr - self.tcorr_min) / self.bin_width)
+        np.clip(bin_i, -1, self.bins, out=bin_i)
+        self.counts += np.bincount(
+            bin_i.astype(np.int64) + 1, minlength=self.bins + 2)
+        return self
+
+    def merge(self, other):
+        """Add the counts of another sketch with the same bins
+
+        Parameters
+        ----------
+        other : TcorrSketch
+
+        Returns
+        -------
+        TcorrSketch
+
+        """
+        if (other.tcorr_min != self.tcorr_min or
+                other.tcorr_max != self.tcorr_max or
+                other.bin_width != self.bin_width):
+            raise ValueError('sketches must have the same bins to be merged')
+        self.counts += other.counts
+        return self
+
+    def percentile(self, q):
+        """Approximate percentile of the values in the sketch
+
+        Parameters
+        ----------
+        q : float
+            Percentile (0-100).
+
+        Returns
+        -------
+        float
+            The error is less than max_error if the exact percentile is
+            inside the histogram range.  Percentiles in the underflow or
+            overflow bins are clamped to the histogram range.
+            None if the sketch is empty.
+
+        """
+        count = self.count
+        if count == 0:
+            return None
+        # Rank of the inverted CDF percentile (i.e. the smallest value with
+        #   at least q percent of the values less than or equal to it)
+        rank = max(int(np.ceil(count * float(q) / 100)), 1)
+        bin_i = int(np.searchsorted(np.cumsum(self.counts), rank))
+        if bin_i == 0:
+            return self.tcorr_min
+        elif bin_i == self.bins + 1:
+            return self.tcorr_max
+        return self.tcorr_min + (bin_i - 0.5) * self.bin_width
+
+    def stats(self):
+        """Return the Tcorr 5th percentile and count statistics"""
+        return {'tcorr_p5': self.percentile(5), 'tcorr_count': self.count}
+
+
+class TcorrIndex():
+    """In memory Tcorr lookup for the scene, month, annual, default fallback
+
+    Tcorr values are indexed by (wrs2_tile, date) for the scene values,
+    (wrs2_tile, month) for the monthly values, and wrs2_tile for the annual
+    and default values, so each lookup is a few dictionary gets instead of
+    the merge and sort of the Tcorr collections in Image.tcorr.  Annual values
+    for a single year (see group_stats()) are indexed by (wrs2_tile, year)
+    and are checked before the all years annual value.
+
+    """
+
+    # Tcorr index values (see Image.tcorr)
+    SCENE = 0
+    MONTH = 1
+    ANNUAL = 2
+    DEFAULT = 3
+    NODATA = 9
+
+    def __init__(self, records=None):
+        """Construct a Tcorr index
+
+        Parameters
+        ----------
+        records : iterable of dict, optional
+            Tcorr image properties (see add()).
+
+        """
+        self.scene = {}
+        self.month = {}
+        self.annual = {}
+        self.year = {}
+        self.default = {}
+        if records is not None:
+            for record in records:
+                self.add(record)
+
+    def __len__(self):
+        return (len(self.scene) + len(self.month) + len(self.annual) +
+                len(self.year) + len(self.default))
+
+    def add(self, record):
+        """Add a Tcorr value to the index
+
+        Parameters
+        ----------
+        record : dict
+            Tcorr image properties with 'wrs2_tile', 'tcorr_value', and
+            'tcorr_index' keys.  Scene values (index 0) must also have a
+            'date' key ('YYYY-MM-DD') and monthly values (index 1) must also
+            have a 'month' key.  Annual values (index 2) with a 'year' key
+            are only used for that year.  Nodata values (index 9) are skipped.
+
+        Raises
+        ------
+        ValueError if the tcorr_index is not supported
+
+        """
+        tcorr_index = int(float(record['tcorr_index']))
+        if tcorr_index == self.NODATA:
+            return
+        wrs2_tile = record['wrs2_tile']
+        value = float(record['tcorr_value'])
+
+        if tcorr_index == self.SCENE:
+            date = _date_str(record['date'])
+            self.scene.setdefault((wrs2_tile, date), value)
+        elif tcorr_index == self.MONTH:
+            month = int(float(record['month']))
+            self.month.setdefault((wrs2_tile, month), value)
+        elif tcorr_index == self.ANNUAL and record.get('year') not in (None, ''):
+            year = int(float(record['year']))
+            self.year.setdefault((wrs2_tile, year), value)
+        elif tcorr_index == self.ANNUAL:
+            self.annual.setdefault(wrs2_tile, value)
+        elif tcorr_index == self.DEFAULT:
+            self.default.setdefault(wrs2_tile, value)
+        else:
+            raise ValueError('unsupported tcorr_index: {}'.format(tcorr_index))
+
+    def lookup(self, wrs2_tile, date, tcorr_source='SCENE'):
+        """Return the Tcorr value and index for a WRS2 tile and date
+
+        Parameters
+        ----------
+        wrs2_tile : str
+            WRS2 tile (i.e. 'p044r033').
+        date : str, datetime
+            Image date ('YYYY-MM-DD').
+        tcorr_source : {'SCENE', 'SCENE_DAILY', 'SCENE_MONTHLY',
+                        'SCENE_ANNUAL', 'SCENE_DEFAULT', 'DYNAMIC'}, optional
+            Tcorr source keyword (the default is 'SCENE').  Only 'SCENE'
+            falls back through all of the levels, the other keywords only
+            check a single level (the same as Image.tcorr).  'DYNAMIC'
+            returns the monthly, annual, or default fallback for a Tcorr
+            that is computed for the scene.
+
+        Returns
+        -------
+        tuple of the Tcorr value (None if there is no value) and Tcorr index
+
+        """
+        date = _date_str(date)
+        tcorr_source = tcorr_source.upper()
+        if tcorr_source == 'SCENE':
+            levels = [self.SCENE, self.MONTH, self.ANNUAL, self.DEFAULT]
+        elif tcorr_source == 'DYNAMIC':
+            levels = [self.MONTH, self.ANNUAL, self.DEFAULT]
+        elif 'DAILY' in tcorr_source:
+            levels = [self.SCENE]
+        elif 'MONTH' in tcorr_source:
+            levels = [self.MONTH]
+        elif 'ANNUAL' in tcorr_source:
+            levels = [self.ANNUAL]
+        elif 'DEFAULT' in tcorr_source:
+            levels = [self.DEFAULT]
+        else:
+            raise ValueError('unsupported tcorr_source: {}'.format(
+                tcorr_source))
+
+        for level in levels:
+            if level == self.SCENE:
+                value = self.scene.get((wrs2_tile, date))
+            elif level == self.MONTH:
+                value = self.month.get((wrs2_tile, int(date[5:7])))
+            elif level == self.ANNUAL:
+                value = self.year.get((wrs2_tile, int(date[:4])))
+                if value is None:
+                    value = self.annual.get(wrs2_tile)
+            else:
+                value = self.default.get(wrs2_tile)
+            if value is not None:
+                return value, level
+        return None, self.NODATA
+
+    def scene_lookup(self, image_id, tcorr_source='SCENE'):
+        """Return the Tcorr value and index for a Landsat image ID
+
+        Parameters
+        ----------
+        image_id : str
+            Landsat image ID or system:index (i.e. 'LC08_044033_20170716').
+        tcorr_source : str, optional
+            Tcorr source keyword (the default is 'SCENE').
+
+        Returns
+        -------
+        tuple of the Tcorr value (None if there is no value) and Tcorr index
+
+        """
+        scene_info = utils.parse_scene_id(image_id)
+        return self.lookup(scene_info['wrs2_tile'], scene_info['date'],
+                           tcorr_source=tcorr_source)
+
+    @classmethod
+    def from_csv(cls, csv_path):
+        """Build a Tcorr index from a CSV dump of the Tcorr image properties
+
+        Parameters
+        ----------
+        csv_path : str
+            CSV file path.  The file must have a header row with at least
+            'wrs2_tile', 'tcorr_value', and 'tcorr_index' fields and the
+            'date' and 'month' fields for the scene and monthly values.
+
+        Returns
+        -------
+        TcorrIndex
+
+        """
+        with open(csv_path, newline='') as csv_f:
+            return cls(csv.DictReader(csv_f))
+
+
+# Fields of the group_stats() table
+GROUP_FIELDS = [
+    'wrs2_tile', 'year', 'month', 'tcorr_value', 'tcorr_index',
+    'tcorr_scene_count',
+]
+
+
+def group_stats(wrs2_tiles, dates, tcorr_values, pixel_counts=None,
+                min_pixel_count=0, min_scene_count=0):
+    """Compute the monthly and annual Tcorr for all WRS2 tiles at once
+
+    This computes the same median and count statistics as the tcorr_scene
+    monthly and annual calculate scripts (from the scene Tcorr table) but for
+    every group in a single pass.  The values are sorted by group and value
+    once and the medians are read from the middle of each group.
+
+    Parameters
+    ----------
+    wrs2_tiles : array_like
+        WRS2 tile of each scene (i.e. 'p044r033').
+    dates : array_like
+        Date of each scene ('YYYY-MM-DD' or np.datetime64).
+    tcorr_values : array_like
+        Scene Tcorr value (tcorr_p5).  NaN values are skipped.
+    pixel_counts : array_like, optional
+        Scene Tcorr pixel count.  Required if min_pixel_count is set.
+        Empty scenes (a pixel count of 0) are always skipped.
+    min_pixel_count : int, optional
+        Scenes with fewer Tcorr pixels are skipped (the default is 0).
+    min_scene_count : int, optional
+        Groups with fewer scenes have a tcorr_index of 9 (the default is 0).
+
+    Returns
+    -------
+    dict of np.ndarray columns (see GROUP_FIELDS)
+        The (wrs2_tile, month) groups have a tcorr_index of 1 and a year of 0,
+        the (wrs2_tile, year) groups have a tcorr_index of 2 and a month of 0,
+        and the wrs2_tile groups (all years) have a tcorr_index of 2 and a
+        year and month of 0.  Groups without any valid scenes are not
+        included.
+
+    Raises
+    ------
+    ValueError if the inputs are not the same length
+
+    """
+    wrs2_tiles = np.asarray(wrs2_tiles)
+    dates = np.asarray(dates, dtype='datetime64[D]')
+    tcorr_values = np.asarray(tcorr_values, dtype=np.float64)
+    if pixel_counts is None:
+        if min_pixel_count > 0:
+            raise ValueError('pixel_counts must be set to use min_pixel_count')
+        pixel_counts = np.full(tcorr_values.shape, np.inf)
+    pixel_counts = np.asarray(pixel_counts, dtype=np.float64)
+    if wrs2_tiles.ndim != 1 or not (
+            wrs2_tiles.shape == dates.shape == tcorr_values.shape ==
+            pixel_counts.shape):
+        raise ValueError('inputs must be 1D arrays with the same length')
+
+    # The scene table has a Tcorr and pixel count of 0 for empty scenes
+    valid = (~np.isnan(tcorr_values) & (pixel_counts > 0) &
+             (pixel_counts >= min_pixel_count))
+    tiles, tile_i = np.unique(wrs2_tiles[valid], return_inverse=True)
+    tile_i = tile_i.astype(np.int64)
+    years = dates[valid].astype('datetime64[Y]').astype(np.int64) + 1970
+    months = dates[valid].astype('datetime64[M]').astype(np.int64) % 12 + 1
+    values = tcorr_values[valid]
+
+    output = {field: [] for field in GROUP_FIELDS}
+    for index, year_key, month_key in [
+            (1, None, months), (2, years, None), (2, None, None)]:
+        # Encode the tile and month/year in a single integer group key
+        sub_key = year_key if year_key is not None else month_key
+        if sub_key is None:
+            sub_key = np.zeros(tile_i.shape, dtype=np.int64)
+        keys = tile_i * 10000 + sub_key
+        group_keys, counts, medians = _group_median(keys, values)
+
+        output['wrs2_tile'].append(tiles[group_keys // 10000])
+        output['year'].append(
+            group_keys % 10000 if year_key is not None
+            else np.zeros(group_keys.shape, dtype=np.int64))
+        output['month'].append(
+            group_keys % 10000 if month_key is not None
+            else np.zeros(group_keys.shape, dtype=np.int64))
+        output['tcorr_value'].append(medians)
+        output['tcorr_index'].append(
+            np.where(counts >= min_scene_count, index, 9))
+        output['tcorr_scene_count'].append(counts)
+    return {field: np.concatenate(arrays) for field, arrays in output.items()}
+
+
+def group_records(table):
+    """Yield the rows of a group_stats() table as TcorrIndex records
+
+    The year and month keys are only set for the groups that use them.
+
+    """
+    for row in zip(*[table[field] for field in GROUP_FIELDS]):
+        record = dict(zip(GROUP_FIELDS, row))
+        record['wrs2_tile'] = str(record['wrs2_tile'])
+        for field in ['year', 'month', 'tcorr_index', 'tcorr_scene_count']:
+            record[field] = int(record[field])
+        record['tcorr_value'] = float(record['tcorr_value'])
+        for field in ['year', 'month']:
+            if record[field] == 0:
+                del record[field]
+        yield record
+
+
+def write_group_stats(table, csv_path):
+    """Write a group_stats() table to a CSV file
+
+    The file can be read with TcorrIndex.from_csv().
+
+    """
+    with open(csv_path, 'w', newline='') as csv_f:
+        writer = csv.DictWriter(csv_f, GROUP_FIELDS)
+        writer.writeheader()
+        writer.writerows(group_records(table))
+
+
+def read_scene_table(csv_path):
+    """Read a CSV dump of the scene Tcorr table into group_stats() inputs
+
+    Parameters
+    ----------
+    csv_path : str
+        CSV file path with 'wrs2_tile', 'date', 'tcorr_p5', and 'pixel_count'
+        fields (see tcorr_scene/tcorr_export_scene_table.py).
+
+    Returns
+    -------
+    dict with 'wrs2_tiles', 'dates', 'tcorr_values', and 'pixel_counts' keys
+
+    """
+    with open(csv_path, newline='') as csv_f:
+        rows = [(r['wrs2_tile'], r['date'][:10], r['tcorr_p5'] or 'nan',
+                 r['pixel_count'] or 0)
+                for r in csv.DictReader(csv_f)]
+    columns = list(zip(*rows)) if rows else [[], [], [], []]
+    return {
+        'wrs2_tiles': np.array(columns[0], dtype=str),
+        'dates': np.array(columns[1], dtype='datetime64[D]'),
+        'tcorr_values': np.array(columns[2], dtype=np.float64),
+        'pixel_counts': np.array(columns[3], dtype=np.float64),
+    }
+
+
+def _group_median(keys, values):
+    """Sort based group median and count
+
+    Returns
+    -------
+    tuple of the sorted unique keys, counts, and medians
+
+    """
+    order = np.lexsort((values, keys))
+    keys = keys[order]
+    values = values[order]
+    starts = np.flatnonzero(np.r_[True, keys[1:] != keys[:-1]]) \
+        if keys.size else np.zeros(0, dtype=np.int64)
+    counts = np.diff(np.r_[starts, keys.size])
+    # The median is the mean of the two middle values for even counts
+    medians = 0.5 * (values[starts + (counts - 1) // 2] +
+                     values[starts + counts // 2])
+    return keys[starts], counts, medians
+
+
+def _date_str(date):
+    """Return a 'YYYY-MM-DD' string for a date string or datetime"""
+    if isinstance(date, (datetime.date, datetime.datetime)):
+        return date.strftime('%Y-%m-%d')
+    return str(date)[:10]
@@ -73,3 +73,48 @@ def test_valid_date():
     assert utils.valid_date('20150713') == False
     assert utils.valid_date('07/13/2015') == False
     assert utils.valid_date('07-13-2015', '%m-%d-%Y') == True
+
+
+@pytest.mark.parametrize(
+    'image_id',
+    [
+        'LC08_044033_20170716',
+        'LANDSAT/LC08/C01/T1_SR/LC08_044033_20170716',
+        '1_2_LC08_044033_20170716',
+    ]
+)
+def test_parse_scene_id(image_id):
+    output = utils.parse_scene_id(image_id)
+    assert output['scene_id'] == 'LC08_044033_20170716'
+    assert output['wrs2_tile'] == 'p044r033'
+    assert output['date'] == datetime.datetime(2017, 7, 16)
+
+
+@pytest.mark.parametrize(
+    'image_id', ['', 'LC08_044033', 'LC08_044033_20170732', 'LC08_p44r33_20170716']
+)
+def test_parse_scene_id_exception(image_id):
+    with pytest.raises(ValueError):
+        utils.parse_scene_id(image_id)
+
+
+@pytest.mark.parametrize(
+    'start_date, end_date, years, expected',
+    [
+        ['2017-07-01', '2017-08-01', 1, [('2017-07-01', '2017-08-01')]],
+        ['2016-03-01', '2018-02-01', 1,
+         [('2016-03-01', '2017-01-01'), ('2017-01-01', '2018-01-01'),
+          ('2018-01-01', '2018-02-01')]],
+        ['2016-03-01', '2019-01-01', 2,
+         [('2016-03-01', '2018-01-01'), ('2018-01-01', '2019-01-01')]],
+        ['2017-07-01', '2017-07-01', 1, []],
+    ]
+)
+def test_date_windows(start_date, end_date, years, expected):
+    assert utils.date_windows(start_date, end_date, years) == expected
+
+
+@pytest.mark.parametrize('years', [0, -1, 1.5])
+def test_date_windows_exception(years):
+    with pytest.raises(ValueError):
+        utils.date_windows('2017-07-01', '2017-08-01', years)
@@ -0,0 +1,181 @@
+import datetime
+
+import pytest
+
+import openet.ssebop.catalog as catalog
+import openet.ssebop.utils as utils
+
+
+COLL_ID = 'LANDSAT/LC08/C01/T1_TOA'
+SCENE_RECORDS = [
+    {'image_id': COLL_ID + '/LC08_044033_20170716',
+     'time_start': 1500230000000, 'cloud_cover_land': 10.0,
+     'data_type': 'L1TP', 'xmin': -123.0, 'ymin': 38.0, 'xmax': -121.0,
+     'ymax': 40.0},
+    {'image_id': COLL_ID + '/LC08_044033_20170801',
+     'time_start': 1501612000000, 'cloud_cover_land': 80.0,
+     'data_type': 'L1TP', 'xmin': -123.0, 'ymin': 38.0, 'xmax': -121.0,
+     'ymax': 40.0},
+    {'image_id': COLL_ID + '/LC08_043033_20170725',
+     'time_start': 1500994000000, 'cloud_cover_land': 5.0,
+     'data_type': 'L1GT', 'xmin': -121.5, 'ymin': 38.0, 'xmax': -119.5,
+     'ymax': 40.0},
+    {'image_id': 'LANDSAT/LE07/C01/T1_TOA/LE07_044033_20170708',
+     'time_start': 1499530000000, 'cloud_cover_land': 1.0,
+     'data_type': 'L1TP'},
+]
+
+
+def default_catalog():
+    scene_catalog = catalog.SceneCatalog()
+    scene_catalog.add(SCENE_RECORDS)
+    return scene_catalog
+
+
+def test_SceneCatalog_add():
+    scene_catalog = default_catalog()
+    assert len(scene_catalog) == 4
+    # Records are replaced if they are added again
+    assert scene_catalog.add(SCENE_RECORDS[:1]) == 1
+    assert len(scene_catalog) == 4
+
+
+def test_SceneCatalog_add_exception():
+    with pytest.raises(ValueError):
+        catalog.SceneCatalog().add([{'image_id': COLL_ID + '/deadbeef',
+                                     'time_start': 0}])
+
+
+def test_SceneCatalog_last_date():
+    scene_catalog = default_catalog()
+    assert scene_catalog.last_date(COLL_ID) == '2017-08-01'
+    assert scene_catalog.last_date('LANDSAT/LT05/C01/T1_TOA') is None
+
+
+@pytest.mark.parametrize(
+    'kwargs, expected',
+    [
+        [{}, ['LC08_043033_20170725', 'LC08_044033_20170716']],
+        [{'end_date': '2017-08-02'},
+         ['LC08_043033_20170725', 'LC08_044033_20170716',
+          'LC08_044033_20170801']],
+        [{'cloud_cover_max': 8}, ['LC08_043033_20170725']],
+        [{'data_type': 'L1TP'}, ['LC08_044033_20170716']],
+        [{'bbox': [-122.5, 38.5, -122.0, 39.0]}, ['LC08_044033_20170716']],
+        [{'wrs2_tiles': ['p043r033']}, ['LC08_043033_20170725']],
+    ]
+)
+def test_SceneCatalog_image_ids(kwargs, expected):
+    args = {'coll_id': COLL_ID, 'start_date': '2017-07-01',
+            'end_date': '2017-08-01'}
+    args.update(kwargs)
+    output = default_catalog().image_ids(**args)
+    assert output == ['{}/{}'.format(COLL_ID, x) for x in expected]
+
+
+def test_SceneCatalog_image_ids_no_bbox():
+    """Scenes without a footprint bounding box are always included"""
+    output = default_catalog().image_ids(
+        'LANDSAT/LE07/C01/T1_TOA', '2017-07-01', '2017-08-01',
+        bbox=[0, 0, 1, 1])
+    assert output == ['LANDSAT/LE07/C01/T1_TOA/LE07_044033_20170708']
+
+
+class FakeSceneCollection():
+    """Local stand in for the Earth Engine scene metadata collection"""
+    def __init__(self, features, error_offset=None):
+        self.features = features
+        self.error_offset = error_offset
+        self.pages = []
+        self.date_range = None
+
+    def filterDate(self, start_date, end_date):
+        self.date_range = (start_date, end_date)
+        return self
+
+    def filterBounds(self, geometry):
+        return self
+
+    def sort(self, prop):
+        return self
+
+    def map(self, func):
+        return self
+
+    def toList(self, count, offset=0):
+        self.pages.append((count, offset))
+        if offset == self.error_offset:
+            raise Exception('Collection query aborted after accumulating '
+                            'over 5000 elements')
+        return FakeList(self.features[offset:offset + count])
+
+
+class FakeList():
+    def __init__(self, values):
+        self.values = values
+
+    def getInfo(self):
+        return self.values
+
+
+def fake_scene_features(n):
+    features = []
+    for i in range(n):
+        dt = datetime.datetime(2017, 1, 1) + datetime.timedelta(days=i)
+        features.append({'type': 'Feature', 'geometry': None, 'properties': {
+            'image_index': 'LC08_044033_{}'.format(dt.strftime('%Y%m%d')),
+            'time_start': utils.millis(dt),
+            'cloud_cover_land': 10.0,
+            'data_type': 'L1TP',
+            'bounds': [[[-123, 38], [-121, 38], [-121, 40], [-123, 40]]],
+        }})
+    return features
+
+
+def test_SceneCatalog_refresh(monkeypatch):
+    """Scene metadata is requested in pages"""
+    scene_coll = FakeSceneCollection(fake_scene_features(12))
+    monkeypatch.setattr(catalog.ee, 'ImageCollection', lambda x: scene_coll)
+    scene_catalog = catalog.SceneCatalog()
+    assert scene_catalog.refresh(COLL_ID, end_date='2018-01-01',
+                                 page_size=5) == 12
+    assert scene_coll.pages == [(5, 0), (5, 5), (5, 10)]
+    # An empty catalog is refreshed from the start of the archive
+    assert scene_coll.date_range == ('1984-01-01', '2018-01-01')
+    assert len(scene_catalog) == 12
+    assert scene_catalog.last_date(COLL_ID) == '2017-01-12'
+    assert scene_catalog.image_ids(
+        COLL_ID, '2017-01-01', '2017-01-03', bbox=[-122, 39, -122, 39]) == [
+        COLL_ID + '/LC08_044033_20170101', COLL_ID + '/LC08_044033_20170102']
+
+    # Later refreshes start at the last date in the catalog
+    scene_catalog.refresh(COLL_ID, end_date='2018-01-01', page_size=5)
+    assert scene_coll.date_range == ('2017-01-12', '2018-01-01')
+
+
+def test_SceneCatalog_refresh_exception(monkeypatch):
+    """Earth Engine exceptions are raised instead of returning a partial list"""
+    scene_coll = FakeSceneCollection(fake_scene_features(12), error_offset=5)
+    monkeypatch.setattr(catalog.ee, 'ImageCollection', lambda x: scene_coll)
+    with pytest.raises(Exception):
+        catalog.SceneCatalog().refresh(COLL_ID, page_size=5)
+
+
+def test_SceneCatalog_file(tmpdir):
+    db_path = str(tmpdir.join('scenes.db'))
+    scene_catalog = catalog.SceneCatalog(db_path)
+    scene_catalog.add(SCENE_RECORDS)
+    scene_catalog.close()
+    assert len(catalog.SceneCatalog(db_path)) == 4
+
+
+@pytest.mark.parametrize(
+    'coordinates, expected',
+    [
+        [[-121.9, 39.0], [-121.9, 39.0, -121.9, 39.0]],
+        [[[[0, 1], [2, -1], [1, 3], [0, 1]]], [0, -1, 2, 3]],
+        [[], [None, None, None, None]],
+    ]
+)
+def test_geojson_bbox(coordinates, expected):
+    assert catalog.geojson_bbox(coordinates) == expected
@@ -2,6 +2,7 @@ import datetime
 # import pprint
 
 import ee
+import numpy as np
 import pytest
 
 import openet.ssebop.landsat as landsat
@@ -100,3 +101,159 @@ def test_lst_calculation(red, nir, bt, expected, tol=0.000001):
 def test_lst_band_name():
     output = utils.getinfo(landsat.lst(toa_image()))
     assert output['bands'][0]['id'] == 'lst'
+
+
+@pytest.mark.parametrize(
+    'red, nir, expected',
+    [
+        [0.2, 9.0 / 55, -0.1],
+        [0.2, 0.2,  0.0],
+        [0.2, 0.3, 0.2],
+        [0.3, 0.7, 0.4],
+        [0.1, 0.9, 0.8],
+    ]
+)
+def test_ndvi_array(red, nir, expected, tol=0.000001):
+    output = landsat.ndvi_array(np.array([red]), np.array([nir]))
+    assert abs(output[0] - expected) <= tol
+
+
+@pytest.mark.parametrize(
+    'red, nir, expected',
+    [
+        [0.2, 9.0 / 55, 0.985],      # -0.1
+        [0.2, 0.2,  0.977],          # 0.0
+        [0.1, 11.0 / 90,  0.977],    # 0.1
+        [0.2, 0.2999, 0.977],        # 0.3- (0.3 NIR isn't exactly an NDVI of 0.2)
+        [0.2, 0.3001, 0.986335],     # 0.3+
+        [0.1, 13.0 / 70, 0.986742],  # 0.3
+        [0.3, 0.7, 0.987964],        # 0.4
+        [0.2, 0.6, 0.99],            # 0.5
+        [0.2, 0.8, 0.99],            # 0.6
+        [0.1, 17.0 / 30, 0.99],      # 0.7
+    ]
+)
+def test_emissivity_array(red, nir, expected, tol=0.000001):
+    ndvi = landsat.ndvi_array(np.array([red]), np.array([nir]))
+    output = landsat.emissivity_array(ndvi)
+    assert abs(output[0] - expected) <= tol
+
+
+def test_emissivity_array_nodata():
+    output = landsat.emissivity_array(np.array([np.nan, 0.4]))
+    assert np.isnan(output[0]) and not np.isnan(output[1])
+
+
+@pytest.mark.parametrize(
+    'red, nir, bt, expected',
+    [
+        [0.2, 0.7, 300, 303.471031],
+    ]
+)
+def test_lst_array(red, nir, bt, expected, tol=0.000001):
+    ndvi = landsat.ndvi_array(np.array([red]), np.array([nir]))
+    output = landsat.lst_array(
+        np.array([bt], dtype=np.float64), landsat.emissivity_array(ndvi),
+        k1=607.76, k2=1260.56)
+    assert abs(output[0] - expected) <= tol
+
+
+def test_input_arrays(tol=0.000001):
+    red = np.full((2, 3), 0.2)
+    nir = np.full((2, 3), 0.7)
+    bt = np.full((2, 3), 300.0)
+    out = np.empty((2, 2, 3))
+    output = landsat.input_arrays(red, nir, bt, k1=607.76, k2=1260.56, out=out)
+    assert output is out
+    assert np.all(np.abs(output[0] - 303.471031) <= tol)
+    assert np.all(np.abs(output[1] - 0.5 / 0.9) <= tol)
+
+
+def test_input_arrays_out_shape_exception():
+    with pytest.raises(ValueError):
+        landsat.input_arrays(
+            np.ones((2, 3)), np.ones((2, 3)), np.ones((2, 3)), 607.76, 1260.56,
+            out=np.empty((2, 3)))
+
+
+@pytest.mark.parametrize(
+    'k1, k2',
+    [
+        [607.76, 1260.56],
+        [666.09, 1282.71],
+        [774.8853, 1321.0789],
+    ]
+)
+def test_LSTTable_max_error(k1, k2):
+    table = landsat.LSTTable(k1, k2)
+    assert 0 < table.max_error < 0.0001
+
+    # Check random values against the exact calculation
+    rng = np.random.default_rng(0)
+    bt = rng.uniform(220, 360, 10000)
+    emissivity = rng.uniform(0.977, 0.99, 10000)
+    exact = landsat.lst_array(bt, emissivity, k1, k2)
+    assert np.max(np.abs(table(bt, emissivity) - exact)) <= table.max_error
+
+
+def test_LSTTable_nodata(k1=607.76, k2=1260.56, tol=0.0001):
+    """NaN and masked pixels are NaN instead of raising an IndexError"""
+    bt = np.array([300.0, np.nan, 300.0, 300.0])
+    emissivity = np.array([0.98, 0.98, np.nan, 0.98])
+    output = landsat.LSTTable(k1, k2)(bt, emissivity)
+    assert abs(output[0] - landsat.lst_array(300.0, 0.98, k1, k2)) <= tol
+    assert np.all(np.isnan(output[1:3]))
+    assert abs(output[3] - output[0]) <= tol
+
+    masked_bt = np.ma.masked_array([300.0, 300.0], mask=[False, True])
+    output = landsat.LSTTable(k1, k2)(masked_bt, np.array([0.98, 0.98]))
+    assert abs(output[0] - landsat.lst_array(300.0, 0.98, k1, k2)) <= tol
+    assert np.isnan(output[1])
+
+
+def test_input_arrays_lut_nodata():
+    # NDVI (and the emissivity) is NaN when red + nir is 0
+    output = landsat.input_arrays(
+        np.array([[0.0, 0.2]]), np.array([[0.0, 0.7]]),
+        np.array([[300.0, np.nan]]), k1=607.76, k2=1260.56, lut=True)
+    assert np.all(np.isnan(output[0]))
+
+
+def test_LSTTable_outside_range(k1=607.76, k2=1260.56, tol=0.000001):
+    """Brightness temperatures outside the table are computed directly"""
+    bt = np.array([200.0, 300.0, 370.0])
+    emissivity = np.array([0.98, 0.98, 0.98])
+    output = landsat.LSTTable(k1, k2)(bt, emissivity)
+    exact = landsat.lst_array(bt, emissivity, k1, k2)
+    assert abs(output[0] - exact[0]) <= tol
+    assert abs(output[2] - exact[2]) <= tol
+
+
+def test_LSTTable_emissivity_outside_range(k1=607.76, k2=1260.56,
+                                           tol=0.000001):
+    """Emissivities outside the table are computed directly"""
+    bt = np.array([300.0, 300.0, 300.0])
+    emissivity = np.array([0.95, 0.98, 0.995])
+    output = landsat.LSTTable(k1, k2)(bt, emissivity)
+    exact = landsat.lst_array(bt, emissivity, k1, k2)
+    assert abs(output[0] - exact[0]) <= tol
+    assert abs(output[2] - exact[2]) <= tol
+
+
+def test_lst_table_cache():
+    assert landsat.lst_table(607.76, 1260.56) is landsat.lst_table(607.76, 1260.56)
+
+
+def test_lst_array_lut(red=0.2, nir=0.7, bt=300, expected=303.471031, tol=0.0001):
+    ndvi = landsat.ndvi_array(np.array([red]), np.array([nir]))
+    output = landsat.lst_array(
+        np.array([bt], dtype=np.float64), landsat.emissivity_array(ndvi),
+        k1=607.76, k2=1260.56, lut=True)
+    assert abs(output[0] - expected) <= tol
+
+
+def test_input_arrays_lut(tol=0.0001):
+    output = landsat.input_arrays(
+        np.full((2, 3), 0.2), np.full((2, 3), 0.7), np.full((2, 3), 300.0),
+        k1=607.76, k2=1260.56, lut=True)
+    assert np.all(np.abs(output[0] - 303.471031) <= tol)
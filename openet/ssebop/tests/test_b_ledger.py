@@ -0,0 +1,147 @@
+import concurrent.futures
+
+import pytest
+
+import openet.ssebop.ledger as ledger
+
+
+COLL_ID = 'projects/usgs-ssebop/tcorr_scene/topowx_median_v0_scene'
+ASSET_IDS = [
+    COLL_ID + '/LC08_044033_20170716',
+    COLL_ID + '/LC08_044033_20170801',
+    COLL_ID + '/LC08_043033_20170725',
+]
+
+
+class FakeTask():
+    def __init__(self, task_id):
+        self.id = task_id
+
+
+def test_RunLedger_plan():
+    run_ledger = ledger.RunLedger()
+    for asset_id in ASSET_IDS:
+        assert run_ledger.plan(asset_id, export_id='export', fingerprint='a') \
+            == 'planned'
+    assert len(run_ledger) == 3
+    assert run_ledger.count(COLL_ID) == 3
+    assert run_ledger.count('other') == 0
+    assert run_ledger.remaining(COLL_ID) == sorted(ASSET_IDS)
+    # Planning an export that was already submitted doesn't change it
+    run_ledger.submitted(ASSET_IDS[0], 'task_a')
+    assert run_ledger.plan(ASSET_IDS[0]) == 'submitted'
+    assert run_ledger.state('missing') is None
+
+
+def test_RunLedger_sync_assets():
+    run_ledger = ledger.RunLedger()
+    run_ledger.plan(ASSET_IDS[0])
+    run_ledger.plan(ASSET_IDS[1])
+    assert run_ledger.sync_assets(COLL_ID, ASSET_IDS[1:]) == 2
+    assert run_ledger.asset_ids(COLL_ID, states=['completed']) == \
+        sorted(ASSET_IDS[1:])
+    assert run_ledger.remaining(COLL_ID) == ASSET_IDS[:1]
+
+
+def test_RunLedger_sync_assets_missing():
+    run_ledger = ledger.RunLedger()
+    run_ledger.sync_assets(COLL_ID, ASSET_IDS)
+    # Completed exports without an asset are planned again
+    assert run_ledger.sync_assets(COLL_ID, ASSET_IDS[1:]) == 2
+    assert run_ledger.remaining(COLL_ID) == ASSET_IDS[:1]
+    # Assets written outside of the ledger are marked completed
+    run_ledger.plan(ASSET_IDS[0], export_id='export_0')
+    run_ledger.sync_assets(COLL_ID, ASSET_IDS)
+    assert run_ledger.remaining(COLL_ID) == []
+
+
+def test_RunLedger_plan_fingerprint():
+    run_ledger = ledger.RunLedger()
+    run_ledger.plan(ASSET_IDS[0], fingerprint='a')
+    run_ledger.submitted(ASSET_IDS[0], 'task_a')
+    run_ledger.set_state(ASSET_IDS[0], 'completed')
+    assert run_ledger.plan(ASSET_IDS[0], fingerprint='a') == 'completed'
+    # Completed exports are planned again when the inputs change
+    assert run_ledger.plan(ASSET_IDS[0], fingerprint='b') == 'planned'
+    assert run_ledger.remaining(COLL_ID) == ASSET_IDS[:1]
+    # Active exports are not changed
+    run_ledger.submitted(ASSET_IDS[0], 'task_b')
+    assert run_ledger.plan(ASSET_IDS[0], fingerprint='c') == 'submitted'
+    # Assets without a fingerprint take the first one
+    run_ledger.sync_assets(COLL_ID, ASSET_IDS[1:2])
+    assert run_ledger.plan(ASSET_IDS[1], fingerprint='a') == 'completed'
+    assert run_ledger.plan(ASSET_IDS[1], fingerprint='b') == 'planned'
+
+
+def test_RunLedger_sync_planned():
+    """Check that tasks started without a track() callback are recovered"""
+    run_ledger = ledger.RunLedger()
+    for i, asset_id in enumerate(ASSET_IDS):
+        run_ledger.plan(asset_id, export_id='export_{}'.format(i))
+    task_list = {
+        'export_0': {'id': 'task_0', 'state': 'RUNNING'},
+        'export_1': {'id': 'task_1', 'state': 'UNSUBMITTED'},
+        'other': {'id': 'task_2', 'state': 'READY'},
+    }
+    assert run_ledger.sync_planned(COLL_ID, task_list) == 1
+    assert run_ledger.active_tasks(COLL_ID) == {
+        'export_0': {'id': 'task_0', 'state': 'running'}}
+    assert run_ledger.remaining(COLL_ID) == sorted(ASSET_IDS[1:])
+
+
+def test_RunLedger_sync_tasks():
+    run_ledger = ledger.RunLedger()
+    for i, asset_id in enumerate(ASSET_IDS):
+        run_ledger.plan(asset_id, export_id='export_{}'.format(i))
+        run_ledger.submitted(asset_id, 'task_{}'.format(i))
+    requests = []
+
+    def state_func(task_ids):
+        requests.append(sorted(task_ids))
+        return {'task_0': 'READY', 'task_1': 'COMPLETED', 'task_2': 'FAILED'}
+
+    assert run_ledger.sync_tasks(state_func, batch_size=2) == 2
+    # Only the submitted and running tasks are requested
+    assert sorted(sum(requests, [])) == ['task_0', 'task_1', 'task_2']
+    assert [run_ledger.state(a) for a in ASSET_IDS] == \
+        ['submitted', 'completed', 'failed']
+    assert run_ledger.active_tasks(COLL_ID) == {
+        'export_0': {'id': 'task_0', 'state': 'submitted'}}
+    requests.clear()
+    run_ledger.sync_tasks(state_func)
+    assert requests == [['task_0']]
+
+
+def test_RunLedger_track():
+    run_ledger = ledger.RunLedger()
+    run_ledger.plan(ASSET_IDS[0])
+    run_ledger.plan(ASSET_IDS[1])
+    with concurrent.futures.ThreadPoolExecutor(2) as executor:
+        run_ledger.track(ASSET_IDS[0], executor.submit(FakeTask, 'task_a'))
+        run_ledger.track(ASSET_IDS[1], executor.submit(int, 'error'))
+    assert run_ledger.active_tasks(COLL_ID) == {
+        None: {'id': 'task_a', 'state': 'submitted'}}
+    assert run_ledger.remaining(COLL_ID) == [ASSET_IDS[1]]
+
+
+def test_RunLedger_file(tmpdir):
+    ledger_path = str(tmpdir.join('ledger.db'))
+    run_ledger = ledger.RunLedger(ledger_path)
+    run_ledger.plan(ASSET_IDS[0])
+    run_ledger.close()
+    assert ledger.RunLedger(ledger_path).remaining(COLL_ID) == ASSET_IDS[:1]
+
+
+def test_RunLedger_state_exception():
+    run_ledger = ledger.RunLedger()
+    with pytest.raises(ValueError):
+        run_ledger.set_state(ASSET_IDS[0], 'unknown')
+    with pytest.raises(ValueError):
+        run_ledger.count(COLL_ID, states=['unknown'])
+
+
+def test_fingerprint():
+    assert ledger.fingerprint('a', {'b': 1, 'c': 2}) == \
+        ledger.fingerprint('a', {'c': 2, 'b': 1})
+    assert ledger.fingerprint('a', 1) != ledger.fingerprint('a', 2)
+    assert len(ledger.fingerprint('a')) == 16
@@ -1,4 +1,5 @@
 import ee
+import numpy as np
 import pytest
 
 import openet.ssebop.model as model
@@ -87,6 +88,88 @@ def test_Image_et_fraction_elr_param(lst, dt, elev, tcorr, tmax, elr_flag,
     assert abs(output['et_fraction'] - expected) <= tol
 
 
+@pytest.mark.parametrize(
+    'tmax, elev, threshold, expected',
+    [
+        [305, 1500, 1500, 305],
+        [305, 2000, 1500, 303.5],
+        [305, 500, 0, 303.5],
+    ]
+)
+def test_Model_lapse_adjust_array(tmax, elev, threshold, expected, tol=0.0001):
+    output = model.lapse_adjust(
+        np.full((2, 2), tmax, dtype=np.float64), np.full((2, 2), elev), threshold)
+    assert isinstance(output, np.ndarray)
+    assert np.all(np.abs(output - expected) <= tol)
+
+
+def test_Model_lapse_adjust_array_masked():
+    tmax = np.ma.masked_array([305.0, 305.0], mask=[False, True])
+    output = model.lapse_adjust(tmax, np.array([2000.0, 2000.0]), 1500)
+    assert np.ma.isMaskedArray(output)
+    assert abs(output[0] - 303.5) <= 0.0001
+    assert output.mask.tolist() == [False, True]
+
+
+@pytest.mark.parametrize(
+    'lst, dt, tcorr, tmax, expected',
+    [
+        [308, 10, 0.98, 310, 0.58],
+        [300, 15, 0.98, 310, 1.05],
+        [319, 15, 0.98, 310, 0.0],
+        [305, 25, 0.98, 310, 0.952],
+        [305, 6, 0.98, 310, 0.8],
+        [315, 15, 0.985, 310, 0.3566],
+        [302, 17, 0.985, 308, 1.05],
+        [327, 17, 0.985, 308, 0.0],
+    ]
+)
+def test_Model_et_fraction_array_values(lst, dt, tcorr, tmax, expected,
+                                        tol=0.0001):
+    """Check that the array ETf values match the Earth Engine test values"""
+    output = model.et_fraction(
+        lst=np.full((3, 3), lst, dtype=np.float64),
+        tmax=np.full((3, 3), tmax, dtype=np.float64),
+        tcorr=tcorr, dt=dt)
+    assert np.ma.isMaskedArray(output)
+    assert not output.mask.any()
+    assert np.all(np.abs(output - expected) <= tol)
+
+
+def test_Model_et_fraction_array_clamp_nodata():
+    """Test that ETf is set to nodata for ETf >= 1.3"""
+    output = model.et_fraction(
+        lst=np.array([300.0, 308.0]), tmax=np.array([310.0, 310.0]),
+        tcorr=0.98, dt=10)
+    assert output.mask.tolist() == [True, False]
+
+
+def test_Model_et_fraction_array_input_mask():
+    """Test that masked input pixels are masked in the output"""
+    lst = np.ma.masked_array([308.0, 308.0], mask=[True, False])
+    output = model.et_fraction(
+        lst=lst, tmax=np.array([310.0, 310.0]), tcorr=0.98, dt=10)
+    assert output.mask.tolist() == [True, False]
+    assert abs(output[1] - 0.58) <= 0.0001
+
+
+@pytest.mark.parametrize(
+    'lst, dt, elev, tcorr, tmax, elr_flag, expected',
+    [
+        [305, 15, 2000, 0.98, 310, False, 0.9200],
+        [305, 15, 2000, 0.98, 310, True, 0.8220],
+        [315, 15, 2000, 0.98, 310, True, 0.1553],
+    ]
+)
+def test_Model_et_fraction_array_elr_param(lst, dt, elev, tcorr, tmax,
+                                           elr_flag, expected, tol=0.0001):
+    output = model.et_fraction(
+        lst=np.array([lst], dtype=np.float64),
+        tmax=np.array([tmax], dtype=np.float64),
+        tcorr=tcorr, dt=dt, elr_flag=elr_flag, elev=np.array([elev]))
+    assert abs(output[0] - expected) <= tol
+
+
 @pytest.mark.parametrize(
     'tmax, tmin, elev, doy, lat, expected',
     [
@@ -174,6 +257,145 @@ def test_Model_dt_calc_rs_ea(tmax, tmin, elev, doy, lat, rs, ea, expected,
     assert abs(float(dt) - expected) <= tol
 
 
+@pytest.mark.parametrize(
+    'tmax, tmin, elev, doy, lat, rs, ea, expected',
+    [
+        # Same values as the Earth Engine dt tests above
+        [309.1128, 292.6634, 68.4937, 194, 36.0405, None, None, 18.8347],
+        [313.5187, 292.2343, 18, 197, 39.1968, None, None, 18.3925],
+        [313.5187, 292.2343, 18, 197, 39.1968, 29.1144, None, 18.4785],
+        [313.1500, 293.6500, 18, 197, 39.1968, None, 0.9200, 15.0200],
+        [312.3927, 293.2107, 18, 197, 39.1968, 30.2915, 1.6384, 18.1711],
+    ]
+)
+def test_Model_dt_array(tmax, tmin, elev, doy, lat, rs, ea, expected,
+                        tol=0.0001):
+    dt = model.dt(
+        tmax=np.full((2, 2), tmax), tmin=np.full((2, 2), tmin),
+        elev=np.full((2, 2), elev), doy=doy, lat=np.full((2, 2), lat),
+        rs=rs, ea=ea)
+    assert dt.shape == (2, 2)
+    assert np.all(np.abs(dt - expected) <= tol)
+
+
+def test_Model_dt_array_masked():
+    tmax = np.ma.masked_array([[313.15, 313.15]], mask=[[False, True]])
+    tmin = np.ma.masked_array([293.65, 293.65], mask=[True, False])
+    dt = model.dt(tmax=tmax, tmin=tmin, elev=18, doy=197, lat=39.1968)
+    assert dt.shape == (1, 2)
+    assert np.all(np.isnan(dt))
+    # Unmasked values match the unmasked inputs
+    tmin = np.ma.masked_array([293.65, 293.65], mask=[False, True])
+    dt = model.dt(tmax=tmax, tmin=tmin, elev=18, doy=197, lat=39.1968)
+    expected = model.dt(tmax=np.array([313.15]), tmin=np.array([293.65]),
+                        elev=18, doy=197, lat=39.1968)
+    assert dt[0, 0] == expected[0]
+    assert np.isnan(dt[0, 1])
+
+
+def test_Model_dt_cube_elev_masked():
+    tmax = np.full((2, 1, 2), 313.15)
+    elev = np.ma.masked_array([[18.0, 18.0]], mask=[[False, True]])
+    output = model.dt_cube(tmax, tmax - 20, elev, [196, 197], 39.2,
+                           dtype=np.float64)
+    expected = model.dt_cube(tmax, tmax - 20, 18, [196, 197], 39.2,
+                             dtype=np.float64)
+    assert np.all(output[:, 0, 0] == expected[:, 0, 0])
+    assert np.all(np.isnan(output[:, 0, 1]))
+
+
+def test_Model_dt_array_lat_exception():
+    with pytest.raises(ValueError):
+        model.dt(tmax=np.array([313.15]), tmin=np.array([293.65]),
+                 elev=21.83, doy=197)
+
+
+@pytest.mark.parametrize('chunk_size', [1, 4, 7, 100])
+def test_Model_dt_cube_chunks(chunk_size, tol=0.000001):
+    """Check that the chunked stack matches the single day calculation"""
+    rng = np.random.default_rng(0)
+    tmax = rng.uniform(300, 315, (10, 4, 5))
+    tmin = tmax - rng.uniform(10, 20, (10, 4, 5))
+    rs = rng.uniform(10, 30, (10, 4, 5))
+    elev = rng.uniform(0, 3000, (4, 5))
+    lat = np.linspace(30, 45, 4)[:, np.newaxis]
+    doy = np.arange(180, 190)
+
+    output = model.dt_cube(tmax, tmin, elev, doy, lat, rs=rs,
+                           chunk_size=chunk_size, dtype=np.float64)
+    for i in range(len(doy)):
+        expected = model.dt(tmax[i], tmin[i], elev, doy[i],
+                            lat=np.broadcast_to(lat, (4, 5)), rs=rs[i])
+        assert np.all(np.abs(output[i] - expected) <= tol)
+
+
+def test_Model_dt_cube_out():
+    tmax = np.full((3, 2, 2), 313.15, dtype=np.float32)
+    out = np.zeros((3, 2, 2), dtype=np.float32)
+    output = model.dt_cube(tmax, tmax - 20, 18, [196, 197, 198], 39.2, out=out)
+    assert output is out
+    assert np.all(out > 0)
+
+
+def test_Model_dt_cube_doy_exception():
+    with pytest.raises(ValueError):
+        model.dt_cube(np.full((3, 2, 2), 313.15), np.full((3, 2, 2), 293.15),
+                      18, [196, 197], 39.2)
+
+
+@pytest.mark.parametrize(
+    'doy, lat, expected',
+    [
+        # FAO56 Example 8 (Ra = 32.2 MJ m-2 d-1) scaled to the 1367 W m-2
+        #   solar constant used in dt() (instead of 24 * 60 minutes)
+        [246, -20, 32.2 * 1367 / 1440],
+    ]
+)
+def test_Model_ra(doy, lat, expected, tol=0.1):
+    assert abs(model.ra(doy, lat) - expected) <= tol
+
+
+def test_Model_RadiationGrid_values(tol=0.000001):
+    lat = np.repeat(np.linspace(30, 45, 5)[:, np.newaxis], 3, axis=1)
+    elev = np.full((5, 3), 1500.0)
+    radiation = model.RadiationGrid(lat, elev)
+    assert radiation.table.shape == (366, 5)
+    for doy in [1, 197, 366]:
+        ra = model.ra(doy, lat)
+        assert np.all(np.abs(radiation.ra(doy) - ra) <= tol)
+        assert np.all(np.abs(radiation.rso(doy) - ra * 0.78) <= tol)
+
+
+def test_Model_RadiationGrid_broadcast(tol=0.000001):
+    """Check that only the Ra table is stored for a broadcast grid"""
+    lat = np.linspace(30, 45, 4)[:, np.newaxis]
+    radiation = model.RadiationGrid(lat, 10, shape=(4, 1000))
+    assert radiation.shape == (4, 1000)
+    assert radiation._inverse.base.size == 4
+    out = np.empty((4, 1000), dtype=np.float32)
+    assert radiation.rso(197, out=out) is out
+    expected = model.ra(197, lat) * (10 * 2E-5 + 0.75)
+    assert np.all(np.abs(out - expected) <= tol * 100)
+
+
+def test_Model_RadiationGrid_doy_exception():
+    with pytest.raises(ValueError):
+        model.RadiationGrid(np.array([[35.0]])).ra(0)
+
+
+def test_Model_dt_radiation(tol=0.000001):
+    lat = np.array([[35.0, 40.0]])
+    radiation = model.RadiationGrid(lat, 18)
+    expected = model.dt(np.full((1, 2), 313.15), np.full((1, 2), 293.65),
+                        18, 196, lat=lat)
+    output = model.dt(np.full((1, 2), 313.15), np.full((1, 2), 293.65),
+                      18, 196, lat=lat, radiation=radiation)
+    assert np.all(np.abs(output - expected) <= tol)
+    with pytest.raises(ValueError):
+        model.dt(np.full((2, 2), 313.15), np.full((2, 2), 293.65),
+                 18, 196, lat=35.0, radiation=radiation)
+
+
 def test_Model_dt_doy_exception():
     with pytest.raises(ValueError):
         utils.getinfo(model.dt(tmax=313.15, tmin=293.65, elev=21.83, doy=None))
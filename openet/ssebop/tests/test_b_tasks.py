@@ -0,0 +1,181 @@
+import threading
+import time
+
+import pytest
+
+import openet.ssebop.tasks as tasks
+
+
+class FakeTaskService():
+    """Local stand in for the Earth Engine task service"""
+    def __init__(self, quota_errors=0, errors=None, start_time=0.0):
+        self.quota_errors = quota_errors
+        self.errors = errors or {}
+        self.start_time = start_time
+        self.started = []
+        self.attempts = 0
+        self.active = 0
+        self.max_active = 0
+        self._lock = threading.Lock()
+
+    def task(self, task_id):
+        return FakeTask(self, task_id)
+
+    def start(self, task_id):
+        with self._lock:
+            self.attempts += 1
+            self.active += 1
+            self.max_active = max(self.max_active, self.active)
+            quota_error = self.quota_errors > 0
+            if quota_error:
+                self.quota_errors -= 1
+        try:
+            time.sleep(self.start_time)
+            if quota_error:
+                raise Exception('Too many tasks already in the queue')
+            if task_id in self.errors:
+                raise Exception(self.errors[task_id])
+            with self._lock:
+                self.started.append((task_id, time.monotonic()))
+        finally:
+            with self._lock:
+                self.active -= 1
+
+
+class FakeTask():
+    def __init__(self, service, task_id):
+        self.service = service
+        self.id = task_id
+
+    def start(self):
+        self.service.start(self.id)
+
+
+def test_TaskSubmitter_start():
+    service = FakeTaskService(start_time=0.01)
+    with tasks.TaskSubmitter(max_workers=3, rate=None) as submitter:
+        for i in range(12):
+            submitter.submit(service.task(i))
+    assert sorted(x[0] for x in service.started) == list(range(12))
+    assert 1 < service.max_active <= 3
+
+
+def test_TaskSubmitter_rate():
+    service = FakeTaskService()
+    submitter = tasks.TaskSubmitter(max_workers=4, rate=50)
+    for i in range(6):
+        submitter.submit(service.task(i))
+    assert submitter.shutdown() == []
+    times = sorted(x[1] for x in service.started)
+    # One task is allowed immediately and the rest at the token rate
+    assert times[-1] - times[0] >= 5 / 50 * 0.9
+
+
+def test_TaskSubmitter_quota_backoff():
+    service = FakeTaskService(quota_errors=2)
+    submitter = tasks.TaskSubmitter(max_workers=2, rate=100, backoff=0.01)
+    futures = [submitter.submit(service.task(i)) for i in range(4)]
+    # The rate is halved for each quota error
+    assert submitter.shutdown() == []
+    assert [f.result().id for f in futures] == list(range(4))
+    assert service.attempts == 6
+    assert submitter.rate < 100
+
+
+def test_TaskSubmitter_retry_limit():
+    service = FakeTaskService(errors={1: 'asset already exists'})
+    submitter = tasks.TaskSubmitter(
+        max_workers=2, rate=None, max_retries=3, backoff=0.001)
+    futures = [submitter.submit(service.task(i)) for i in range(3)]
+    errors = submitter.shutdown()
+    assert [i for i, e in errors] == [1]
+    with pytest.raises(Exception):
+        futures[1].result()
+    assert service.attempts == 5
+
+
+@pytest.mark.parametrize(
+    'message, expected',
+    [
+        ['Too many tasks already in the queue (3000)', True],
+        ['Quota exceeded', True],
+        ['429 Resource Exhausted', True],
+        ['Cannot overwrite asset', False],
+    ]
+)
+def test_is_quota_error(message, expected):
+    assert tasks.is_quota_error(Exception(message)) == expected
+
+
+def test_TokenBucket_exception():
+    with pytest.raises(ValueError):
+        tasks.TokenBucket(rate=0)
+    with pytest.raises(ValueError):
+        tasks.TokenBucket(rate=1, capacity=0)
+
+
+class FakeTaskStates():
+    """Task states where each task is READY for a number of state requests"""
+    def __init__(self, ready_requests=1):
+        self.ready_requests = ready_requests
+        self.requests = {}
+        self.max_ready = 0
+
+    def __call__(self, task_ids):
+        self.max_ready = max(self.max_ready, len(task_ids))
+        states = {}
+        for task_id in task_ids:
+            self.requests[task_id] = self.requests.get(task_id, 0) + 1
+            if self.requests[task_id] > self.ready_requests:
+                states[task_id] = 'RUNNING'
+            else:
+                states[task_id] = 'READY'
+        return states
+
+
+def test_TaskSubmitter_ready_queue():
+    service = FakeTaskService()
+    task_states = FakeTaskStates(ready_requests=1)
+    ready_queue = tasks.ReadyQueue(
+        3, task_ids=['existing'], state_func=task_states,
+        min_interval=0.001, max_interval=0.01)
+    submitter = tasks.TaskSubmitter(
+        max_workers=4, rate=None, ready_queue=ready_queue)
+    for i in range(10):
+        submitter.submit(service.task(i))
+    assert submitter.shutdown() == []
+    assert sorted(x[0] for x in service.started) == list(range(10))
+    # The existing READY task counts against the limit
+    assert task_states.max_ready <= 3
+    assert 'existing' in task_states.requests
+    assert ready_queue.ready_count <= 3
+
+
+def test_TaskSubmitter_ready_queue_start_error():
+    # A task that can't be started releases its READY queue slot
+    service = FakeTaskService(errors={0: 'asset already exists'})
+    ready_queue = tasks.ReadyQueue(
+        1, state_func=FakeTaskStates(), min_interval=0.001)
+    submitter = tasks.TaskSubmitter(
+        max_workers=1, rate=None, max_retries=1, ready_queue=ready_queue)
+    submitter.submit(service.task(0))
+    submitter.submit(service.task(1))
+    assert [i for i, e in submitter.shutdown()] == [0]
+    assert ready_queue.ready_count == 1
+    assert ready_queue.refresh_count == 0
+
+
+def test_ReadyQueue_interval():
+    ready_queue = tasks.ReadyQueue(
+        1, task_ids=['a'], state_func=FakeTaskStates(ready_requests=3),
+        min_interval=0.001, max_interval=0.004)
+    ready_queue.acquire()
+    # The interval is doubled while the task is READY and then halved
+    assert ready_queue.refresh_count == 4
+    assert ready_queue.interval == 0.002
+    assert ready_queue.ready_count == 0
+
+
+def test_ReadyQueue_exception():
+    with pytest.raises(ValueError):
+        tasks.ReadyQueue(0)
@@ -0,0 +1,326 @@
+import csv
+import datetime
+
+import numpy as np
+import pytest
+
+import openet.ssebop.tcorr as tcorr
+
+
+def brute_focal(array, offsets, func):
+    """Reference focal reduction that skips NaN and out of bounds pixels"""
+    rows, cols = array.shape
+    output = np.full(array.shape, np.nan)
+    for y in range(rows):
+        for x in range(cols):
+            if np.isnan(array[y, x]):
+                continue
+            values = [array[y + dy, x + dx] for dy, dx in offsets
+                      if 0 <= y + dy < rows and 0 <= x + dx < cols]
+            values = [v for v in values if not np.isnan(v)]
+            output[y, x] = func(values)
+    return output
+
+
+def circle_offsets(radius):
+    return [(dy, dx) for dy in range(-radius, radius + 1)
+            for dx in range(-radius, radius + 1)
+            if dy ** 2 + dx ** 2 <= radius ** 2]
+
+
+def square_offsets(radius):
+    return [(dy, dx) for dy in range(-radius, radius + 1)
+            for dx in range(-radius, radius + 1)]
+
+
+def random_array(shape=(23, 31), nodata=0.1, seed=0):
+    rng = np.random.default_rng(seed)
+    array = rng.uniform(0, 1, shape)
+    array[rng.uniform(0, 1, shape) < nodata] = np.nan
+    return array
+
+
+@pytest.mark.parametrize('radius', [0, 1, 2, 4, 7])
+def test_focal_mean_circle(radius, tol=1E-10):
+    array = random_array()
+    output = tcorr.focal_mean(array, radius, tile_rows=5)
+    expected = brute_focal(array, circle_offsets(radius), np.mean)
+    np.testing.assert_allclose(output, expected, atol=tol)
+
+
+@pytest.mark.parametrize('radius', [0, 1, 3])
+def test_focal_mean_square(radius, tol=1E-10):
+    array = random_array()
+    output = tcorr.focal_mean(array, radius, kernel='square')
+    expected = brute_focal(array, square_offsets(radius), np.mean)
+    np.testing.assert_allclose(output, expected, atol=tol)
+
+
+def test_focal_mean_exception():
+    with pytest.raises(ValueError):
+        tcorr.focal_mean(np.zeros((3, 3)), 1, kernel='diamond')
+    with pytest.raises(ValueError):
+        tcorr.focal_mean(np.zeros(3), 1)
+
+
+@pytest.mark.parametrize('radius', [0, 1, 2, 5, 20])
+def test_focal_min(radius):
+    array = random_array()
+    output = tcorr.focal_min(array, radius)
+    expected = brute_focal(array, square_offsets(radius), np.min)
+    np.testing.assert_array_equal(output, expected)
+
+
+def test_tcorr_mask():
+    ndvi = np.full((20, 20), 0.8)
+    ndvi[10, 10] = 0.5
+    lst = np.full((20, 20), 300.0)
+    lst[0, 0] = 260
+    mask = tcorr.tcorr_mask(lst, ndvi)
+    # Pixels within 2 pixels (60 m) of the low NDVI pixel are excluded
+    assert not mask[8:13, 8:13].any()
+    assert mask[7, 7] and mask[13, 13] and mask[10, 7]
+    assert not mask[0, 0]
+    assert mask.sum() == 20 * 20 - 25 - 1
+
+
+def test_tcorr_mask_nodata():
+    ndvi = np.full((10, 10), 0.8)
+    ndvi[5, 5] = np.nan
+    lst = np.full((10, 10), 300.0)
+    mask = tcorr.tcorr_mask(lst, ndvi)
+    # Masked NDVI pixels are skipped in the neighborhood but not buffered
+    assert not mask[5, 5]
+    assert mask.sum() == 99
+
+
+def test_tcorr_mask_smooth():
+    # High NDVI pixels with a low focal mean NDVI are excluded
+    ndvi = np.full((20, 20), 0.2)
+    ndvi[8:13, 8:13] = 0.9
+    lst = np.full((20, 20), 300.0)
+    assert not tcorr.tcorr_mask(lst, ndvi).any()
+    assert tcorr.tcorr_mask(lst, ndvi, smooth_radius=30).sum() == 1
+
+
+def test_tcorr_image(tol=1E-8):
+    ndvi = np.full((10, 10), 0.8)
+    ndvi[0, :] = 0.1
+    lst = np.full((10, 10), 300.0)
+    output = tcorr.tcorr_image(lst, ndvi, tmax=310.0)
+    assert np.isnan(output[:3]).all()
+    assert abs(output[5, 5] - 300.0 / 310) <= tol
+
+
+def random_tcorr(shape=(50, 40), nodata=0.2, seed=1):
+    rng = np.random.default_rng(seed)
+    array = rng.normal(0.98, 0.02, shape)
+    array[rng.uniform(0, 1, shape) < nodata] = np.nan
+    return array
+
+
+@pytest.mark.parametrize('q', [0, 5, 50, 95, 100])
+def test_TcorrSketch_percentile(q):
+    array = random_tcorr()
+    sketch = tcorr.TcorrSketch().update(array)
+    values = array[~np.isnan(array)]
+    expected = np.percentile(values, q, method='inverted_cdf')
+    assert abs(sketch.percentile(q) - expected) <= sketch.max_error
+    assert sketch.count == values.size
+
+
+def test_TcorrSketch_merge():
+    array = random_tcorr()
+    sketch = tcorr.TcorrSketch().update(array)
+    merged = tcorr.TcorrSketch().update(array[:17])\
+        .merge(tcorr.TcorrSketch().update(array[17:]))
+    np.testing.assert_array_equal(merged.counts, sketch.counts)
+
+
+def test_TcorrSketch_merge_exception():
+    with pytest.raises(ValueError):
+        tcorr.TcorrSketch().merge(tcorr.TcorrSketch(bin_width=0.001))
+
+
+def test_TcorrSketch_out_of_range():
+    sketch = tcorr.TcorrSketch().update(np.array([0.1, 0.2, 2.0, 1.0]))
+    assert sketch.count == 4
+    assert sketch.percentile(0) == 0.5
+    assert sketch.percentile(100) == 1.5
+
+
+def test_TcorrSketch_empty():
+    sketch = tcorr.TcorrSketch().update(np.full((2, 2), np.nan))
+    assert sketch.stats() == {'tcorr_p5': None, 'tcorr_count': 0}
+
+
+def test_tcorr_stats():
+    array = random_tcorr()
+    output = tcorr.tcorr_stats(array, tile_rows=7)
+    values = array[~np.isnan(array)]
+    expected = np.percentile(values, 5, method='inverted_cdf')
+    assert output['tcorr_count'] == values.size
+    assert abs(output['tcorr_p5'] - expected) <= 0.00005
+
+
+def test_tcorr_stats_tiles():
+    array = random_tcorr()
+    output = tcorr.tcorr_stats(iter([array[:10], array[10:]]))
+    assert output == tcorr.tcorr_stats(array)
+
+
+TCORR_RECORDS = [
+    {'wrs2_tile': 'p042r035', 'date': '2015-07-13', 'month': 7,
+     'tcorr_value': 0.981, 'tcorr_index': 0},
+    {'wrs2_tile': 'p042r035', 'date': '2015-07-29', 'month': 7,
+     'tcorr_value': 0.5, 'tcorr_index': 9},
+    {'wrs2_tile': 'p042r035', 'month': 7, 'tcorr_value': 0.972,
+     'tcorr_index': 1},
+    {'wrs2_tile': 'p042r035', 'tcorr_value': 0.976, 'tcorr_index': 2},
+    {'wrs2_tile': 'p042r035', 'tcorr_value': 0.978, 'tcorr_index': 3},
+    {'wrs2_tile': 'p043r035', 'tcorr_value': 0.977, 'tcorr_index': 3},
+]
+
+
+@pytest.mark.parametrize(
+    'wrs2_tile, date, tcorr_source, expected',
+    [
+        ['p042r035', '2015-07-13', 'SCENE', (0.981, 0)],
+        # Nodata scene values fall back to the monthly value
+        ['p042r035', '2015-07-29', 'SCENE', (0.972, 1)],
+        ['p042r035', '2015-08-14', 'SCENE', (0.976, 2)],
+        ['p043r035', '2015-07-13', 'SCENE', (0.977, 3)],
+        ['p044r035', '2015-07-13', 'SCENE', (None, 9)],
+        ['p042r035', '2015-07-29', 'SCENE_DAILY', (None, 9)],
+        ['p042r035', '2015-07-13', 'SCENE_MONTHLY', (0.972, 1)],
+        ['p042r035', '2015-07-13', 'SCENE_ANNUAL', (0.976, 2)],
+        ['p042r035', '2015-07-13', 'SCENE_DEFAULT', (0.978, 3)],
+        ['p042r035', datetime.datetime(2015, 7, 13), 'SCENE', (0.981, 0)],
+        # Dynamic Tcorr only uses the index for the fallback levels
+        ['p042r035', '2015-07-13', 'DYNAMIC', (0.972, 1)],
+        ['p042r035', '2015-08-13', 'DYNAMIC', (0.976, 2)],
+        ['p044r035', '2015-07-13', 'DYNAMIC', (None, 9)],
+    ]
+)
+def test_TcorrIndex_lookup(wrs2_tile, date, tcorr_source, expected):
+    index = tcorr.TcorrIndex(TCORR_RECORDS)
+    assert index.lookup(wrs2_tile, date, tcorr_source) == expected
+
+
+def test_TcorrIndex_scene_lookup():
+    index = tcorr.TcorrIndex(TCORR_RECORDS)
+    output = index.scene_lookup('LANDSAT/LC08/C01/T1_TOA/LC08_042035_20150713')
+    assert output == (0.981, 0)
+
+
+def test_TcorrIndex_exception():
+    with pytest.raises(ValueError):
+        tcorr.TcorrIndex([{'wrs2_tile': 'p042r035', 'tcorr_value': 0.9,
+                           'tcorr_index': 4}])
+    with pytest.raises(ValueError):
+        tcorr.TcorrIndex().lookup('p042r035', '2015-07-13', 'DEADBEEF')
+
+
+def test_TcorrIndex_from_csv(tmpdir):
+    csv_path = str(tmpdir.join('tcorr.csv'))
+    fields = ['wrs2_tile', 'date', 'month', 'tcorr_value', 'tcorr_index']
+    with open(csv_path, 'w', newline='') as csv_f:
+        writer = csv.DictWriter(csv_f, fields)
+        writer.writeheader()
+        writer.writerows(TCORR_RECORDS)
+    index = tcorr.TcorrIndex.from_csv(csv_path)
+    assert len(index) == 5
+    assert index.lookup('p042r035', '2015-07-29') == (0.972, 1)
+
+
+def random_scene_table(n=2000, seed=2):
+    rng = np.random.default_rng(seed)
+    wrs2_tiles = np.array(['p{:03d}r{:03d}'.format(p, 33) for p in
+                           rng.integers(40, 46, n)])
+    dates = np.datetime64('2010-01-01') + rng.integers(0, 3650, n)
+    tcorr_values = rng.uniform(0.95, 1.0, n)
+    tcorr_values[rng.uniform(0, 1, n) < 0.05] = np.nan
+    pixel_counts = rng.integers(0, 2000, n)
+    return wrs2_tiles, dates, tcorr_values, pixel_counts
+
+
+def test_group_stats(min_pixel_count=250, min_scene_count=20, tol=1E-12):
+    wrs2_tiles, dates, tcorr_values, pixel_counts = random_scene_table()
+    table = tcorr.group_stats(
+        wrs2_tiles, dates, tcorr_values, pixel_counts,
+        min_pixel_count=min_pixel_count, min_scene_count=min_scene_count)
+
+    # Compare with a separate reduction for each group
+    valid = ~np.isnan(tcorr_values) & (pixel_counts >= min_pixel_count)
+    years = dates.astype('datetime64[Y]').astype(int) + 1970
+    months = dates.astype('datetime64[M]').astype(int) % 12 + 1
+    for record in tcorr.group_records(table):
+        mask = valid & (wrs2_tiles == record['wrs2_tile'])
+        if 'month' in record:
+            mask &= months == record['month']
+            assert record['tcorr_index'] in [1, 9]
+        elif 'year' in record:
+            mask &= years == record['year']
+        count = int(mask.sum())
+        assert record['tcorr_scene_count'] == count
+        assert abs(record['tcorr_value'] -
+                   np.median(tcorr_values[mask])) <= tol
+        if count < min_scene_count:
+            assert record['tcorr_index'] == 9
+    assert len(table['wrs2_tile']) == 6 * 12 + 6 * 10 + 6
+
+
+def test_group_stats_index(tmpdir):
+    table = tcorr.group_stats(
+        ['p042r035', 'p042r035', 'p042r035', 'p043r035'],
+        ['2015-07-13', '2015-07-29', '2016-08-14', '2015-07-13'],
+        [0.97, 0.98, 0.99, 0.96], [1000, 1000, 1000, 10],
+        min_pixel_count=100, min_scene_count=2)
+    csv_path = str(tmpdir.join('tcorr_groups.csv'))
+    tcorr.write_group_stats(table, csv_path)
+    index = tcorr.TcorrIndex.from_csv(csv_path)
+    assert index.lookup('p042r035', '2016-07-13') == (0.975, 1)
+    # Single scene groups are below the scene count
+    assert index.lookup('p042r035', '2016-08-13') == (0.98, 2)
+    assert index.lookup('p042r035', '2015-08-13') == (0.975, 2)
+    assert index.lookup('p043r035', '2015-07-13') == (None, 9)
+
+
+def test_group_stats_empty_scenes():
+    """Check that empty scene rows don't change the medians"""
+    table = tcorr.group_stats(
+        ['p042r035', 'p042r035', 'p042r035', 'p042r035'],
+        ['2015-07-13', '2015-07-29', '2015-08-14', '2015-08-30'],
+        [0.97, 0, 0, np.nan], [1000, 0, 0, 1000])
+    assert list(table['tcorr_value']) == [0.97, 0.97, 0.97]
+    assert list(table['tcorr_scene_count']) == [1, 1, 1]
+
+
+def test_group_stats_empty():
+    table = tcorr.group_stats([], [], [])
+    assert all(len(table[field]) == 0 for field in tcorr.GROUP_FIELDS)
+
+
+def test_group_stats_exception():
+    with pytest.raises(ValueError):
+        tcorr.group_stats(['p042r035'], ['2015-07-13'], [0.97, 0.98])
+    with pytest.raises(ValueError):
+        tcorr.group_stats(['p042r035'], ['2015-07-13'], [0.97],
+                          min_pixel_count=10)
+
+
+def test_read_scene_table(tmpdir):
+    csv_path = str(tmpdir.join('tcorr_scene.csv'))
+    with open(csv_path, 'w', newline='') as csv_f:
+        writer = csv.writer(csv_f)
+        writer.writerow(['scene_id', 'wrs2_tile', 'date', 'tcorr_p5',
+                         'pixel_count'])
+        writer.writerow(['LC08_042035_20150713', 'p042r035', '2015-07-13',
+                         0.97, 1000])
+        writer.writerow(['LC08_042035_20150729', 'p042r035', '2015-07-29',
+                         '', ''])
+    scene_table = tcorr.read_scene_table(csv_path)
+    assert list(scene_table['wrs2_tiles']) == ['p042r035', 'p042r035']
+    assert np.isnan(scene_table['tcorr_values'][1])
+    table = tcorr.group_stats(**scene_table)
+    assert list(table['tcorr_scene_count']) == [1, 1, 1]
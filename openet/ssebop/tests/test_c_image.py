@@ -1,4 +1,5 @@
 import datetime
+import json
 import pprint
 
 import ee
@@ -165,6 +166,33 @@ def test_Image_init_date_properties():
         (SCENE_DT - datetime.datetime(1970, 1, 3)).days % 8 + 1)
 
 
+def test_Image_init_client_properties():
+    """Test that the scene properties are computed client side from scene_id"""
+    m = ssebop.Image(default_image(), scene_id='1_2_' + SCENE_ID)
+    assert m._scene_info['scene_id'] == SCENE_ID
+    assert utils.getinfo(m._scene_id) == SCENE_ID
+    assert utils.getinfo(m._wrs2_tile) == 'p{}r{}'.format(
+        SCENE_ID.split('_')[1][:3], SCENE_ID.split('_')[1][3:])
+    assert utils.getinfo(m._year) == int(SCENE_DATE.split('-')[0])
+    assert utils.getinfo(m._month) == int(SCENE_DATE.split('-')[1])
+    assert utils.getinfo(m._start_date)['value'] == SCENE_TIME
+    assert utils.getinfo(m._end_date)['value'] == utils.millis(
+        SCENE_DT + datetime.timedelta(days=1))
+    assert utils.getinfo(m._doy) == SCENE_DOY
+    assert utils.getinfo(m._cycle_day) == int(
+        (SCENE_DT - datetime.datetime(1970, 1, 3)).days % 8 + 1)
+
+
+def test_Image_init_client_graph_size():
+    """Test that the client side scene properties reduce the graph size"""
+    def graph_size(ee_obj):
+        return len(json.loads(ee_obj.serialize(for_cloud_api=True))['values'])
+    server_img = ssebop.Image(default_image()).calculate(['time'])
+    client_img = ssebop.Image(default_image(), scene_id=SCENE_ID)\
+        .calculate(['time'])
+    assert graph_size(client_img) < graph_size(server_img)
+
+
 def test_Image_init_scene_id_property():
     """Test that the system:index from a merged collection is parsed"""
     input_img = default_image()
@@ -714,6 +742,72 @@ def test_Image_tcorr_scene_daily():
     assert index == 9
 
 
+@pytest.mark.parametrize(
+    'records, expected',
+    [
+        [[{'wrs2_tile': 'p042r035', 'date': SCENE_DATE, 'tcorr_value': 0.99,
+           'tcorr_index': 0}], [0.99, 0]],
+        [[{'wrs2_tile': 'p042r035', 'tcorr_value': 0.98,
+           'tcorr_index': 3}], [0.98, 3]],
+        [[], [None, 9]],
+    ]
+)
+def test_Image_tcorr_index_source(records, expected, tol=0.000001):
+    """Test getting a constant Tcorr from an in memory Tcorr index"""
+    tcorr_img = ssebop.Image.from_image_id(
+        '{}/{}'.format(COLL_ID, SCENE_ID),
+        tcorr_source=ssebop.tcorr.TcorrIndex(records)).tcorr
+    tcorr = utils.point_image_value(tcorr_img, SCENE_POINT)
+    index = utils.getinfo(tcorr_img.get('tcorr_index'))
+    if expected[0] is None:
+        assert tcorr['tcorr'] is None
+    else:
+        assert abs(tcorr['tcorr'] - expected[0]) <= tol
+    assert index == expected[1]
+
+
+@pytest.mark.parametrize(
+    'tcorr_source, expected',
+    [
+        ['SCENE', [0.99, 0]],
+        ['SCENE_MONTHLY', [0.97, 1]],
+        ['SCENE_DEFAULT', [0.98, 3]],
+    ]
+)
+def test_Image_tcorr_index_source_keyword(tcorr_source, expected,
+                                          tol=0.000001):
+    """Test the Tcorr index levels for the paired source keyword"""
+    records = [
+        {'wrs2_tile': 'p042r035', 'date': SCENE_DATE, 'tcorr_value': 0.99,
+         'tcorr_index': 0},
+        {'wrs2_tile': 'p042r035', 'month': int(SCENE_DATE[5:7]),
+         'tcorr_value': 0.97, 'tcorr_index': 1},
+        {'wrs2_tile': 'p042r035', 'tcorr_value': 0.98, 'tcorr_index': 3},
+    ]
+    tcorr_img = ssebop.Image.from_image_id(
+        '{}/{}'.format(COLL_ID, SCENE_ID),
+        tcorr_source=(ssebop.tcorr.TcorrIndex(records), tcorr_source)).tcorr
+    tcorr = utils.point_image_value(tcorr_img, SCENE_POINT)
+    assert abs(tcorr['tcorr'] - expected[0]) <= tol
+    assert utils.getinfo(tcorr_img.get('tcorr_index')) == expected[1]
+
+
+def test_Image_tcorr_index_source_dynamic():
+    """Test the dynamic scene Tcorr with the index fallback values"""
+    records = [{'wrs2_tile': 'p042r035', 'tcorr_value': 0.98,
+                'tcorr_index': 3}]
+    tcorr_img = ssebop.Image.from_image_id(
+        '{}/{}'.format(COLL_ID, SCENE_ID),
+        tcorr_source=(ssebop.tcorr.TcorrIndex(records), 'DYNAMIC')).tcorr
+    assert utils.getinfo(tcorr_img.get('tcorr_index')) in [0, 3]
+
+
+def test_Image_tcorr_index_source_exception():
+    with pytest.raises(ValueError):
+        utils.getinfo(default_image_obj(
+            tcorr_source=ssebop.tcorr.TcorrIndex()).tcorr)
+
+
 @pytest.mark.parametrize(
     'tcorr_src',
     [
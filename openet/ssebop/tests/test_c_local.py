@@ -0,0 +1,328 @@
+import tempfile
+import time
+
+import numpy as np
+import pytest
+
+import openet.ssebop.interpolate as interpolate
+import openet.ssebop.local as local
+import openet.ssebop.model as model
+
+# Note: These are made up values
+SCENE_TIME = 1437072009000
+SCENE_0UTC = 1437004800000
+
+
+def default_image(lst=305, ndvi=0.8, tmax=310, dt=15, tcorr=0.98,
+                  et_reference=10, shape=(2, 3), **kwargs):
+    return local.LocalImage(
+        lst=np.full(shape, lst, dtype=np.float32),
+        ndvi=np.full(shape, ndvi, dtype=np.float32),
+        tmax=tmax, dt=dt, tcorr=tcorr, et_reference=et_reference,
+        time_start=SCENE_TIME, **kwargs)
+
+
+def test_LocalImage_calculate_shape():
+    output = default_image().calculate(['et', 'et_reference', 'et_fraction'])
+    assert output.shape == (3, 2, 3)
+    assert output.dtype == np.float32
+
+
+@pytest.mark.parametrize(
+    'lst, dt, tcorr, tmax, expected',
+    [
+        [308, 10, 0.98, 310, 0.58],
+        [305, 15, 0.98, 310, 0.92],
+        [300, 15, 0.98, 310, 1.05],
+        [319, 15, 0.98, 310, 0.0],
+        # dT is clamped to the dt_min/dt_max range
+        [305, 26, 0.98, 310, 0.952],
+        [305, 5, 0.98, 310, 0.8],
+    ]
+)
+def test_LocalImage_et_fraction_values(lst, dt, tcorr, tmax, expected,
+                                       tol=0.0001):
+    output = default_image(lst=lst, dt=dt, tcorr=tcorr, tmax=tmax)\
+        .calculate(['et_fraction'])
+    assert np.all(np.abs(output[0] - expected) <= tol)
+
+
+def test_LocalImage_et_fraction_matches_model():
+    rng = np.random.default_rng(0)
+    lst = rng.uniform(295, 325, (20, 20))
+    tmax = rng.uniform(300, 315, (20, 20))
+    dt = rng.uniform(6, 25, (20, 20))
+    elev = rng.uniform(0, 3000, (20, 20))
+    output = local.LocalImage(
+            lst=lst, ndvi=np.full((20, 20), 0.5), tmax=tmax, dt=dt,
+            tcorr=0.98, elev=elev, elr_flag=True)\
+        .calculate(['et_fraction'])[0]
+    expected = model.et_fraction(lst, tmax, 0.98, dt, elr_flag=True, elev=elev)
+    assert np.array_equal(np.isnan(output), expected.mask)
+    assert np.allclose(output[~expected.mask], expected.compressed(), atol=1E-5)
+
+
+def test_LocalImage_et_fraction_nodata():
+    """Test that ETf is set to nodata for ETf >= 1.3"""
+    output = default_image(lst=300, dt=10).calculate(['et_fraction', 'mask'])
+    assert np.all(np.isnan(output))
+
+
+def test_LocalImage_et_values(tol=0.0001):
+    output = default_image().calculate(['et', 'et_reference', 'et_fraction'])
+    assert np.all(np.abs(output[0] - 9.2) <= tol)
+    assert np.all(np.abs(output[1] - 10) <= tol)
+    assert np.all(np.abs(output[2] - 0.92) <= tol)
+
+
+def test_LocalImage_et_reference_masked():
+    """Reference ET should be masked to the input image pixels"""
+    image = default_image()
+    image.ndvi[0, 0] = np.nan
+    output = image.calculate(['et_reference'])
+    assert np.isnan(output[0, 0, 0]) and not np.isnan(output[0, 1, 1])
+
+
+def test_LocalImage_time_values():
+    output = default_image().calculate(['time', 'mask', 'quality'])
+    assert output.dtype == np.float64
+    assert np.all(output[0] == SCENE_0UTC)
+    assert np.all(output[1] == 1)
+    assert np.all(output[2] == 1)
+
+
+def test_LocalImage_calculate_out():
+    out = np.zeros((2, 2, 3), dtype=np.float32)
+    output = default_image().calculate(['ndvi', 'lst'], out=out)
+    assert output is out
+    assert np.all(out[0] == np.float32(0.8)) and np.all(out[1] == 305)
+
+
+def test_LocalImage_calculate_duplicate_variables():
+    output = default_image().calculate(['ndvi', 'ndvi'])
+    assert np.array_equal(output[0], output[1])
+
+
+def test_LocalImage_dependencies():
+    image = default_image()
+    assert image._dependencies(['et']) == ['et_fraction', 'et_reference', 'et']
+    assert image._dependencies(['time', 'ndvi']) == ['et_fraction', 'ndvi', 'mask', 'time']
+
+
+def test_LocalImage_calculate_variable_exception():
+    with pytest.raises(ValueError):
+        default_image().calculate(['foo'])
+
+
+def test_LocalImage_calculate_et_reference_exception():
+    with pytest.raises(ValueError):
+        default_image(et_reference=None).calculate(['et'])
+
+
+def test_LocalImage_from_landsat_arrays(tol=0.0001):
+    shape = (2, 3)
+    cloud_mask = np.zeros(shape, dtype=bool)
+    cloud_mask[0, 0] = True
+    image = local.LocalImage.from_landsat_arrays(
+        red=np.full(shape, 0.2), nir=np.full(shape, 0.7),
+        tir=np.full(shape, 300.0), k1=607.76, k2=1260.56,
+        cloud_mask=cloud_mask, tmax=310, dt=15, tcorr=0.98)
+    output = image.calculate(['lst', 'ndvi'])
+    assert np.isnan(output[:, 0, 0]).all()
+    assert abs(output[0, 1, 1] - 303.471031) <= tol
+
+
+def test_time_0utc():
+    assert local.time_0utc(SCENE_TIME) == SCENE_0UTC
+
+
+def collection_inputs(shape=(7, 9), nodata=0.2, seed=0):
+    """Random scene inputs and readers for testing LocalCollection"""
+    rng = np.random.default_rng(seed)
+    scene_dates = ['2017-06-20', '2017-07-08', '2017-07-16', '2017-07-24',
+                   '2017-08-09', '2017-09-02']
+    lst = rng.uniform(295, 315, (len(scene_dates),) + shape)
+    lst[rng.uniform(0, 1, lst.shape) < nodata] = np.nan
+    ndvi = rng.uniform(0.1, 0.9, lst.shape)
+    ndvi[np.isnan(lst)] = np.nan
+    etr_dates = np.arange('2017-06-01', '2017-10-01', dtype='datetime64[D]')
+    etr = rng.uniform(5, 10, (etr_dates.size,) + shape)
+    reads = []
+
+    def scene_reader(scene_i, window):
+        reads.append(window)
+        return local.LocalImage(
+            lst=lst[scene_i][window], ndvi=ndvi[scene_i][window], tmax=310,
+            dt=15, tcorr=0.98)
+
+    def etr_reader(window):
+        return etr[(slice(None),) + window]
+
+    return {
+        'scene_dates': scene_dates, 'scene_reader': scene_reader,
+        'shape': shape, 'et_reference_reader': etr_reader,
+        'et_reference_dates': etr_dates, 'reads': reads,
+        'lst': lst, 'ndvi': ndvi, 'etr': etr,
+    }
+
+
+@pytest.mark.parametrize('tile_size', [2, 4, 100])
+def test_LocalCollection_interpolate_tiles(tile_size, tol=1E-5):
+    inputs = collection_inputs()
+    variables = ['et', 'et_reference', 'et_fraction', 'ndvi', 'count']
+    coll = local.LocalCollection(
+        inputs['scene_dates'], inputs['scene_reader'], inputs['shape'],
+        start_date='2017-07-01', end_date='2017-09-01', variables=variables,
+        et_reference_reader=inputs['et_reference_reader'],
+        et_reference_dates=inputs['et_reference_dates'])
+    period_dates, output = coll.interpolate(
+        t_interval='monthly', tile_size=tile_size)
+
+    # Compare to interpolating the full grid at once
+    et_fraction = np.stack([
+        local.LocalImage(lst=lst, ndvi=ndvi, tmax=310, dt=15, tcorr=0.98)
+            .calculate(['et_fraction'])[0]
+        for lst, ndvi in zip(inputs['lst'], inputs['ndvi'])])
+    etr_mask = ((inputs['et_reference_dates'] >= np.datetime64('2017-07-01')) &
+                (inputs['et_reference_dates'] < np.datetime64('2017-09-01')))
+    expected_dates, expected = interpolate.from_scene_et_fraction_array(
+        et_fraction, inputs['scene_dates'], inputs['etr'][etr_mask],
+        inputs['et_reference_dates'][etr_mask], '2017-07-01', '2017-09-01',
+        variables, t_interval='monthly', ndvi=inputs['ndvi'])
+    assert period_dates == expected_dates
+    np.testing.assert_allclose(output, expected, atol=tol, rtol=1E-6)
+
+
+def test_LocalCollection_interpolate_scene_filter():
+    """Scenes outside of the interp_days range are not read"""
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'], inputs['scene_reader'], inputs['shape'],
+        start_date='2017-07-10', end_date='2017-07-20',
+        et_reference_reader=inputs['et_reference_reader'],
+        et_reference_dates=inputs['et_reference_dates'])
+    coll.interpolate(variables=['et'], interp_days=10, tile_size=100)
+    assert len(inputs['reads']) == 3
+
+
+def test_LocalCollection_interpolate_memmap(tmpdir):
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'], inputs['scene_reader'], inputs['shape'],
+        start_date='2017-07-01', end_date='2017-09-01',
+        et_reference_reader=inputs['et_reference_reader'],
+        et_reference_dates=inputs['et_reference_dates'])
+    out = np.lib.format.open_memmap(
+        str(tmpdir.join('output.npy')), mode='w+', dtype=np.float32,
+        shape=(2, 1) + inputs['shape'])
+    output = coll.interpolate(variables=['et'], t_interval='monthly',
+                              tile_size=3, out=out)[1]
+    assert output is out
+    assert np.isfinite(np.load(str(tmpdir.join('output.npy')))).any()
+
+
+def test_LocalCollection_tile_size():
+    tile_size = local.LocalCollection.tile_size(
+        scenes=50, days=365, bands=12, memory_limit=2 ** 30)
+    assert 100 < tile_size < 1000
+    assert local.LocalCollection.tile_size(
+        scenes=50, days=365, bands=12, memory_limit=2 ** 20) < tile_size
+
+
+def test_LocalCollection_interpolate_exception():
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'], inputs['scene_reader'], inputs['shape'],
+        start_date='2017-07-01', end_date='2017-09-01')
+    with pytest.raises(ValueError):
+        coll.interpolate(variables=['et'])
+
+
+class OverpassReader():
+    """Picklable scene reader for the overpass process pool"""
+    def __init__(self, lst, ndvi):
+        self.lst = lst
+        self.ndvi = ndvi
+
+    def __call__(self, scene_i, window):
+        return local.LocalImage(
+            lst=self.lst[scene_i][window], ndvi=self.ndvi[scene_i][window],
+            tmax=310, dt=15, tcorr=0.98, et_reference=10)
+
+
+def test_LocalCollection_overpass(tmpdir, tol=1E-6):
+    inputs = collection_inputs()
+    variables = ['et', 'et_fraction', 'ndvi']
+    coll = local.LocalCollection(
+        inputs['scene_dates'], OverpassReader(inputs['lst'], inputs['ndvi']),
+        inputs['shape'], start_date='2017-07-01', end_date='2017-09-01',
+        variables=variables)
+    out_path = str(tmpdir.join('overpass.npy'))
+    output = list(coll.overpass(out_path=out_path, max_workers=2))
+    assert [x[0] for x in output] == inputs['scene_dates'][1:5]
+    for scene_i, (scene_date, scene_array) in enumerate(output, 1):
+        expected = OverpassReader(inputs['lst'], inputs['ndvi'])(
+            scene_i, (slice(None), slice(None))).calculate(variables)
+        np.testing.assert_allclose(scene_array, expected, atol=tol)
+    # The output file is a complete .npy file
+    assert np.load(out_path).shape == (4, 3) + inputs['shape']
+
+
+def test_LocalCollection_overpass_temp_file(tmpdir, monkeypatch):
+    monkeypatch.setattr(tempfile, 'tempdir', str(tmpdir))
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'], OverpassReader(inputs['lst'], inputs['ndvi']),
+        inputs['shape'], start_date='2017-07-01', end_date='2017-09-01',
+        variables=['et'])
+    # The temporary file is removed once the generator is exhausted
+    assert len(list(coll.overpass(max_workers=1))) == 4
+    assert tmpdir.listdir() == []
+    # The temporary file is removed when the generator is closed early
+    output = coll.overpass(max_workers=1)
+    next(output)
+    assert len(tmpdir.listdir()) == 1
+    output.close()
+    assert tmpdir.listdir() == []
+
+
+class SlowOverpassReader(OverpassReader):
+    """Overpass scene reader that takes a fixed time for each scene"""
+    def __call__(self, scene_i, window):
+        time.sleep(0.5)
+        return super().__call__(scene_i, window)
+
+
+def test_LocalCollection_overpass_close(tmpdir):
+    """Test that the pending scenes are cancelled when closed early"""
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'],
+        SlowOverpassReader(inputs['lst'], inputs['ndvi']),
+        inputs['shape'], start_date='2017-06-01', end_date='2017-10-01',
+        variables=['et'])
+    out_path = str(tmpdir.join('overpass.npy'))
+    output = coll.overpass(out_path=out_path, max_workers=1)
+    next(output)
+    output.close()
+    # The process pool queues a few scenes ahead, but the last scene was
+    #   never started
+    out = np.load(out_path)
+    assert out.shape[0] == 6
+    assert np.all(out[0] != 0)
+    assert np.all(out[-1] == 0)
+
+
+def test_LocalCollection_overpass_exception():
+    inputs = collection_inputs()
+    coll = local.LocalCollection(
+        inputs['scene_dates'], inputs['scene_reader'], inputs['shape'],
+        start_date='2017-07-01', end_date='2017-09-01')
+    with pytest.raises(ValueError):
+        coll.overpass()
+
+
+def test_tiles():
+    windows = list(local.tiles((5, 3), 2))
+    assert len(windows) == 6
+    assert windows[-1] == (slice(4, 5), slice(2, 3))
@@ -4,6 +4,7 @@ import ee
 import pytest
 
 import openet.ssebop as ssebop
+import openet.ssebop.catalog as catalog
 import openet.ssebop.utils as utils
 # TODO: import utils from openet.core
 # import openet.core.utils as utils
@@ -230,6 +231,16 @@ def test_Collection_build_filter_dates_lc08():
     # assert parse_scene_id(output) == []
 
 
+def test_Collection_build_catalog():
+    """Test if the catalog image IDs match the server side filtering"""
+    scene_catalog = catalog.SceneCatalog()
+    for coll_id in COLLECTIONS:
+        scene_catalog.refresh(coll_id, '2017-06-01', '2017-09-01',
+                              geometry=ee.Geometry.Point(SCENE_POINT))
+    output = utils.getinfo(default_coll_obj(catalog=scene_catalog)._build())
+    assert parse_scene_id(output) == SCENE_ID_LIST
+
+
 def test_Collection_build_filter_args():
     # Need to test with two collections to catch bug when deepcopy isn't used
     collections = ['LANDSAT/LC08/C01/T1_SR', 'LANDSAT/LE07/C01/T1_SR']
@@ -294,6 +305,23 @@ def test_Collection_interpolate_variables_custom():
     assert [y['id'] for x in output['features'] for y in x['bands']] == ['et']
 
 
+def test_Collection_interpolate_time_mask(tol=0.000001):
+    """Test if NDVI is interpolated the same without ET fraction
+
+    The time band always has the ET fraction mask (the same as Image.time)
+    """
+    coll_obj = default_coll_obj(start_date='2017-07-01', end_date='2017-07-05')
+    output = utils.point_coll_value(
+        coll_obj.interpolate(variables=['ndvi'], t_interval='daily'),
+        TEST_POINT, scale=30)
+    expected = utils.point_coll_value(
+        coll_obj.interpolate(variables=['ndvi', 'et_fraction'],
+                             t_interval='daily'),
+        TEST_POINT, scale=30)
+    for date, value in expected['ndvi'].items():
+        assert abs(output['ndvi'][date] - value) <= tol
+
+
 def test_Collection_interpolate_t_interval_daily():
     """Test if the daily time interval parameter works
 
@@ -471,3 +499,47 @@ def test_Collection_interpolate_only_interpolate_images():
         start_date='2017-04-01', end_date='2017-04-30',
         variables=list(variables), cloud_cover_max=70).interpolate())
     assert {y['id'] for x in output['features'] for y in x['bands']} == variables
+
+
+def test_Collection_interpolate_windows_monthly():
+    """Test if the windowed images match a single interpolate call"""
+    coll_obj = default_coll_obj(start_date='2016-12-01', end_date='2017-02-01')
+    output = utils.getinfo(coll_obj.interpolate_windows(
+        t_interval='monthly', combine=True))
+    expected = utils.getinfo(coll_obj.interpolate(t_interval='monthly'))
+    assert parse_scene_id(output) == ['201612', '201701']
+    # The image IDs are not changed when the windows are combined
+    assert [x['properties']['system:index'] for x in output['features']] == \
+        [x['properties']['system:index'] for x in expected['features']]
+    assert {y['id'] for x in output['features'] for y in x['bands']} == VARIABLES
+
+
+def test_Collection_interpolate_windows_window_func():
+    """Test if window_func is called for each window in window order"""
+    coll_obj = default_coll_obj(start_date='2016-12-01', end_date='2017-02-01')
+    output = coll_obj.interpolate_windows(
+        t_interval='monthly', window_func=lambda x: x, max_workers=2)
+    assert len(output) == 2
+    assert parse_scene_id(utils.getinfo(output[1])) == ['201701']
+
+
+def test_Collection_interpolate_windows_default():
+    """Test if each window is computed separately by default"""
+    coll_obj = default_coll_obj(start_date='2016-12-01', end_date='2017-02-01')
+    output = coll_obj.interpolate_windows(t_interval='monthly')
+    assert [parse_scene_id(x) for x in output] == [['201612'], ['201701']]
+
+
+@pytest.mark.parametrize(
+    'kwargs',
+    [
+        {'t_interval': 'custom'},
+        {'t_interval': 'deadbeef'},
+        {'max_workers': 0},
+        {'window_years': 0},
+        {'window_func': lambda x: x, 'combine': True},
+    ]
+)
+def test_Collection_interpolate_windows_exception(kwargs):
+    with pytest.raises(ValueError):
+        default_coll_obj().interpolate_windows(**kwargs)
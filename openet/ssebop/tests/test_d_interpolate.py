@@ -1,6 +1,7 @@
 import pprint
 
 import ee
+import numpy as np
 import pytest
 
 import openet.ssebop.interpolate as interpolate
@@ -115,6 +116,32 @@ def test_from_scene_et_fraction_custom_values(tol=0.0001):
     assert output['count']['2017-07-01'] == 3
 
 
+def test_from_scene_et_fraction_no_time_band(tol=0.0001):
+    """The time band is built from the scene system:time_start"""
+    output_coll = interpolate.from_scene_et_fraction(
+        scene_coll(['et_fraction', 'ndvi', 'mask']),
+        start_date='2017-07-01', end_date='2017-08-01',
+        variables=['et', 'et_reference', 'et_fraction', 'ndvi'],
+        interp_args={'interp_method': 'linear', 'interp_days': 32},
+        model_args={'et_reference_source': 'IDAHO_EPSCOR/GRIDMET',
+                    'et_reference_band': 'etr',
+                    'et_reference_factor': 1.0,
+                    'et_reference_resample': 'nearest'},
+        t_interval='monthly')
+
+    TEST_POINT = (-121.5265, 38.7399)
+    output = utils.point_coll_value(output_coll, TEST_POINT, scale=10)
+    assert abs(output['ndvi']['2017-07-01'] - 0.6) <= tol
+    assert abs(output['et_fraction']['2017-07-01'] - 0.4) <= tol
+
+
+def test_add_time_band(tol=0.0001):
+    img = scene_coll(['et_fraction']).first()
+    output = utils.point_image_value(
+        interpolate.add_time_band(img), (-121.5265, 38.7399), scale=10)
+    assert abs(output['time'] - ee.Date.fromYMD(2017, 7, 8).millis().getInfo()) <= tol
+
+
 def test_from_scene_et_fraction_monthly_et_reference_factor(tol=0.0001):
     output_coll = interpolate.from_scene_et_fraction(
         scene_coll(['et_fraction', 'ndvi', 'time', 'mask']),
@@ -156,3 +183,421 @@ def test_from_scene_et_fraction_monthly_et_reference_resample(tol=0.0001):
     assert abs(output['et_reference']['2017-07-01'] - 303.622559) <= tol
     assert abs(output['et']['2017-07-01'] - (303.622559 * 0.4)) <= tol
     assert output['count']['2017-07-01'] == 3
+
+
+def daily_reference(values, scene_days, target_days, interp_days):
+    """Per pixel implementation of openet.core.interpolate.daily() for a
+    1D array of scene values (NaN is masked)"""
+    output = []
+    for t in target_days:
+        prev = [(d, v) for d, v in zip(scene_days, values)
+                if t - interp_days <= d < t and not np.isnan(v)]
+        next = [(d, v) for d, v in zip(scene_days, values)
+                if t <= d <= t + interp_days and not np.isnan(v)]
+        if not prev and not next:
+            output.append(np.nan)
+            continue
+        prev = prev[-1] if prev else next[0]
+        next = next[0] if next else prev
+        if next[0] == prev[0]:
+            output.append(prev[1])
+        else:
+            ratio = (t - prev[0]) / (next[0] - prev[0])
+            output.append(prev[1] + ratio * (next[1] - prev[1]))
+    return np.array(output)
+
+
+SCENE_DATES = ['2017-07-08', '2017-07-16', '2017-07-24', '2017-09-10']
+TARGET_DATES = np.arange('2017-06-01', '2017-10-31', dtype='datetime64[D]')
+
+
+def test_interp_weights():
+    weights = interpolate.interp_weights(
+        ['2017-07-08', '2017-07-16'], ['2017-07-08', '2017-07-12', '2017-07-16'])
+    np.testing.assert_allclose(weights, [[1, 0], [0.5, 0.5], [0, 1]])
+
+
+def test_interp_weights_interp_days():
+    weights = interpolate.interp_weights(
+        ['2017-07-08'], ['2017-07-01', '2017-07-15', '2017-07-16', '2017-07-20'],
+        interp_days=7)
+    assert weights[0, 0] == 1 and weights[1, 0] == 1
+    assert np.isnan(weights[2:]).all()
+
+
+def test_interp_weights_exception():
+    with pytest.raises(ValueError):
+        interpolate.interp_weights(['2017-07-16', '2017-07-08'], ['2017-07-10'])
+
+
+@pytest.mark.parametrize('interp_days', [32, 10])
+def test_daily_array_values(interp_days, tol=1E-10):
+    rng = np.random.default_rng(0)
+    scene_array = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    output = interpolate.daily_array(
+        scene_array, SCENE_DATES, TARGET_DATES, interp_days=interp_days)
+    scene_days = np.array(SCENE_DATES, dtype='datetime64[D]').astype(int)
+    target_days = TARGET_DATES.astype(int)
+    expected = daily_reference(scene_array[:, 1, 2], scene_days, target_days,
+                               interp_days)
+    np.testing.assert_allclose(output[:, 1, 2], expected, atol=tol)
+
+
+@pytest.mark.parametrize('interp_days', [32, 10])
+def test_daily_array_masked_values(interp_days, tol=1E-10):
+    rng = np.random.default_rng(0)
+    scene_array = rng.uniform(0, 1, (len(SCENE_DATES), 2, 3, 4))
+    scene_array[rng.uniform(0, 1, scene_array.shape) < 0.3] = np.nan
+    output = interpolate.daily_array(
+        scene_array, SCENE_DATES, TARGET_DATES, interp_days=interp_days)
+    scene_days = np.array(SCENE_DATES, dtype='datetime64[D]').astype(int)
+    target_days = TARGET_DATES.astype(int)
+    for index in np.ndindex(scene_array.shape[1:]):
+        expected = daily_reference(
+            scene_array[(slice(None),) + index], scene_days, target_days,
+            interp_days)
+        np.testing.assert_allclose(
+            output[(slice(None),) + index], expected, atol=tol)
+
+
+def test_daily_array_exception():
+    with pytest.raises(ValueError):
+        interpolate.daily_array(np.zeros((2, 3)), ['2017-07-08'], TARGET_DATES)
+
+
+def aggregate_reference(et_fraction, ndvi, scene_dates, et_reference,
+                        et_reference_dates, interp_days):
+    """Aggregate from the daily interpolated arrays (for a single period)"""
+    etf = interpolate.daily_array(
+        et_fraction, scene_dates, et_reference_dates, interp_days)
+    et = etf * et_reference
+    et_valid = ~np.isnan(et)
+    et_sum = np.where(et_valid.any(axis=0), np.nansum(et, axis=0), np.nan)
+    ndvi = interpolate.daily_array(
+        ndvi, scene_dates, et_reference_dates, interp_days)
+    return {
+        'et': et_sum,
+        'et_reference': et_reference.sum(axis=0),
+        'et_fraction': et_sum / et_reference.sum(axis=0),
+        'ndvi': np.nanmean(ndvi, axis=0),
+    }
+
+
+@pytest.mark.parametrize('nodata', [0, 0.3])
+@pytest.mark.parametrize('etr_shape', [(), (3, 4)])
+def test_from_scene_et_fraction_array_monthly(nodata, etr_shape, tol=1E-8):
+    rng = np.random.default_rng(0)
+    et_fraction = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    ndvi = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < nodata] = np.nan
+    etr_dates = np.arange('2017-07-01', '2017-09-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, (etr_dates.size,) + etr_shape)
+    variables = ['et', 'et_reference', 'et_fraction', 'ndvi']
+
+    period_dates, output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, et_reference, etr_dates,
+        start_date='2017-07-10', end_date='2017-08-10', variables=variables,
+        interp_days=32, t_interval='monthly', ndvi=ndvi)
+    assert period_dates == ['2017-07-01', '2017-08-01']
+    assert output.shape == (2, 4, 3, 4)
+
+    # Add the row/col dimensions to the scalar reference ET for broadcasting
+    etr_array = et_reference.reshape((etr_dates.size,) + (etr_shape or (1, 1)))
+    for period_i, (start, end) in enumerate([(0, 31), (31, 62)]):
+        expected = aggregate_reference(
+            et_fraction, ndvi, SCENE_DATES, etr_array[start:end],
+            etr_dates[start:end], 32)
+        for var_i, v in enumerate(variables):
+            np.testing.assert_allclose(
+                output[period_i, var_i], np.broadcast_to(expected[v], (3, 4)),
+                atol=tol)
+
+
+def test_from_scene_et_fraction_array_shared_mask(tol=1E-8):
+    """ETf and NDVI with the same mask are interpolated in a single pass"""
+    rng = np.random.default_rng(2)
+    et_fraction = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    ndvi = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.3] = np.nan
+    ndvi[np.isnan(et_fraction)] = np.nan
+    etr_dates = np.arange('2017-07-01', '2017-08-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, (etr_dates.size, 3, 4))
+    variables = ['et', 'ndvi']
+
+    output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, et_reference, etr_dates,
+        start_date='2017-07-01', end_date='2017-08-01', variables=variables,
+        interp_days=32, t_interval='monthly', ndvi=ndvi)[1]
+    expected = aggregate_reference(
+        et_fraction, ndvi, SCENE_DATES, et_reference, etr_dates, 32)
+    for var_i, v in enumerate(variables):
+        np.testing.assert_allclose(output[0, var_i], expected[v], atol=tol)
+
+
+@pytest.mark.filterwarnings('ignore::RuntimeWarning')
+@pytest.mark.parametrize('interp_days', [32, 10])
+@pytest.mark.parametrize('t_interval', ['daily', 'monthly', 'annual'])
+def test_from_scene_et_fraction_array_masked_periods(interp_days, t_interval,
+                                                     tol=1E-8):
+    """Masked stacks with gaps and scenes on the same day"""
+    rng = np.random.default_rng(3)
+    scene_dates = ['2017-06-20', '2017-07-08', '2017-07-08', '2017-07-30',
+                   '2017-08-02', '2017-09-25']
+    et_fraction = rng.uniform(0, 1, (len(scene_dates), 3, 4))
+    ndvi = rng.uniform(0, 1, (len(scene_dates), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.4] = np.nan
+    ndvi[rng.uniform(0, 1, ndvi.shape) < 0.4] = np.nan
+    etr_dates = np.arange('2017-07-01', '2017-10-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, (etr_dates.size, 3, 4))
+    variables = ['et', 'et_fraction', 'ndvi']
+
+    period_dates, output = interpolate.from_scene_et_fraction_array(
+        et_fraction, scene_dates, et_reference, etr_dates,
+        start_date='2017-07-01', end_date='2017-10-01', variables=variables,
+        interp_days=interp_days, t_interval=t_interval, ndvi=ndvi)
+    period_days = np.array(period_dates + ['2017-10-01'],
+                           dtype='datetime64[D]')
+    for period_i in range(len(period_dates)):
+        day_mask = ((etr_dates >= period_days[period_i]) &
+                    (etr_dates < period_days[period_i + 1]))
+        expected = aggregate_reference(
+            et_fraction, ndvi, scene_dates, et_reference[day_mask],
+            etr_dates[day_mask], interp_days)
+        for var_i, v in enumerate(variables):
+            np.testing.assert_allclose(
+                output[period_i, var_i], expected[v], atol=tol)
+
+
+def test_from_scene_et_fraction_array_constant(tol=1E-6):
+    """Same setup as the from_scene_et_fraction() EE tests"""
+    et_fraction = np.full((3, 2, 2), 0.4)
+    et_fraction[1, 0, 0] = np.nan
+    etr_dates = np.arange('2017-07-01', '2017-08-01', dtype='datetime64[D]')
+    period_dates, output = interpolate.from_scene_et_fraction_array(
+        et_fraction, ['2017-07-08', '2017-07-16', '2017-07-24'],
+        np.full(etr_dates.size, 10.0), etr_dates,
+        start_date='2017-07-01', end_date='2017-08-01',
+        variables=['et', 'et_reference', 'et_fraction', 'count'],
+        t_interval='custom')
+    assert period_dates == ['2017-07-01']
+    np.testing.assert_allclose(output[0, 0], 310 * 0.4, atol=tol)
+    np.testing.assert_allclose(output[0, 1], 310, atol=tol)
+    np.testing.assert_allclose(output[0, 2], 0.4, atol=tol)
+    np.testing.assert_array_equal(output[0, 3], [[2, 3], [3, 3]])
+
+
+def test_from_scene_et_fraction_array_daily(tol=1E-8):
+    et_fraction = np.array([[0.2], [0.6]])
+    etr_dates = np.arange('2017-07-08', '2017-07-17', dtype='datetime64[D]')
+    period_dates, output = interpolate.from_scene_et_fraction_array(
+        et_fraction, ['2017-07-08', '2017-07-16'],
+        np.full(etr_dates.size, 2.0), etr_dates,
+        start_date='2017-07-08', end_date='2017-07-17',
+        variables=['et_fraction', 'et'], t_interval='daily')
+    assert len(period_dates) == 9
+    np.testing.assert_allclose(output[4, :, 0], [0.4, 0.8], atol=tol)
+
+
+def test_from_scene_et_fraction_array_exception():
+    with pytest.raises(ValueError):
+        interpolate.from_scene_et_fraction_array(
+            np.zeros((1, 2)), ['2017-07-08'], np.zeros(1), ['2017-07-08'],
+            '2017-07-01', '2017-08-01', ['ndvi'])
+
+
+@pytest.mark.parametrize(
+    'scene_date, t_interval',
+    [
+        ['2017-07-20', 'monthly'],
+        ['2017-07-20', 'daily'],
+        # Scene on the same date as an existing scene
+        [SCENE_DATES[2], 'custom'],
+        ['2017-10-20', 'monthly'],
+    ]
+)
+def test_update_scene_et_fraction_array_add(scene_date, t_interval, tol=1E-8):
+    rng = np.random.default_rng(0)
+    et_fraction = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    ndvi = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.5] = np.nan
+    ndvi[rng.uniform(0, 1, ndvi.shape) < 0.5] = np.nan
+    scene_et_fraction = rng.uniform(0, 1, (3, 4))
+    scene_et_fraction[0] = np.nan
+    scene_ndvi = rng.uniform(0, 1, (3, 4))
+    etr_dates = np.arange('2017-06-01', '2017-11-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, etr_dates.size)
+    variables = ['et', 'et_reference', 'et_fraction', 'ndvi', 'count']
+    args = dict(start_date='2017-06-01', end_date='2017-11-01',
+                variables=variables, interp_days=32, t_interval=t_interval)
+
+    period_dates, output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, et_reference, etr_dates, ndvi=ndvi, **args)
+    new_dates, new_et_fraction, new_ndvi = \
+        interpolate.update_scene_et_fraction_array(
+            output, et_fraction, SCENE_DATES, et_reference, etr_dates,
+            scene_date=scene_date, scene_et_fraction=scene_et_fraction,
+            ndvi=ndvi, scene_ndvi=scene_ndvi, **args)
+    assert new_et_fraction.shape[0] == len(SCENE_DATES) + 1
+
+    expected = interpolate.from_scene_et_fraction_array(
+        new_et_fraction, new_dates, et_reference, etr_dates, ndvi=new_ndvi,
+        **args)[1]
+    np.testing.assert_allclose(output, expected, atol=tol)
+
+
+def test_update_scene_et_fraction_array_remove(tol=1E-8):
+    rng = np.random.default_rng(1)
+    et_fraction = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.5] = np.nan
+    etr_dates = np.arange('2017-06-01', '2017-11-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, (etr_dates.size, 3, 4))
+    variables = ['et_fraction', 'count']
+    args = dict(start_date='2017-06-01', end_date='2017-11-01',
+                variables=variables, interp_days=32, t_interval='monthly')
+
+    output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, et_reference, etr_dates, **args)[1]
+    new_dates, new_et_fraction, _ = interpolate.update_scene_et_fraction_array(
+        output, et_fraction, SCENE_DATES, et_reference, etr_dates,
+        scene_date=SCENE_DATES[3], **args)
+    assert new_et_fraction.shape[0] == len(SCENE_DATES) - 1
+
+    expected = interpolate.from_scene_et_fraction_array(
+        new_et_fraction, new_dates, et_reference, etr_dates, **args)[1]
+    np.testing.assert_allclose(output, expected, atol=tol)
+
+
+@pytest.mark.parametrize(
+    'variables', [['ndvi'], ['count'], ['et_reference'], ['ndvi', 'count']])
+def test_update_scene_et_fraction_array_no_et(variables, tol=1E-8):
+    """The ET is not needed if et and et_fraction are not output variables"""
+    rng = np.random.default_rng(2)
+    et_fraction = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    ndvi = rng.uniform(0, 1, (len(SCENE_DATES), 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.5] = np.nan
+    ndvi[np.isnan(et_fraction)] = np.nan
+    etr_dates = np.arange('2017-06-01', '2017-11-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, etr_dates.size)
+    args = dict(start_date='2017-06-01', end_date='2017-11-01',
+                variables=variables, interp_days=32, t_interval='monthly')
+
+    output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, et_reference, etr_dates, ndvi=ndvi,
+        **args)[1]
+    new_dates, new_et_fraction, new_ndvi = \
+        interpolate.update_scene_et_fraction_array(
+            output, et_fraction, SCENE_DATES, et_reference, etr_dates,
+            scene_date='2017-08-02', scene_et_fraction=rng.uniform(0, 1, (3, 4)),
+            ndvi=ndvi, scene_ndvi=rng.uniform(0, 1, (3, 4)), **args)
+
+    expected = interpolate.from_scene_et_fraction_array(
+        new_et_fraction, new_dates, et_reference, etr_dates, ndvi=new_ndvi,
+        **args)[1]
+    np.testing.assert_allclose(output, expected, atol=tol)
+
+
+class SceneList(list):
+    """Scene stack list that records the scenes that are read"""
+    def __init__(self, *args):
+        super().__init__(*args)
+        self.read = set()
+
+    def __getitem__(self, index):
+        self.read.update(range(len(self))[index] if isinstance(index, slice)
+                         else [index])
+        return super().__getitem__(index)
+
+
+@pytest.mark.parametrize('scene_date', ['2017-07-20', '2017-09-09'])
+@pytest.mark.parametrize('t_interval', ['daily', 'monthly', 'annual'])
+def test_update_scene_et_fraction_array_counts(scene_date, t_interval,
+                                               tol=1E-8):
+    """Only the neighbor scenes are read when the counts are passed"""
+    rng = np.random.default_rng(4)
+    scene_dates = np.arange('2017-01-04', '2018-01-01', 8,
+                            dtype='datetime64[D]')
+    et_fraction = rng.uniform(0, 1, (scene_dates.size, 3, 4))
+    ndvi = rng.uniform(0, 1, (scene_dates.size, 3, 4))
+    et_fraction[rng.uniform(0, 1, et_fraction.shape) < 0.4] = np.nan
+    ndvi[rng.uniform(0, 1, ndvi.shape) < 0.4] = np.nan
+    etr_dates = np.arange('2017-01-01', '2018-01-01', dtype='datetime64[D]')
+    et_reference = rng.uniform(5, 10, (etr_dates.size, 3, 4))
+    variables = ['et', 'et_fraction', 'ndvi', 'count']
+    args = dict(start_date='2017-01-01', end_date='2018-01-01',
+                variables=variables, interp_days=32, t_interval=t_interval)
+    periods = {'daily': 365, 'monthly': 12, 'annual': 1}[t_interval]
+    counts = np.zeros((periods, 2, 3, 4), dtype=np.int32)
+
+    output = interpolate.from_scene_et_fraction_array(
+        et_fraction, scene_dates, et_reference, etr_dates, ndvi=ndvi,
+        counts=counts, **args)[1]
+    et_fraction_list = SceneList(et_fraction)
+    ndvi_list = SceneList(ndvi)
+    if scene_date in scene_dates.astype(str):
+        scene_et_fraction, scene_ndvi = None, None
+    else:
+        scene_et_fraction = rng.uniform(0, 1, (3, 4))
+        scene_et_fraction[0, 0] = np.nan
+        scene_ndvi = rng.uniform(0, 1, (3, 4))
+    new_dates, new_et_fraction, new_ndvi = \
+        interpolate.update_scene_et_fraction_array(
+            output, et_fraction_list, scene_dates, et_reference, etr_dates,
+            scene_date=scene_date, scene_et_fraction=scene_et_fraction,
+            ndvi=ndvi_list, scene_ndvi=scene_ndvi, counts=counts, **args)
+
+    # Only the scenes within 2 x interp_days are read
+    near = np.flatnonzero(np.abs(
+        (scene_dates - np.datetime64(scene_date)).astype(int)) <= 64)
+    assert et_fraction_list.read <= set(near)
+    assert ndvi_list.read <= set(near)
+    # The list stacks are updated in place
+    assert new_et_fraction is et_fraction_list
+    assert len(new_et_fraction) == new_dates.size
+
+    expected_counts = np.zeros_like(counts)
+    expected = interpolate.from_scene_et_fraction_array(
+        np.array(new_et_fraction), new_dates, et_reference, etr_dates,
+        ndvi=np.array(new_ndvi), counts=expected_counts, **args)[1]
+    np.testing.assert_allclose(output, expected, atol=tol)
+    np.testing.assert_array_equal(counts, expected_counts)
+
+
+def test_update_scene_et_fraction_array_exception():
+    with pytest.raises(ValueError):
+        interpolate.update_scene_et_fraction_array(
+            np.zeros((1, 1, 2)), np.zeros((1, 2)), ['2017-07-08'],
+            np.zeros(1), ['2017-07-08'], '2017-07-01', '2017-08-01', ['et'],
+            scene_date='2017-07-09')
+
+
+@pytest.mark.parametrize('scenes, shape', [[0, (3, 4)], [1, (3, 4)], [37, (7, 11)]])
+def test_packed_count(scenes, shape):
+    rng = np.random.default_rng(0)
+    masks = rng.uniform(0, 1, (scenes,) + shape) < 0.7
+    packed = interpolate.pack_masks(masks)
+    assert packed.dtype == np.uint64
+    assert packed.shape == (scenes, (shape[0] * shape[1] + 63) // 64)
+    np.testing.assert_array_equal(
+        interpolate.packed_count(packed, shape), masks.sum(axis=0))
+
+
+def test_from_scene_et_fraction_array_count_packed(monkeypatch):
+    """The count masks are packed one day at a time"""
+    pack_shapes = []
+    pack_masks = interpolate.pack_masks
+
+    def pack_masks_shape(masks):
+        pack_shapes.append(np.shape(masks))
+        return pack_masks(masks)
+
+    monkeypatch.setattr(interpolate, 'pack_masks', pack_masks_shape)
+    et_fraction = np.full((len(SCENE_DATES), 9, 13), 0.4)
+    et_fraction[1, 0, 0] = np.nan
+    etr_dates = np.arange('2017-07-01', '2017-10-01', dtype='datetime64[D]')
+    output = interpolate.from_scene_et_fraction_array(
+        et_fraction, SCENE_DATES, np.full(etr_dates.size, 10.0), etr_dates,
+        start_date='2017-07-01', end_date='2017-10-01', variables=['count'],
+        t_interval='monthly')[1]
+    assert pack_shapes == [(1, 9, 13)] * len(SCENE_DATES)
+    assert output[0, 0, 0, 0] == 2 and output[0, 0, 1, 1] == 3
+    assert output[2, 0, 0, 0] == 1
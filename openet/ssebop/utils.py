@@ -132,3 +132,78 @@ def valid_date(date_str, date_fmt='%Y-%m-%d'):
         return True
     except Exception as e:
         return False
+
+
+def parse_scene_id(image_id):
+    """Parse the scene ID, WRS2 tile, and date from a Landsat image ID
+
+    Parameters
+    ----------
+    image_id : str
+        Landsat image ID or system:index (i.e. 'LC08_044033_20170716',
+        'LANDSAT/LC08/C01/T1_SR/LC08_044033_20170716', or a merged
+        collection index like '1_2_LC08_044033_20170716').
+
+    Returns
+    -------
+    dict with 'scene_id', 'wrs2_tile', and 'date' (datetime) keys
+
+    Raises
+    ------
+    ValueError if the image ID does not end with a Landsat scene ID
+
+    """
+    scene_id = '_'.join(image_id.rsplit('/', 1)[-1].split('_')[-3:])
+    try:
+        sensor, wrs2, date_str = scene_id.split('_')
+        date = datetime.datetime.strptime(date_str, '%Y%m%d')
+    except ValueError:
+        raise ValueError('unsupported image ID: {}'.format(image_id))
+    if len(sensor) != 4 or len(wrs2) != 6 or not wrs2.isdigit():
+        raise ValueError('unsupported image ID: {}'.format(image_id))
+    return {
+        'scene_id': scene_id,
+        'wrs2_tile': 'p{}r{}'.format(wrs2[:3], wrs2[3:]),
+        'date': date,
+    }
+
+
+def date_windows(start_date, end_date, years=1):
+    """Split a date range into windows that start on January 1st
+
+    Parameters
+    ----------
+    start_date : str
+        ISO format inclusive start date (i.e. YYYY-MM-DD).
+    end_date : str
+        ISO format exclusive end date (i.e. YYYY-MM-DD).
+    years : int, optional
+        Number of calendar years in each window (the default is 1).
+
+    Returns
+    -------
+    list of (start_date, end_date) tuples
+
+    Raises
+    ------
+    ValueError if years is not a positive integer
+
+    Notes
+    -----
+    Only the first and last windows can be partial years, so the windows
+    never split a day, month, or year aggregation period.
+
+    """
+    if type(years) is not int or years <= 0:
+        raise ValueError('years must be a positive integer')
+    start_dt = datetime.datetime.strptime(start_date, '%Y-%m-%d')
+    end_dt = datetime.datetime.strptime(end_date, '%Y-%m-%d')
+    windows = []
+    window_start_dt = start_dt
+    while window_start_dt < end_dt:
+        window_end_dt = min(
+            datetime.datetime(window_start_dt.year + years, 1, 1), end_dt)
+        windows.append((window_start_dt.strftime('%Y-%m-%d'),
+                        window_end_dt.strftime('%Y-%m-%d')))
+        window_start_dt = window_end_dt
+    return windows
@@ -11,6 +11,7 @@ import sys
 import ee
 
 import openet.ssebop as ssebop
+from openet.ssebop.tasks import ReadyQueue, TaskSubmitter
 import utils
 # from . import utils
 
@@ -94,6 +95,20 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
     else:
         ee.Initialize(use_cloud_api=True)
 
+    # Export tasks are started from a pool of threads, with the delay time
+    #   converted to a maximum task start rate
+    # Task starts wait for the READY queue by checking the states of the
+    #   submitted tasks instead of requesting the full task list
+    if max_ready > 0:
+        ready_queue = ReadyQueue(max_ready, task_ids=[
+            t['id'] for t in utils.get_ee_tasks(
+                states=['READY'], verbose=False).values()])
+    else:
+        ready_queue = None
+    task_submitter = TaskSubmitter(
+        rate=1.0 / delay_time if delay_time > 0 else None,
+        ready_queue=ready_queue)
+
     # Get a Tmax image to set the Tcorr values to
     logging.debug('\nTmax properties')
     tmax_source = tmax_name.split('_', 1)[0]
@@ -540,12 +555,13 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
         )
 
         logging.info('  Starting export task')
-        utils.ee_task_start(task)
+        task_submitter.submit(task)
 
-        # Pause before starting the next export task
-        utils.delay_task(delay_time, max_ready)
         logging.debug('')
 
+    # Wait for the remaining export tasks to be started
+    task_submitter.shutdown()
+
 
 def arg_parse():
     """"""
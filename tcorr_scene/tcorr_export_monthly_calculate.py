@@ -8,12 +8,13 @@ import sys
 import ee
 
 import openet.ssebop as ssebop
+from openet.ssebop.tasks import ReadyQueue, TaskSubmitter
 import utils
 # from . import utils
 
 
 def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
-         max_ready=-1, reverse_flag=False):
+         max_ready=-1, reverse_flag=False, table_flag=False):
     """Compute monthly Tcorr images by WRS2 tile
 
     Parameters
@@ -32,6 +33,9 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
         implies no limit to the number of tasks that will be submitted.
     reverse_flag : bool, optional
         If True, process WRS2 tiles in reverse order.
+    table_flag : bool, optional
+        If True, compute the Tcorr statistics from the scene Tcorr tables
+        (see tcorr_export_scene_table.py) instead of from the Landsat scenes.
 
     """
     logging.info('\nCompute monthly Tcorr images by WRS2 tile')
@@ -53,6 +57,8 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
 
     tcorr_monthly_coll_id = '{}/{}_monthly'.format(
         ini['EXPORT']['export_coll'], tmax_name.lower())
+    tcorr_table_id_fmt = '{}/{}_scene_table/{{wrs2}}'.format(
+        ini['EXPORT']['export_coll'], tmax_name.lower())
 
     wrs2_coll_id = 'projects/earthengine-legacy/assets/' \
                    'projects/usgs-ssebop/wrs2_descending_custom'
@@ -124,6 +130,20 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
     else:
         ee.Initialize(use_cloud_api=True)
 
+    # Export tasks are started from a pool of threads, with the delay time
+    #   converted to a maximum task start rate
+    # Task starts wait for the READY queue by checking the states of the
+    #   submitted tasks instead of requesting the full task list
+    if max_ready > 0:
+        ready_queue = ReadyQueue(max_ready, task_ids=[
+            t['id'] for t in utils.get_ee_tasks(
+                states=['READY'], verbose=False).values()])
+    else:
+        ready_queue = None
+    task_submitter = TaskSubmitter(
+        rate=1.0 / delay_time if delay_time > 0 else None,
+        ready_queue=ready_queue)
+
 
     logging.debug('\nTmax properties')
     tmax_source = tmax_name.split('_', 1)[0]
@@ -360,7 +380,17 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
             # tcorr_img = tcorr_coll.reduce(reducer).rename(['tcorr', 'count'])
 
             # Compute stats from the image properties
-            tcorr_stats = ee.List(tcorr_coll.aggregate_array('tcorr_value')) \
+            if table_flag:
+                # Aggregate the scene Tcorr table instead of computing the
+                #   scene Tcorr statistics again
+                tcorr_coll = ee.FeatureCollection(
+                        tcorr_table_id_fmt.format(wrs2=wrs2_tile)) \
+                    .filterMetadata('pixel_count', 'not_less_than', min_pixel_count) \
+                    .filterMetadata('month', 'equals', month)
+                tcorr_values = tcorr_coll.aggregate_array('tcorr_p5')
+            else:
+                tcorr_values = tcorr_coll.aggregate_array('tcorr_value')
+            tcorr_stats = ee.List(tcorr_values) \
                 .reduce(reducer)
             tcorr_stats = ee.Dictionary(tcorr_stats) \
                 .combine({'median': 0, 'count': 0}, overwrite=False)
@@ -427,12 +457,13 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
             )
 
             logging.info('  Starting export task')
-            utils.ee_task_start(task)
+            task_submitter.submit(task)
 
-            # Pause before starting the next export task
-            utils.delay_task(delay_time, max_ready)
             logging.debug('')
 
+    # Wait for the remaining export tasks to be started
+    task_submitter.shutdown()
+
 
 def arg_parse():
     """"""
@@ -454,6 +485,9 @@ def arg_parse():
     parser.add_argument(
         '--reverse', default=False, action='store_true',
         help='Process tiles in reverse order')
+    parser.add_argument(
+        '--table', default=False, action='store_true',
+        help='Compute Tcorr from the scene Tcorr tables')
     parser.add_argument(
         '-o', '--overwrite', default=False, action='store_true',
         help='Force overwrite of existing files')
@@ -473,4 +507,4 @@ if __name__ == "__main__":
 
     main(ini_path=args.ini, overwrite_flag=args.overwrite,
          delay_time=args.delay, gee_key_file=args.key, max_ready=args.ready,
-         reverse_flag=args.reverse)
+         reverse_flag=args.reverse, table_flag=args.table)
@@ -9,12 +9,15 @@ import sys
 import ee
 
 import openet.ssebop as ssebop
+from openet.ssebop.ledger import RunLedger, fingerprint
+from openet.ssebop.tasks import ReadyQueue, TaskSubmitter
 import utils
 # from . import utils
 
 
 def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
-         max_ready=-1, cron_flag=False, reverse_flag=False, update_flag=False):
+         max_ready=-1, cron_flag=False, reverse_flag=False, update_flag=False,
+         ledger_path=None):
     """Compute scene Tcorr images by WRS2 tile
 
     Parameters
@@ -39,6 +42,11 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
         If True, process WRS2 tiles and dates in reverse order.
     update_flag : bool, optional
         If True, only overwrite scenes with an older model version.
+    ledger_path : str, None, optional
+        SQLite run ledger file path (the default is None).  If set, the
+        export states are read from the ledger (which is updated from the
+        asset list and the states of its own tasks) instead of the full task
+        list, and only the remaining exports are processed.
 
     """
     logging.info('\nCompute scene Tcorr images by WRS2 tile')
@@ -125,6 +133,20 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
     else:
         ee.Initialize(use_cloud_api=True)
 
+    # Export tasks are started from a pool of threads, with the delay time
+    #   converted to a maximum task start rate
+    # Task starts wait for the READY queue by checking the states of the
+    #   submitted tasks instead of requesting the full task list
+    if max_ready > 0:
+        ready_queue = ReadyQueue(max_ready, task_ids=[
+            t['id'] for t in utils.get_ee_tasks(
+                states=['READY'], verbose=False).values()])
+    else:
+        ready_queue = None
+    task_submitter = TaskSubmitter(
+        rate=1.0 / delay_time if delay_time > 0 else None,
+        ready_queue=ready_queue)
+
 
     # Get a Tmax image to set the Tcorr values to
     logging.debug('\nTmax properties')
@@ -217,14 +239,33 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
         input('Press ENTER to continue')
         ee.data.createAsset({'type': 'IMAGE_COLLECTION'}, tcorr_scene_coll_id)
 
-    # Get current asset list
-    logging.debug('\nGetting GEE asset list')
-    asset_list = utils.get_ee_assets(tcorr_scene_coll_id)
-    # if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
-    #     pprint.pprint(asset_list[:10])
+    if ledger_path:
+        ledger = RunLedger(ledger_path)
+        logging.debug('\nUpdating the run ledger task states')
+        ledger.sync_tasks()
+        if ledger.count(tcorr_scene_coll_id, states=['planned']):
+            # Tasks that were started without being recorded (i.e. if the
+            #   previous run stopped) are matched to the planned exports
+            ledger.sync_planned(tcorr_scene_coll_id, utils.get_ee_tasks(
+                states=['READY', 'RUNNING', 'COMPLETED'], verbose=False))
+        # Assets that were written outside of the ledger are marked completed
+        logging.debug('\nGetting GEE asset list')
+        ledger.sync_assets(
+            tcorr_scene_coll_id, utils.get_ee_assets(tcorr_scene_coll_id))
+        asset_list = set(ledger.asset_ids(
+            tcorr_scene_coll_id, states=['completed']))
+        tasks = ledger.active_tasks(tcorr_scene_coll_id)
+    else:
+        ledger = None
+
+        # Get current asset list
+        logging.debug('\nGetting GEE asset list')
+        asset_list = set(utils.get_ee_assets(tcorr_scene_coll_id))
+        # if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+        #     pprint.pprint(asset_list[:10])
 
-    # Get current running tasks
-    tasks = utils.get_ee_tasks()
+        # Get current running tasks
+        tasks = utils.get_ee_tasks()
     if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
         logging.debug('  Tasks: {}\n'.format(len(tasks)))
         input('ENTER')
@@ -336,6 +377,19 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
         else:
             asset_props = {}
 
+        if ledger is not None:
+            # Plan all of the tile exports so that only the remaining exports
+            #   (not started, failed, or with changed inputs) are processed
+            for image_id in image_id_list:
+                scene_id = image_id.rsplit('/', 1)[1]
+                ledger.plan(
+                    asset_id_fmt.format(
+                        coll_id=tcorr_scene_coll_id, scene_id=scene_id),
+                    export_id_fmt.format(
+                        product=tmax_name.lower(), scene_id=scene_id),
+                    fingerprint(image_id, ssebop.__version__, model_args))
+            remaining = set(ledger.remaining(tcorr_scene_coll_id))
+
         # Sort by date
         for image_id in sorted(image_id_list,
                                key=lambda k: k.split('/')[-1].split('_')[-1],
@@ -397,6 +451,14 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
                 if asset_id in asset_list:
                     logging.debug('  Asset already exists, removing')
                     ee.data.deleteAsset(asset_id)
+            elif ledger is not None:
+                if asset_id not in remaining:
+                    logging.debug('  Export submitted or completed, skipping')
+                    continue
+                elif asset_id in asset_list:
+                    # The asset was built with different export inputs
+                    logging.debug('  Asset inputs changed, removing')
+                    ee.data.deleteAsset(asset_id)
             else:
                 if export_id in tasks.keys():
                     logging.debug('  Task already submitted, exiting')
@@ -463,12 +525,16 @@ def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
             )
 
             logging.info('  Starting export task')
-            utils.ee_task_start(task)
+            if ledger is not None:
+                ledger.track(asset_id, task_submitter.submit(task))
+            else:
+                task_submitter.submit(task)
 
-        # Pause before starting the next date (not export task)
-        utils.delay_task(delay_time, max_ready)
         logging.debug('')
 
+    # Wait for the remaining export tasks to be started
+    task_submitter.shutdown()
+
 
 def arg_parse():
     """"""
@@ -496,6 +562,9 @@ def arg_parse():
     parser.add_argument(
         '--update', default=False, action='store_true',
         help='Update images with older model version numbers')
+    parser.add_argument(
+        '--ledger', default=None, metavar='FILE',
+        help='Run ledger SQLite file')
     parser.add_argument(
         '-o', '--overwrite', default=False, action='store_true',
         help='Force overwrite of existing files')
@@ -516,4 +585,4 @@ if __name__ == "__main__":
     main(ini_path=args.ini, overwrite_flag=args.overwrite,
          delay_time=args.delay, gee_key_file=args.key, max_ready=args.ready,
          cron_flag=args.cron, reverse_flag=args.reverse,
-         update_flag=args.update)
+         update_flag=args.update, ledger_path=args.ledger)
@@ -0,0 +1,331 @@
+import argparse
+from builtins import input
+import datetime
+import logging
+import pprint
+import sys
+
+import ee
+
+import openet.ssebop as ssebop
+from openet.ssebop.tasks import ReadyQueue, TaskSubmitter
+import utils
+# from . import utils
+
+
+def main(ini_path=None, overwrite_flag=False, delay_time=0, gee_key_file=None,
+         max_ready=-1, reverse_flag=False):
+    """Compute scene Tcorr tables by WRS2 tile
+
+    The table has one feature per Landsat scene with the scene Tcorr value
+    (tcorr_p5) and pixel count, so that the monthly and annual Tcorr scripts
+    can aggregate the table (see the "--table" option) instead of computing
+    the scene Tcorr statistics again.
+
+    Parameters
+    ----------
+    ini_path : str
+        Input file path.
+    overwrite_flag : bool, optional
+        If True, overwrite existing files (the default is False).
+    delay_time : float, optional
+        Delay time in seconds between starting export tasks (or checking the
+        number of queued tasks, see "max_ready" parameter).  The default is 0.
+    gee_key_file : str, None, optional
+        Earth Engine service account JSON key file (the default is None).
+    max_ready: int, optional
+        Maximum number of queued "READY" tasks.  The default is -1 which is
+        implies no limit to the number of tasks that will be submitted.
+    reverse_flag : bool, optional
+        If True, process WRS2 tiles in reverse order.
+
+    """
+    logging.info('\nCompute scene Tcorr tables by WRS2 tile')
+
+    ini = utils.read_ini(ini_path)
+
+    model_name = 'SSEBOP'
+    # model_name = ini['INPUTS']['et_model'].upper()
+
+    tmax_name = ini[model_name]['tmax_source']
+
+    export_id_fmt = 'tcorr_scene_{product}_{wrs2}_table'
+    asset_id_fmt = '{coll_id}/{wrs2}'
+
+    tcorr_table_folder_id = '{}/{}_scene_table'.format(
+        ini['EXPORT']['export_coll'], tmax_name.lower())
+
+    wrs2_coll_id = 'projects/earthengine-legacy/assets/' \
+                   'projects/usgs-ssebop/wrs2_descending_custom'
+    wrs2_tile_field = 'WRS2_TILE'
+
+    try:
+        wrs2_tiles = str(ini['INPUTS']['wrs2_tiles'])
+        wrs2_tiles = [x.strip() for x in wrs2_tiles.split(',')]
+        wrs2_tiles = sorted([x.lower() for x in wrs2_tiles if x])
+    except KeyError:
+        wrs2_tiles = []
+        logging.debug('  wrs2_tiles: not set in INI, defaulting to []')
+    except Exception as e:
+        raise e
+
+    try:
+        study_area_extent = str(ini['INPUTS']['study_area_extent']) \
+            .replace('[', '').replace(']', '').split(',')
+        study_area_extent = [float(x.strip()) for x in study_area_extent]
+    except KeyError:
+        study_area_extent = None
+        logging.debug('  study_area_extent: not set in INI')
+    except Exception as e:
+        raise e
+
+    # TODO: Add try/except blocks and default values?
+    collections = [x.strip() for x in ini['INPUTS']['collections'].split(',')]
+    cloud_cover = float(ini['INPUTS']['cloud_cover'])
+
+    # Extract the model keyword arguments from the INI
+    # Set the property name to lower case and try to cast values to numbers
+    model_args = {
+        k.lower(): float(v) if utils.is_number(v) else v
+        for k, v in dict(ini[model_name]).items()}
+
+
+    logging.info('\nInitializing Earth Engine')
+    if gee_key_file:
+        logging.info('  Using service account key file: {}'.format(gee_key_file))
+        # The "EE_ACCOUNT" parameter is not used if the key file is valid
+        ee.Initialize(ee.ServiceAccountCredentials('x', key_file=gee_key_file),
+                      use_cloud_api=True)
+    else:
+        ee.Initialize(use_cloud_api=True)
+
+    # Export tasks are started from a pool of threads, with the delay time
+    #   converted to a maximum task start rate
+    # Task starts wait for the READY queue by checking the states of the
+    #   submitted tasks instead of requesting the full task list
+    if max_ready > 0:
+        ready_queue = ReadyQueue(max_ready, task_ids=[
+            t['id'] for t in utils.get_ee_tasks(
+                states=['READY'], verbose=False).values()])
+    else:
+        ready_queue = None
+    task_submitter = TaskSubmitter(
+        rate=1.0 / delay_time if delay_time > 0 else None,
+        ready_queue=ready_queue)
+
+
+    logging.debug('\nTmax properties')
+    tmax_source = tmax_name.split('_', 1)[0]
+    tmax_version = tmax_name.split('_', 1)[1]
+    tmax_coll_id = 'projects/earthengine-legacy/assets/' \
+                   'projects/usgs-ssebop/tmax/{}'.format(tmax_name.lower())
+    tmax_coll = ee.ImageCollection(tmax_coll_id)
+    tmax_mask = ee.Image(tmax_coll.first()).select([0]).multiply(0)
+    logging.debug('  Collection: {}'.format(tmax_coll_id))
+    logging.debug('  Source: {}'.format(tmax_source))
+    logging.debug('  Version: {}'.format(tmax_version))
+
+
+    if study_area_extent is None:
+        if 'daymet' in tmax_name.lower():
+            # CGM - For now force DAYMET to a slightly smaller "CONUS" extent
+            study_area_extent = [-125, 25, -65, 49]
+            # study_area_extent =  [-125, 25, -65, 52]
+        elif 'cimis' in tmax_name.lower():
+            study_area_extent = [-124, 35, -119, 42]
+        else:
+            # TODO: Make sure output from bounds is in WGS84
+            study_area_extent = tmax_mask.geometry().bounds().getInfo()
+        logging.debug(f'\nStudy area extent not set in INI, '
+                      f'default to {study_area_extent}')
+    study_area_geom = ee.Geometry.Rectangle(
+        study_area_extent, proj='EPSG:4326', geodesic=False)
+
+
+    if not ee.data.getInfo(tcorr_table_folder_id):
+        logging.info('\nExport folder does not exist and will be built'
+                     '\n  {}'.format(tcorr_table_folder_id))
+        input('Press ENTER to continue')
+        ee.data.createAsset({'type': 'FOLDER'}, tcorr_table_folder_id)
+
+    # Get current asset list
+    logging.debug('\nGetting GEE asset list')
+    asset_list = utils.get_ee_assets(tcorr_table_folder_id, asset_type='Table')
+    # if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+    #     pprint.pprint(asset_list[:10])
+
+    # Get current running tasks
+    tasks = utils.get_ee_tasks()
+    if logging.getLogger().getEffectiveLevel() == logging.DEBUG:
+        logging.debug('  Tasks: {}\n'.format(len(tasks)))
+        input('ENTER')
+
+
+    # Get the list of WRS2 tiles that intersect the data area and study area
+    wrs2_coll = ee.FeatureCollection(wrs2_coll_id) \
+        .filterBounds(tmax_mask.geometry()) \
+        .filterBounds(study_area_geom)
+    if wrs2_tiles:
+        wrs2_coll = wrs2_coll.filter(ee.Filter.inList(wrs2_tile_field, wrs2_tiles))
+    wrs2_info = wrs2_coll.getInfo()['features']
+
+
+    for wrs2_ftr in sorted(wrs2_info,
+                           key=lambda k: k['properties']['WRS2_TILE'],
+                           reverse=reverse_flag):
+        wrs2_tile = wrs2_ftr['properties'][wrs2_tile_field]
+        logging.info('{}'.format(wrs2_tile))
+
+        wrs2_path = int(wrs2_tile[1:4])
+        wrs2_row = int(wrs2_tile[5:8])
+
+        export_id = export_id_fmt.format(
+            product=tmax_name.lower(), wrs2=wrs2_tile)
+        logging.debug('  Export ID: {}'.format(export_id))
+
+        asset_id = asset_id_fmt.format(
+            coll_id=tcorr_table_folder_id, wrs2=wrs2_tile)
+        logging.debug('  Asset ID: {}'.format(asset_id))
+
+        if overwrite_flag:
+            if export_id in tasks.keys():
+                logging.debug('  Task already submitted, cancelling')
+                ee.data.cancelTask(tasks[export_id]['id'])
+            # This is intentionally not an "elif" so that a task can be
+            # cancelled and an existing image/file/asset can be removed
+            if asset_id in asset_list:
+                logging.debug('  Asset already exists, removing')
+                ee.data.deleteAsset(asset_id)
+        else:
+            if export_id in tasks.keys():
+                logging.debug('  Task already submitted, exiting')
+                continue
+            elif asset_id in asset_list:
+                logging.debug('  Asset already exists, skipping')
+                continue
+
+        # The collection filters match the monthly and annual calculate
+        #   scripts so the table can be used in place of the scene images
+        # TODO: Will need to be changed/updated for SR collection
+        landsat_coll = ee.ImageCollection([])
+        if 'LANDSAT/LC08/C01/T1_TOA' in collections:
+            l8_coll = ee.ImageCollection('LANDSAT/LC08/C01/T1_TOA') \
+                .filterMetadata('WRS_PATH', 'equals', wrs2_path) \
+                .filterMetadata('WRS_ROW', 'equals', wrs2_row) \
+                .filterMetadata('CLOUD_COVER_LAND', 'less_than', cloud_cover) \
+                .filterMetadata('DATA_TYPE', 'equals', 'L1TP') \
+                .filter(ee.Filter.gt('system:time_start',
+                                     ee.Date('2013-03-24').millis()))
+            landsat_coll = landsat_coll.merge(l8_coll)
+        if 'LANDSAT/LE07/C01/T1_TOA' in collections:
+            l7_coll = ee.ImageCollection('LANDSAT/LE07/C01/T1_TOA') \
+                .filterMetadata('WRS_PATH', 'equals', wrs2_path) \
+                .filterMetadata('WRS_ROW', 'equals', wrs2_row) \
+                .filterMetadata('CLOUD_COVER_LAND', 'less_than', cloud_cover) \
+                .filterMetadata('DATA_TYPE', 'equals', 'L1TP')
+            landsat_coll = landsat_coll.merge(l7_coll)
+        if 'LANDSAT/LT05/C01/T1_TOA' in collections:
+            l5_coll = ee.ImageCollection('LANDSAT/LT05/C01/T1_TOA') \
+                .filterMetadata('WRS_PATH', 'equals', wrs2_path) \
+                .filterMetadata('WRS_ROW', 'equals', wrs2_row) \
+                .filterMetadata('CLOUD_COVER_LAND', 'less_than', cloud_cover) \
+                .filterMetadata('DATA_TYPE', 'equals', 'L1TP') \
+                .filter(ee.Filter.lt('system:time_start',
+                                     ee.Date('2011-12-31').millis()))
+            landsat_coll = landsat_coll.merge(l5_coll)
+
+        def tcorr_ftr_func(landsat_img):
+            # TODO: Will need to be changed for SR
+            t_obj = ssebop.Image.from_landsat_c1_toa(landsat_img, **model_args)
+            t_stats = ee.Dictionary(t_obj.tcorr_stats) \
+                .combine({'tcorr_p5': 0, 'tcorr_count': 0}, overwrite=False)
+            date = ee.Date(ee.Image(landsat_img).get('system:time_start'))
+            date = ee.Date(date.format('yyyy-MM-dd'))
+
+            # Landsat 8 day cycle day (see tcorr_image cycle_dates)
+            cycle_day = date.difference(ee.Date('1970-01-03'), 'day') \
+                .round().mod(8).add(1)
+
+            return ee.Feature(None, {
+                'scene_id': t_obj._scene_id,
+                'image_id': ee.Image(landsat_img).get('system:id'),
+                'wrs2_tile': wrs2_tile,
+                'date': date.format('yyyy-MM-dd'),
+                'year': date.get('year'),
+                'month': date.get('month'),
+                'cycle_day': cycle_day,
+                'cloud_cover_land': ee.Image(landsat_img).get('CLOUD_COVER_LAND'),
+                'tcorr_p5': t_stats.get('tcorr_p5'),
+                'pixel_count': t_stats.get('tcorr_count'),
+            })
+
+        output_coll = ee.FeatureCollection(landsat_coll.map(tcorr_ftr_func)) \
+            .set({
+                'date_ingested': datetime.datetime.today().strftime('%Y-%m-%d'),
+                'model_name': model_name,
+                'model_version': ssebop.__version__,
+                'tmax_source': tmax_source.upper(),
+                'tmax_version': tmax_version.upper(),
+                'wrs2_path': wrs2_path,
+                'wrs2_row': wrs2_row,
+                'wrs2_tile': wrs2_tile,
+            })
+        # pprint.pprint(output_coll.first().getInfo())
+        # input('ENTER')
+
+        logging.debug('  Building export task')
+        task = ee.batch.Export.table.toAsset(
+            collection=output_coll,
+            description=export_id,
+            assetId=asset_id,
+        )
+
+        logging.info('  Starting export task')
+        task_submitter.submit(task)
+
+        logging.debug('')
+
+    # Wait for the remaining export tasks to be started
+    task_submitter.shutdown()
+
+
+def arg_parse():
+    """"""
+    parser = argparse.ArgumentParser(
+        description='Compute/export scene Tcorr tables by WRS2 tile',
+        formatter_class=argparse.ArgumentDefaultsHelpFormatter)
+    parser.add_argument(
+        '-i', '--ini', type=utils.arg_valid_file,
+        help='Input file', metavar='FILE')
+    parser.add_argument(
+        '--delay', default=0, type=float,
+        help='Delay (in seconds) between each export tasks')
+    parser.add_argument(
+        '--key', type=utils.arg_valid_file, metavar='FILE',
+        help='JSON key file')
+    parser.add_argument(
+        '--ready', default=-1, type=int,
+        help='Maximum number of queued READY tasks')
+    parser.add_argument(
+        '--reverse', default=False, action='store_true',
+        help='Process tiles in reverse order')
+    parser.add_argument(
+        '-o', '--overwrite', default=False, action='store_true',
+        help='Force overwrite of existing files')
+    parser.add_argument(
+        '-d', '--debug', default=logging.INFO, const=logging.DEBUG,
+        help='Debug level logging', action='store_const', dest='loglevel')
+    args = parser.parse_args()
+
+    return args
+
+
+if __name__ == "__main__":
+    args = arg_parse()
+
+    logging.basicConfig(level=args.loglevel, format='%(message)s')
+    logging.getLogger('googleapiclient').setLevel(logging.ERROR)
+
+    main(ini_path=args.ini, overwrite_flag=args.overwrite,
+         delay_time=args.delay, gee_key_file=args.key, max_ready=args.ready,
+         reverse_flag=args.reverse)
@@ -117,13 +117,15 @@ def ee_task_start(task, n=10):
     return task
 
 
-def get_ee_assets(asset_id):
+def get_ee_assets(asset_id, asset_type='Image'):
     """Return Google Earth Engine assets
 
     Parameters
     ----------
     asset_id : str
         A folder or image collection ID.
+    asset_type : str, optional
+        Type of the assets to return (the default is 'Image').
 
     Returns
     -------
@@ -132,7 +134,7 @@ def get_ee_assets(asset_id):
     """
     try:
         asset_list = ee.data.getList({'id': asset_id})
-        asset_list = [x['id'] for x in asset_list if x['type'] == 'Image']
+        asset_list = [x['id'] for x in asset_list if x['type'] == asset_type]
         # asset_list = ee.data.listImages(asset_id)
         # logging.debug(asset_list)
     except Exception as e: